@@ -0,0 +1,36 @@
+"""add product image metadata
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('product_images', sa.Column('image_format', sa.String(length=10), nullable=True))
+    op.add_column('product_images', sa.Column('mode', sa.String(length=10), nullable=True))
+    op.add_column('product_images', sa.Column('has_alpha', sa.Boolean(), nullable=True))
+    op.add_column('product_images', sa.Column('dominant_colors', postgresql.JSON(astext_type=sa.Text()), nullable=True))
+    op.add_column('product_images', sa.Column('phash', sa.String(length=16), nullable=True))
+    op.add_column('product_images', sa.Column('detected_type', sa.String(length=20), nullable=True))
+    op.create_index('ix_product_images_phash', 'product_images', ['phash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_images_phash', table_name='product_images')
+    op.drop_column('product_images', 'detected_type')
+    op.drop_column('product_images', 'phash')
+    op.drop_column('product_images', 'dominant_colors')
+    op.drop_column('product_images', 'has_alpha')
+    op.drop_column('product_images', 'mode')
+    op.drop_column('product_images', 'image_format')
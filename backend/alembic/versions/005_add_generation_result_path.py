@@ -0,0 +1,31 @@
+"""add generation result path
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('generation_results', sa.Column('result_path', sa.Text(), nullable=True))
+    op.alter_column('generation_results', 'result',
+        existing_type=postgresql.JSON(astext_type=sa.Text()),
+        nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM generation_results WHERE result IS NULL")
+    op.alter_column('generation_results', 'result',
+        existing_type=postgresql.JSON(astext_type=sa.Text()),
+        nullable=False)
+    op.drop_column('generation_results', 'result_path')
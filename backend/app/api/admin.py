@@ -0,0 +1,93 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.profiling import SamplingProfiler, profiling_service, PROFILE_MODES
+from app.core.security import require_admin
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _ensure_profiling_enabled():
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling deshabilitado")
+
+
+@router.post("/admin/profile", response_class=PlainTextResponse)
+async def capture_profile(
+    duration: float = Query(10.0, gt=0, description="Segundos de muestreo"),
+    mode: str = Query("cpu", description="Modo: wall, cpu"),
+    interval_ms: float = Query(None, gt=0, description="Intervalo de muestreo en ms"),
+):
+    """
+    Captura un perfil estadístico del worker durante `duration` segundos
+
+    Retorna collapsed stacks listos para flamegraph.pl o speedscope:
+    ```
+    curl -X POST -H "X-Admin-Token: $TOKEN" \\
+      "https://.../api/admin/profile?duration=15&mode=cpu" > profile.txt
+    flamegraph.pl profile.txt > profile.svg
+    ```
+    """
+    _ensure_profiling_enabled()
+
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"Modo no soportado: {mode}")
+
+    if not profiling_service.try_acquire():
+        raise HTTPException(status_code=409, detail="Ya hay un perfil en curso en este worker")
+
+    try:
+        profiler = SamplingProfiler(
+            mode=mode,
+            interval=(interval_ms or settings.PROFILING_INTERVAL_MS) / 1000,
+        )
+        profiler.start()
+        try:
+            await asyncio.sleep(min(duration, settings.PROFILING_MAX_SECONDS))
+        finally:
+            profiler.stop()
+    finally:
+        profiling_service.release()
+
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(profiler.num_samples),
+            "X-Profile-Duration": f"{profiler.elapsed:.3f}",
+        },
+    )
+
+
+@router.get("/admin/profile/requests/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str):
+    """
+    Obtiene el perfil de una petición marcada con el header `X-Profile`
+    """
+    _ensure_profiling_enabled()
+
+    profile = profiling_service.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    return PlainTextResponse(
+        profile["collapsed"],
+        headers={
+            "X-Profile-Label": profile["label"],
+            "X-Profile-Samples": str(profile["samples"]),
+            "X-Profile-Duration": f"{profile['duration']:.3f}",
+        },
+    )
+
+
+@router.get("/admin/metrics")
+async def get_metrics():
+    """
+    Métricas en memoria de este worker (contadores y resúmenes)
+    
+    Incluye tiempos y tamaños de codificación de imágenes por formato.
+    """
+    return metrics.snapshot()
@@ -0,0 +1,88 @@
+import json
+
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.services.campaign import CampaignError, campaign_service
+from app.services.product import ProductService
+
+router = APIRouter()
+product_service = ProductService()
+
+
+class GenerateCampaignRequest(BaseModel):
+    """Request para generar una campaña completa de un producto"""
+    product_id: str = Field(..., description="Producto de la campaña")
+    platforms: List[str] = Field(..., description="Plataformas: facebook, instagram, tiktok, linkedin, whatsapp")
+    formats: Optional[Dict[str, List[str]]] = Field(
+        None, description="Formatos de imagen por plataforma (default: el primero de cada plataforma)"
+    )
+    include_images: bool = Field(default=True, description="Generar imágenes además del copy")
+
+    # Copy
+    language: str = Field(default="es-MX", description="Idioma: es-MX, en")
+    quality_level: str = Field(default="rapido", description="Nivel de calidad: rapido, profesional, elite")
+    api_key: Optional[str] = Field(None, description="API key del provider de copy (temporal)")
+    llm_provider: str = Field(default="groq", description="Provider: groq, google, fake")
+    llm_model: str = Field(default="llama-4-scout", description="Modelo a usar")
+    tone: str = Field(default="casual", description="Tono: casual, formal, juvenil, profesional")
+    length: str = Field(default="medio", description="Longitud: corto, medio, largo")
+    use_emojis: bool = Field(default=False, description="Incluir emojis")
+    cta: Optional[str] = Field(None, description="Call to action personalizado")
+    num_variants: int = Field(default=1, ge=1, le=5, description="Variantes de copy por plataforma")
+    temperature: float = Field(default=0.7, ge=0.0, le=1.0, description="Creatividad del modelo")
+
+    # Imágenes
+    image_api_key: Optional[str] = Field(None, description="API key del provider de imagen (temporal)")
+    image_provider: str = Field(default="google", description="Provider: google, fake")
+    image_model: str = Field(default="imagen-4-fast", description="Modelo de imagen")
+    image_prompt: Optional[str] = Field(None, description="Prompt de imagen (default: prompt de producto)")
+    add_logo: bool = Field(default=True, description="Agregar el logo del producto (si tiene)")
+    fit: str = Field(default="smart", description="Encuadre: contain, cover, smart")
+
+
+@router.post("/campaigns/generate")
+async def generate_campaign(request: GenerateCampaignRequest, db: Session = Depends(get_db)):
+    """
+    Genera la campaña completa de un producto en una sola petición
+
+    Copy por plataforma e imágenes por formato corren en paralelo como un
+    DAG (cada formato se compone en cuanto está su imagen base); todo se
+    guarda como una `Generation` con sus `Copy` y `GeneratedImage`.
+
+    Respuesta NDJSON (un evento JSON por línea):
+    ```
+    {"event": "plan", "generation_id": "...", "tasks": ["copy:instagram", "image:square", ...]}
+    {"event": "task", "task": "copy:instagram", "status": "started"}
+    {"event": "task", "task": "copy:instagram", "status": "completed", "elapsed_ms": 812.4, "copies": [...]}
+    ...
+    {"event": "done", "generation_id": "...", "status": "completed", "copies": 2, "images": 3,
+     "failed": [], "elapsed_ms": 2104.7, "critical_path_ms": 2051.3}
+    ```
+    Una tarea fallida (`"status": "failed"`) omite sus dependientes
+    (`"skipped"`); el resto continúa y `done.status` es `partial`.
+    """
+    try:
+        campaign_service.plan(request.platforms, request.formats, request.include_images, request.fit)
+    except CampaignError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    if not product_service.get_product(db, request.product_id):
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+    async def events():
+        try:
+            async for event in campaign_service.run(**request.model_dump()):
+                yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,24 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+import json
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.singleflight import singleflight
 from app.services.copy_generator import CopyGeneratorService
+from app.services.generation import GenerationService
+from app.services.history import HistoryService
+from app.services.idempotency import IdempotencyError, idempotency_service
+from app.services.product import ProductService
 
 router = APIRouter()
 copy_service = CopyGeneratorService()
+generation_service = GenerationService()
+history_service = HistoryService()
+product_service = ProductService()
 
 
 class GenerateCopyRequest(BaseModel):
@@ -19,8 +33,8 @@ class GenerateCopyRequest(BaseModel):
     quality_level: str = Field(default="rapido", description="Nivel de calidad: rapido, profesional, elite")
     
     # Provider (temporal - luego vendrá de config de usuario)
-    api_key: str = Field(..., description="API key del provider (temporal)")
-    llm_provider: str = Field(default="groq", description="Provider: groq, google, azure")
+    api_key: Optional[str] = Field(None, description="API key del provider (temporal; no aplica a fake ni al modo instant)")
+    llm_provider: str = Field(default="groq", description="Provider: groq, google, azure, fake")
     llm_model: str = Field(default="llama-4-scout", description="Modelo a usar")
     
     # Copy config
@@ -33,16 +47,36 @@ class GenerateCopyRequest(BaseModel):
     
     # Generation params
     temperature: float = Field(default=0.7, ge=0.0, le=1.0, description="Creatividad del modelo")
+    structured: bool = Field(default=False, description="Copy como JSON por slots (hook, body, benefits, hashtags, cta)")
+    
+    # Modo instantáneo (templates, sin LLM)
+    mode: str = Field(default="llm", description="Modo: llm, instant (templates, sin LLM)")
+    category: Optional[str] = Field(None, description="Categoría para los hooks de template")
+    seed: int = Field(default=0, description="Semilla de variación del modo instant")
+    
+    @model_validator(mode="after")
+    def check_api_key(self):
+        """El modo llm necesita API key, salvo con el provider fake"""
+        if self.mode not in ("llm", "instant"):
+            raise ValueError("mode debe ser 'llm' o 'instant'")
+        if self.mode == "llm" and self.llm_provider != "fake" and not self.api_key:
+            raise ValueError(f"api_key es requerida para el provider '{self.llm_provider}'")
+        return self
 
 
 class GenerateCopyResponse(BaseModel):
     """Response con el copy generado"""
     copy_text: str
+    structured: Optional[dict] = None
     metadata: dict
 
 
 @router.post("/generate/copy", response_model=GenerateCopyResponse)
-async def generate_copy(request: GenerateCopyRequest):
+async def generate_copy(
+    request: GenerateCopyRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Genera copy de marketing para una plataforma específica
     
@@ -59,9 +93,16 @@ async def generate_copy(request: GenerateCopyRequest):
       "benefits": ["100% orgánico", "Sabor único", "Apoya a productores locales"]
     }
     ```
+    
+    Peticiones idénticas en curso (doble submit, reintentos) comparten una
+    sola llamada al provider (single-flight).
+    
+    Con el header `Idempotency-Key`, un reintento con la misma key recibe
+    la respuesta guardada (header `Idempotent-Replayed: true`) o espera a
+    la petición original; la misma key con otro request da 422.
     """
     try:
-        result = await copy_service.generate_copy(
+        generate = lambda: copy_service.generate_copy(
             # Producto
             product_name=request.product_name,
             description=request.description,
@@ -81,11 +122,208 @@ async def generate_copy(request: GenerateCopyRequest):
             benefits=request.benefits,
             keywords=request.keywords,
             # Generation
-            temperature=request.temperature
+            temperature=request.temperature,
+            structured=request.structured,
+            # Instant
+            mode=request.mode,
+            category=request.category,
+            seed=request.seed
+        )
+        
+        async def run():
+            if request.mode == "instant":
+                return await generate()
+            return await singleflight.do("copy", request.model_dump(), generate)
+        
+        result, replayed = await idempotency_service.execute(
+            "copy", idempotency_key, request.model_dump(), run
         )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
         
         return GenerateCopyResponse(**result)
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/copy/stream")
+async def stream_copy(request: GenerateCopyRequest):
+    """
+    Copy instantáneo de template de inmediato y el del LLM en streaming
+    
+    Respuesta NDJSON (un evento JSON por línea):
+    ```
+    {"event": "instant", "copy_text": "...", "metadata": {...}}
+    {"event": "delta", "text": "..."}
+    ...
+    {"event": "final", "copy_text": "...", "metadata": {...}}
+    ```
+    Si el LLM falla después del copy instantáneo, el último evento es
+    `{"event": "error", "detail": "..."}`.
+    """
+    async def events():
+        try:
+            async for event in copy_service.stream_copy(
+                # Producto
+                product_name=request.product_name,
+                description=request.description,
+                # Config
+                platform=request.platform,
+                language=request.language,
+                quality_level=request.quality_level,
+                # Provider
+                llm_provider=request.llm_provider,
+                llm_model=request.llm_model,
+                api_key=request.api_key,
+                # Copy config
+                tone=request.tone,
+                length=request.length,
+                use_emojis=request.use_emojis,
+                cta=request.cta,
+                benefits=request.benefits,
+                keywords=request.keywords,
+                category=request.category,
+                seed=request.seed,
+                # Generation
+                temperature=request.temperature
+            ):
+                yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class GenerateVariantsRequest(GenerateCopyRequest):
+    """Request para generar varias variantes de copy en una sola petición"""
+    num_variants: int = Field(default=3, ge=2, le=5, description="Número de variantes")
+    product_id: Optional[str] = Field(None, description="Producto al que se asocia la generación")
+
+
+class CopyVariant(BaseModel):
+    """Variante de copy guardada"""
+    id: str
+    variant_number: int
+    copy_text: str
+
+
+class GenerateVariantsResponse(BaseModel):
+    """Response con las variantes guardadas"""
+    generation_id: str
+    variants: List[CopyVariant]
+    metadata: dict
+
+
+@router.post("/generate/copy/variants", response_model=GenerateVariantsResponse)
+async def generate_copy_variants(
+    request: GenerateVariantsRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Genera `num_variants` variantes de copy con una sola petición al provider
+    
+    Las variantes se guardan como filas `Copy` (variant_number 1..N) de una
+    nueva generación. Si el modelo repite variantes, se guardan menos.
+    
+    Con `Idempotency-Key` un reintento no vuelve a generar ni a guardar:
+    recibe la misma generación.
+    """
+    if request.product_id and not product_service.get_product(db, request.product_id):
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    
+    try:
+        generate = lambda: copy_service.generate_variants(
+            # Producto
+            product_name=request.product_name,
+            description=request.description,
+            # Config
+            platform=request.platform,
+            num_variants=request.num_variants,
+            language=request.language,
+            quality_level=request.quality_level,
+            # Provider
+            llm_provider=request.llm_provider,
+            llm_model=request.llm_model,
+            api_key=request.api_key,
+            # Copy config
+            tone=request.tone,
+            length=request.length,
+            use_emojis=request.use_emojis,
+            cta=request.cta,
+            benefits=request.benefits,
+            keywords=request.keywords,
+            # Generation
+            temperature=request.temperature,
+            # Instant
+            mode=request.mode,
+            category=request.category,
+            seed=request.seed
+        )
+        
+        def save(result: dict) -> GenerateVariantsResponse:
+            if not result["variants"]:
+                raise Exception("El modelo no devolvió variantes")
+            
+            generation = generation_service.create_generation(
+                db,
+                platforms=[request.platform],
+                product_id=request.product_id,
+                tone=request.tone,
+                length=request.length,
+                use_emojis=request.use_emojis,
+                cta=request.cta,
+                quality_level=request.quality_level,
+                llm_used="template/instant" if request.mode == "instant" else f"{request.llm_provider}/{request.llm_model}",
+            )
+            copies = generation_service.add_copies(
+                db, generation.id, request.platform, result["variants"]
+            )
+            history_service.create_history_entry(
+                db,
+                generation_id=generation.id,
+                action="generated",
+                metadata={"variants": len(copies), "variants_mode": result["metadata"]["variants_mode"]},
+            )
+            
+            return GenerateVariantsResponse(
+                generation_id=str(generation.id),
+                variants=[
+                    CopyVariant(id=str(copy.id), variant_number=copy.variant_number, copy_text=copy.copy_text)
+                    for copy in copies
+                ],
+                metadata=result["metadata"],
+            )
+        
+        async def run():
+            if request.mode == "instant":
+                return save(await generate()).model_dump()
+            # Solo la generación se comparte; cada request guarda su generación
+            result = await singleflight.do(
+                "copy_variants", request.model_dump(exclude={"product_id"}), generate
+            )
+            return save(result).model_dump()
+        
+        # Con Idempotency-Key se guarda la respuesta completa: un reintento
+        # no crea otra generación
+        result, replayed = await idempotency_service.execute(
+            "copy_variants", idempotency_key, request.model_dump(), run
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        
+        return GenerateVariantsResponse(**result)
+        
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -96,5 +334,6 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "copy_generator",
-        "providers": ["groq", "google"]
+        "providers": ["groq", "google", "fake"],
+        "modes": ["llm", "instant"]
     }
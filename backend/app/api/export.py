@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Header, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from io import BytesIO
 
 from app.services.export import ExportService
+from app.services.idempotency import IdempotencyError, idempotency_service
 
 router = APIRouter()
 export_service = ExportService()
@@ -25,7 +26,10 @@ class ShareURLsResponse(BaseModel):
 
 
 @router.post("/export/zip")
-async def export_zip_package(request: ExportRequest):
+async def export_zip_package(
+    request: ExportRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Exporta todo el contenido en un archivo ZIP
     
@@ -47,28 +51,42 @@ async def export_zip_package(request: ExportRequest):
     ```
     
     Returns: Archivo ZIP descargable
+    
+    Con el header `Idempotency-Key` un reintento descarga el mismo ZIP
+    (guardado en IDEMPOTENCY_DIR) sin volver a armarlo.
     """
     try:
         # Por ahora solo exportamos copy (imágenes en fase 2)
-        zip_bytes = await export_service.create_export_package(
-            copy_data=request.copy_data,
-            images={},  # TODO: Agregar imágenes cuando estén funcionando
-            product_name=request.product_name,
-            metadata={
-                "platforms": request.platforms,
-                "hashtags": request.hashtags
-            }
+        zip_bytes, replayed = await idempotency_service.execute_file(
+            "export_zip",
+            idempotency_key,
+            request.model_dump(),
+            lambda: export_service.create_export_package(
+                copy_data=request.copy_data,
+                images={},  # TODO: Agregar imágenes cuando estén funcionando
+                product_name=request.product_name,
+                metadata={
+                    "platforms": request.platforms,
+                    "hashtags": request.hashtags
+                }
+            )
         )
         
+        headers = {
+            "Content-Disposition": f"attachment; filename={request.product_name.replace(' ', '_')}_export.zip"
+        }
+        if replayed:
+            headers["Idempotent-Replayed"] = "true"
+        
         # Retornar como descarga
         return StreamingResponse(
             BytesIO(zip_bytes),
             media_type="application/zip",
-            headers={
-                "Content-Disposition": f"attachment; filename={request.product_name.replace(' ', '_')}_export.zip"
-            }
+            headers=headers
         )
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
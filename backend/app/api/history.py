@@ -85,7 +85,7 @@ async def get_generation_history(
             HistoryEntry(
                 id=str(h.id),
                 action=h.action,
-                metadata=h.metadata,
+                metadata=h.request_metadata,
                 created_at=h.created_at,
             )
             for h in history
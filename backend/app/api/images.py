@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Response
 from pydantic import BaseModel, Field
 from typing import Optional
+from app.core.singleflight import singleflight
+from app.services.idempotency import IdempotencyError, idempotency_service
 from app.services.image_generator import ImageGeneratorService
 
 router = APIRouter()
@@ -11,7 +13,7 @@ class GenerateImageRequest(BaseModel):
     """Request para generar imágenes"""
     # Provider
     api_key: str = Field(..., description="API key del provider")
-    image_provider: str = Field(default="google", description="Provider: google, azure")
+    image_provider: str = Field(default="google", description="Provider: google, azure, fake")
     image_model: str = Field(default="imagen-4-fast", description="Modelo de imagen")
     
     # Image config
@@ -30,7 +32,11 @@ class GenerateImageResponse(BaseModel):
 
 
 @router.post("/generate/image", response_model=GenerateImageResponse)
-async def generate_image(request: GenerateImageRequest):
+async def generate_image(
+    request: GenerateImageRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Genera imágenes usando IA
     
@@ -54,21 +60,39 @@ async def generate_image(request: GenerateImageRequest):
     ```
     
     ## Nota:
-    Por ahora retorna estructura de respuesta indicando que requiere setup adicional.
+    Google Imagen aún requiere setup adicional. Para desarrollo y load tests
+    sin API keys usa `"image_provider": "fake"` (`image_model`: fake-fast,
+    fake-slow, fake-hires, fake-logo); las imágenes se retornan en base64.
+    
+    ## Reintentos:
+    Con el header `Idempotency-Key` un reintento recibe la respuesta
+    guardada (`Idempotent-Replayed: true`) sin volver a generar.
     """
     try:
-        result = await image_service.generate_image(
-            image_provider=request.image_provider,
-            image_model=request.image_model,
-            api_key=request.api_key,
-            prompt=request.prompt,
-            width=request.width,
-            height=request.height,
-            num_images=request.num_images,
+        # Peticiones idénticas en curso comparten una sola llamada (single-flight)
+        run = lambda: singleflight.do(
+            "image",
+            request.model_dump(),
+            lambda: image_service.generate_image(
+                image_provider=request.image_provider,
+                image_model=request.image_model,
+                api_key=request.api_key,
+                prompt=request.prompt,
+                width=request.width,
+                height=request.height,
+                num_images=request.num_images,
+            ),
+        )
+        result, replayed = await idempotency_service.execute(
+            "image", idempotency_key, request.model_dump(), run, as_file=True
         )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
         
         return GenerateImageResponse(**result)
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.services.product import ProductService
+from app.services.ingest import ingest_service, IngestError
+from app.services.phash_index import phash_index, MAX_CHUNK_RADIUS
 from app.db.models import ImageType
 
 router = APIRouter()
@@ -41,6 +43,43 @@ class ProductResponse(BaseModel):
         from_attributes = True
 
 
+class ProductImageResponse(BaseModel):
+    """Response con info de una imagen del producto"""
+    id: str
+    product_id: str
+    image_type: str
+    file_path: str
+    file_size: Optional[int]
+    width: Optional[int]
+    height: Optional[int]
+    image_format: Optional[str] = None
+    mode: Optional[str] = None
+    has_alpha: Optional[bool] = None
+    dominant_colors: Optional[List[dict]] = None
+    phash: Optional[str] = None
+    detected_type: Optional[str] = None
+    duplicates: Optional[List[dict]] = None
+
+
+def _image_response(image, duplicates: Optional[List[dict]] = None) -> ProductImageResponse:
+    return ProductImageResponse(
+        id=str(image.id),
+        product_id=str(image.product_id),
+        image_type=image.image_type.value,
+        file_path=image.file_path,
+        file_size=image.file_size,
+        width=image.width,
+        height=image.height,
+        image_format=image.image_format,
+        mode=image.mode,
+        has_alpha=image.has_alpha,
+        dominant_colors=image.dominant_colors,
+        phash=image.phash,
+        detected_type=image.detected_type,
+        duplicates=duplicates,
+    )
+
+
 @router.post("/products", response_model=ProductResponse)
 async def create_product(
     request: CreateProductRequest,
@@ -142,6 +181,121 @@ async def list_products(
     ]
 
 
+@router.post("/products/{product_id}/images", response_model=ProductImageResponse)
+async def upload_product_image(
+    product_id: str,
+    request: Request,
+    image_type: Optional[ImageType] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Sube una imagen del producto (multipart/form-data, campo `file`)
+    
+    El archivo se recibe en streaming directo a disco. Se rechaza con 413 si
+    excede MAX_UPLOAD_BYTES o MAX_IMAGE_MEGAPIXELS y con 415 si no es
+    JPEG/PNG/WebP/AVIF. La orientación EXIF se aplica al guardar.
+    
+    Se calcula y guarda la metadata (modo, alfa, colores dominantes, pHash,
+    tipo detectado). Sin `image_type` se usa el tipo detectado.
+    
+    `duplicates` lista las imágenes del mismo producto que son casi
+    idénticas (misma foto a otro tamaño/calidad) para reutilizar sus
+    derivados en lugar de regenerarlos.
+    
+    ```
+    curl -F "file=@foto.jpg" ".../api/products/{id}/images?image_type=product"
+    ```
+    """
+    if not product_service.get_product(db, product_id):
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    
+    try:
+        upload = await ingest_service.receive_upload(request)
+        result = await ingest_service.ingest(upload["tmp_path"])
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    try:
+        image = product_service.add_product_image(
+            db=db,
+            product_id=product_id,
+            file_path=result["file_path"],
+            image_type=image_type or ImageType(result["detected_type"]),
+            width=result["width"],
+            height=result["height"],
+            file_size=result["file_size"],
+            image_format=result["format"],
+            mode=result["mode"],
+            has_alpha=result["has_alpha"],
+            dominant_colors=result["dominant_colors"],
+            phash=result["phash"],
+            detected_type=result["detected_type"],
+        )
+    except Exception as e:
+        # El archivo ya está en UPLOAD_DIR: sin fila que lo referencie, se borra
+        ingest_service.discard(result["file_path"])
+        raise HTTPException(status_code=500, detail=str(e))
+    if image is None:
+        # Producto borrado mientras se recibía el upload
+        ingest_service.discard(result["file_path"])
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    
+    # Trae al índice esta imagen y las ingestadas por otros workers
+    phash_index.refresh(db)
+    duplicates = phash_index.find_near_duplicates(
+        db, image.phash, product_id=product_id, exclude_id=image.id
+    )
+    
+    return _image_response(image, duplicates)
+
+
+@router.get("/products/{product_id}/images", response_model=List[ProductImageResponse])
+async def list_product_images(
+    product_id: str,
+    image_type: Optional[ImageType] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista las imágenes de un producto con su metadata (sin abrir archivos)"""
+    if not product_service.get_product(db, product_id):
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    
+    images = product_service.get_product_images(db, product_id, image_type)
+    return [_image_response(image) for image in images]
+
+
+@router.get("/products/{product_id}/images/{image_id}/duplicates")
+async def find_duplicate_images(
+    product_id: str,
+    image_id: str,
+    max_distance: Optional[int] = Query(
+        None, ge=0, le=4 * MAX_CHUNK_RADIUS, description="Distancia de Hamming máxima (hasta 12)"
+    ),
+    all_products: bool = Query(False, description="Buscar en todos los productos"),
+    db: Session = Depends(get_db)
+):
+    """
+    Casi-duplicados de una imagen por hash perceptual (índice multi-index
+    hashing en memoria)
+    """
+    image = product_service.get_product_image(db, image_id)
+    if not image or str(image.product_id) != product_id:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    if not image.phash:
+        raise HTTPException(status_code=409, detail="La imagen no tiene hash perceptual")
+    
+    duplicates = phash_index.find_near_duplicates(
+        db,
+        image.phash,
+        max_distance=max_distance,
+        product_id=None if all_products else product_id,
+        exclude_id=image.id,
+    )
+    
+    return {"image_id": image_id, "phash": image.phash, "duplicates": duplicates}
+
+
 @router.delete("/products/{product_id}")
 async def delete_product(
     product_id: str,
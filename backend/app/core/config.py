@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 from cryptography.fernet import Fernet
 
 
@@ -24,6 +24,68 @@ class Settings(BaseSettings):
     # Groq
     GROQ_API_KEY: Optional[str] = None
     
+    # Prompt caching (Gemini): prefijos de al menos este tamaño usan
+    # context caching explícito; los menores, system_instruction
+    GEMINI_CACHE_MIN_TOKENS: int = 4096
+    GEMINI_CACHE_TTL_SECONDS: int = 3600
+    
+    # Límite de caracteres del copy: fracción mínima del cuerpo que debe
+    # conservar el recorte local antes de recurrir a una llamada "shorten"
+    COPY_TRIM_MIN_KEEP: float = 0.5
+    # Margen sobre los tokens estimados para la longitud pedida (max_tokens)
+    COPY_MAX_TOKENS_MARGIN: float = 1.3
+    
+    # Single-flight: peticiones idénticas en curso comparten una sola
+    # llamada al provider ('auto' = advisory locks si la DB es PostgreSQL)
+    SINGLEFLIGHT_BACKEND: str = "auto"  # 'auto', 'postgres', 'local', 'off'
+    SINGLEFLIGHT_RESULT_TTL_SECONDS: int = 30  # Resultado visible para otros workers
+    SINGLEFLIGHT_WAIT_SECONDS: float = 120.0  # Espera máxima por el lock de otro worker
+    SINGLEFLIGHT_DIR: str = "exports/singleflight"  # Resultados grandes (imágenes en base64)
+    
+    # Idempotency-Key (generación y export)
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600  # Respuesta guardada para reintentos
+    IDEMPOTENCY_LOCK_SECONDS: int = 300  # Vida máxima de un "in_progress" (worker caído)
+    IDEMPOTENCY_WAIT_SECONDS: float = 60.0  # Espera de un reintento por la petición original
+    IDEMPOTENCY_DIR: str = "exports/idempotency"  # Respuestas en archivo (ZIP, imágenes)
+    
+    # Observabilidad (OpenTelemetry)
+    OTEL_ENABLED: bool = False
+    OTEL_SERVICE_NAME: str = "mango-backend"
+    OTEL_EXPORTER: str = "otlp"  # 'otlp', 'file', 'console'
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://localhost:4317"
+    OTEL_FILE_EXPORT_PATH: str = "traces.jsonl"
+    OTEL_SAMPLE_RATIO: float = 0.01  # Fracción de trazas muestreadas
+    
+    # Fuentes (watermarks)
+    FONT_DIRS: List[str] = ["/usr/share/fonts", "/usr/local/share/fonts"]
+    WATERMARK_FONT: str = "DejaVuSans"  # Familia (nombre de archivo) o ruta a TTF/OTF
+    TEXT_LAYER_CACHE_SIZE: int = 256
+    
+    # Uploads (ingesta de imágenes)
+    UPLOAD_DIR: str = "uploads"
+    MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    MAX_IMAGE_MEGAPIXELS: float = 40.0  # También fija PIL.Image.MAX_IMAGE_PIXELS
+    MAX_CONCURRENT_INGESTS: int = 4  # Decodificaciones simultáneas por worker
+    PHASH_DUPLICATE_DISTANCE: int = 8  # Hamming máximo (de 64 bits) para casi-duplicados
+    PHASH_REFRESH_OVERLAP_SECONDS: int = 300  # Ventana que se vuelve a leer en cada refresh del índice
+    
+    # Compositor
+    LOGO_CACHE_SIZE: int = 64  # Logos preescalados (por hash, ancho y opacidad)
+    COMPOSITOR_WORKERS: Optional[int] = None  # Hilos del executor (default: núcleos)
+    SMART_CROP_CACHE_SIZE: int = 256  # Recortes por (hash de imagen, aspecto)
+    
+    # Campañas (generación completa de copy + imágenes)
+    GENERATED_DIR: str = "uploads/generated"  # Imágenes generadas y compuestas
+    CAMPAIGN_MAX_CONCURRENCY: int = 8  # Llamadas simultáneas a providers por campaña
+    
+    # Administración
+    ADMIN_TOKEN: Optional[str] = None  # Header X-Admin-Token
+    
+    # Profiling (solo admin, opt-in)
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: float = 60.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,66 @@
+import threading
+from typing import Any, Dict, Tuple
+
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Métricas en memoria del proceso (contadores y resúmenes)
+
+    Sin dependencias externas; se consultan en /api/admin/metrics.
+    Cada worker tiene sus propios valores.
+    """
+
+    def __init__(self):
+        self._counters: Dict[Tuple, float] = {}
+        self._summaries: Dict[Tuple, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Registra una observación (tiempos, tamaños): count/sum/min/max
+        """
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                self._summaries[key] = {"count": 1, "sum": value, "min": value, "max": value}
+                return
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, list]:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            summaries = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    **summary,
+                    "avg": summary["sum"] / summary["count"],
+                }
+                for (name, labels), summary in sorted(self._summaries.items())
+            ]
+        return {"counters": counters, "summaries": summaries}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+# Instancia global de métricas
+metrics = MetricsRegistry()
@@ -0,0 +1,205 @@
+"""
+Profiler estadístico por muestreo para workers en vivo
+
+Toma muestras periódicas de los stacks de todos los hilos del proceso
+(`sys._current_frames`) desde un hilo aparte, sin instrumentar el código.
+El resultado se entrega en formato "collapsed stacks" compatible con
+flamegraph.pl / speedscope:
+
+    main.py:run;image_compositor.py:apply_glow_effect 42
+
+Modos:
+- wall: cuenta cada muestra de cada hilo (incluye esperas de I/O)
+- cpu: solo cuenta hilos cuyo CPU time avanzó desde la muestra anterior
+  (usa relojes de CPU por hilo; en plataformas sin soporte cae a wall)
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.security import verify_admin_token
+
+
+PROFILE_MODES = ("wall", "cpu")
+
+
+def _thread_cpu_time(thread_id: int) -> Optional[float]:
+    """
+    CPU time consumido por un hilo (None si no está disponible)
+    """
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError, OverflowError):
+        return None
+
+
+def _format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Profiler por muestreo con duración acotada
+    """
+
+    def __init__(self, mode: str = "wall", interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+
+        self.mode = mode
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.num_samples = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cpu_times: Dict[int, float] = {}
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="mango-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - (self.started_at or 0.0)
+        return self
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_id)
+
+    def _sample(self, own_id: int) -> None:
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+
+            if self.mode == "cpu":
+                cpu = _thread_cpu_time(thread_id)
+                if cpu is not None:
+                    previous = self._cpu_times.get(thread_id)
+                    self._cpu_times[thread_id] = cpu
+                    # Hilo dormido/esperando: no consume CPU, no se cuenta
+                    if previous is None or cpu <= previous:
+                        continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_format_frame(frame))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            stack.reverse()
+
+            self.samples[";".join(stack)] += 1
+            self.num_samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Stacks en formato collapsed (una línea por stack: "a;b;c cuenta")
+        """
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.samples.most_common()
+        )
+
+
+class ProfilingService:
+    """
+    Coordina perfiles bajo demanda y perfiles por petición
+
+    - Un solo perfil a la vez por worker (bajo demanda o por petición):
+      el muestreo es por proceso y dos profilers se mezclarían
+    - Los perfiles por petición se guardan en memoria (últimos N)
+    """
+
+    def __init__(self, max_stored: int = 50):
+        self._capture_lock = threading.Lock()
+        self._stored: "OrderedDict[str, Dict]" = OrderedDict()
+        self._max_stored = max_stored
+
+    def try_acquire(self) -> bool:
+        return self._capture_lock.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._capture_lock.release()
+
+    def store(self, profiler: SamplingProfiler, label: str) -> str:
+        """
+        Guarda un perfil terminado y retorna su ID
+        """
+        profile_id = uuid.uuid4().hex
+        self._stored[profile_id] = {
+            "label": label,
+            "mode": profiler.mode,
+            "duration": profiler.elapsed,
+            "samples": profiler.num_samples,
+            "collapsed": profiler.collapsed(),
+        }
+        while len(self._stored) > self._max_stored:
+            self._stored.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        return self._stored.get(profile_id)
+
+
+profiling_service = ProfilingService()
+
+
+async def profile_request_middleware(request, call_next):
+    """
+    Middleware HTTP: perfila la petición si trae `X-Profile: wall|cpu`
+
+    Requiere X-Admin-Token válido. La respuesta incluye `X-Profile-Id`
+    para descargar el perfil en /api/admin/profile/requests/{id}.
+    Como el muestreo es por proceso, las peticiones concurrentes también
+    aparecen en el perfil. Solo un perfil a la vez por worker: si ya hay
+    uno en curso, responde 409 sin ejecutar la petición.
+    """
+    mode = request.headers.get("x-profile")
+    if not mode or not verify_admin_token(request.headers.get("x-admin-token")):
+        return await call_next(request)
+
+    mode = mode.lower()
+    if mode not in PROFILE_MODES:
+        mode = "wall"
+
+    if not profiling_service.try_acquire():
+        return JSONResponse(
+            status_code=409,
+            content={"detail": "Ya hay un perfil en curso en este worker"},
+        )
+
+    try:
+        profiler = SamplingProfiler(
+            mode=mode, interval=settings.PROFILING_INTERVAL_MS / 1000
+        )
+        profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.stop()
+    finally:
+        profiling_service.release()
+
+    profile_id = profiling_service.store(
+        profiler, label=f"{request.method} {request.url.path}"
+    )
+    response.headers["X-Profile-Id"] = profile_id
+    return response
@@ -0,0 +1,25 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    """
+    Verifica el token de administrador (comparación en tiempo constante)
+
+    Si ADMIN_TOKEN no está configurado, ningún token es válido.
+    """
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, settings.ADMIN_TOKEN)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency para endpoints de administración
+    """
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Acceso de administrador requerido")
@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import engine, SessionLocal
+from app.core.metrics import metrics
+from app.db.models import GenerationResult
+
+# Intervalo de sondeo del advisory lock mientras otro worker lo tiene
+LOCK_POLL_SECONDS = 0.1
+
+# Resultados más grandes (respuestas de imagen en base64) van a un archivo
+# en SINGLEFLIGHT_DIR y la fila guarda solo la ruta
+INLINE_MAX_BYTES = 64 * 1024
+
+
+def request_key(kind: str, payload: Dict[str, Any]) -> str:
+    """
+    Key canónica de un request: sha256 del JSON con llaves ordenadas
+
+    Requests iguales producen la misma key sin importar el orden de los
+    campos. La API key forma parte del hash (no se comparten resultados
+    entre cuentas) pero nunca se guarda en claro.
+    """
+    canonical = json.dumps(
+        {"kind": kind, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _lock_id(key: str) -> int:
+    """
+    bigint con signo para pg_advisory_lock a partir de la key hex
+    """
+    return int.from_bytes(bytes.fromhex(key[:16]), "big", signed=True)
+
+
+class SingleFlight:
+    """
+    Coalescing de peticiones idénticas en curso (single-flight)
+
+    - En el worker: la primera petición de una key crea una task; las
+      idénticas que llegan mientras corre esperan esa misma task
+      (asyncio.shield: si el cliente que la inició se desconecta, la
+      llamada sigue para los demás)
+    - Entre workers (PostgreSQL): el líder de cada worker toma un advisory
+      lock por key. Quien lo obtiene ejecuta la llamada y deja el
+      resultado en `generation_results` (TTL corto). Los que encontraron
+      el lock tomado esperan y reutilizan ese resultado en vez de llamar
+      al provider. Sin contención no se lee la tabla: una petición que
+      llega después de que la anterior terminó genera de nuevo (no es
+      un cache de respuestas).
+    - Con otra DB (o SINGLEFLIGHT_BACKEND=local) solo aplica el coalescing
+      local; con 'off' no hace nada
+
+    Los resultados deben ser serializables a JSON. El líder mantiene una
+    conexión del pool (la del lock) mientras dura la llamada al provider.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        backend = settings.SINGLEFLIGHT_BACKEND
+        if backend == "auto":
+            backend = "postgres" if engine.dialect.name == "postgresql" else "local"
+        self.backend = backend
+
+    async def do(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Ejecuta `fn()` una sola vez por request canónico en curso
+
+        Args:
+            kind: Tipo de request ('copy', 'image', ...), parte de la key
+            payload: Campos del request que definen el resultado
+            fn: Llamada real (sin argumentos)
+        """
+        if self.backend == "off":
+            return await fn()
+
+        key = request_key(kind, payload)
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.increment("singleflight_total", kind=kind, role="local_follower")
+            return await asyncio.shield(task)
+
+        if self.backend == "postgres":
+            task = asyncio.ensure_future(self._run_with_lock(kind, key, fn))
+        else:
+            task = asyncio.ensure_future(self._run(kind, fn))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _run(self, kind: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        metrics.increment("singleflight_total", kind=kind, role="leader")
+        return await fn()
+
+    async def _run_with_lock(self, kind: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_event_loop()
+
+        waiting_since = datetime.utcnow()
+        connection, contended = await self._acquire(key)
+        try:
+            if connection is not None and contended:
+                # Otro worker tenía la misma petición en curso: su resultado
+                # (guardado mientras esperábamos) sirve para esta
+                stored = await loop.run_in_executor(None, self._load_result, key, waiting_since)
+                if stored is not None:
+                    metrics.increment("singleflight_total", kind=kind, role="remote_follower")
+                    return stored
+
+            result = await self._run(kind, fn)
+
+            if connection is not None:
+                try:
+                    await loop.run_in_executor(None, self._store_result, kind, key, result)
+                except Exception:
+                    # Sin fila compartida los demás workers generan por su
+                    # cuenta; la generación (ya pagada) se responde igual
+                    metrics.increment("singleflight_store_errors_total", kind=kind)
+            return result
+        finally:
+            if connection is not None:
+                await loop.run_in_executor(None, self._release, connection, key)
+
+    async def _acquire(self, key: str):
+        """
+        (conexión con el advisory lock de la key tomado, True si estaba
+        tomado por otro worker); la conexión es None si se agotó
+        SINGLEFLIGHT_WAIT_SECONDS (se ejecuta sin coordinar)
+
+        Se sondea con pg_try_advisory_lock: la espera no ocupa conexiones
+        del pool ni hilos del executor.
+        """
+        loop = asyncio.get_event_loop()
+        deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_SECONDS
+        contended = False
+        while True:
+            connection = await loop.run_in_executor(None, self._try_lock, key)
+            if connection is not None:
+                return connection, contended
+            contended = True
+            if time.monotonic() >= deadline:
+                metrics.increment("singleflight_lock_timeouts_total")
+                return None, contended
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+
+    @staticmethod
+    def _try_lock(key: str):
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": _lock_id(key)}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            return connection
+        connection.close()
+        return None
+
+    @staticmethod
+    def _release(connection, key: str) -> None:
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _lock_id(key)})
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _load_result(key: str, since: datetime) -> Optional[Any]:
+        """
+        Resultado guardado desde `since` (no uno de una petición anterior)
+        """
+        with SessionLocal() as db:
+            row = db.query(GenerationResult.result, GenerationResult.result_path)\
+                .filter(
+                    GenerationResult.key == key,
+                    GenerationResult.created_at >= since,
+                    GenerationResult.expires_at > datetime.utcnow(),
+                )\
+                .first()
+        if row is None:
+            return None
+        if row.result_path:
+            try:
+                with open(row.result_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None
+        return row.result
+
+    @staticmethod
+    def _store_result(kind: str, key: str, result: Any) -> None:
+        now = datetime.utcnow()
+        data = json.dumps(result, default=str, ensure_ascii=False)
+        inline, path = None, None
+        if len(data) > INLINE_MAX_BYTES:
+            path = os.path.join(settings.SINGLEFLIGHT_DIR, f"{key}.json")
+            os.makedirs(settings.SINGLEFLIGHT_DIR, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        else:
+            inline = json.loads(data)
+
+        values = {
+            "key": key,
+            "kind": kind,
+            "result": inline,
+            "result_path": path,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=settings.SINGLEFLIGHT_RESULT_TTL_SECONDS),
+        }
+        statement = insert(GenerationResult).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["key"],
+            set_={column: value for column, value in values.items() if column != "key"},
+        )
+        with SessionLocal() as db:
+            # Limpieza de expirados en la misma transacción (índice por expires_at)
+            expired = db.query(GenerationResult.key, GenerationResult.result_path)\
+                .filter(GenerationResult.expires_at <= now)\
+                .all()
+            if expired:
+                db.query(GenerationResult)\
+                    .filter(GenerationResult.key.in_([row.key for row in expired]))\
+                    .delete(synchronize_session=False)
+            db.execute(statement)
+            db.commit()
+
+        for row in expired:
+            # El archivo de la misma key ya fue reemplazado por el nuevo
+            if row.result_path and row.result_path != path:
+                try:
+                    os.remove(row.result_path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "inflight": len(self._inflight)}
+
+
+# Instancia global
+singleflight = SingleFlight()
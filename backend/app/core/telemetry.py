@@ -0,0 +1,178 @@
+"""
+Tracing distribuido con OpenTelemetry
+
+Cubre el camino completo de una petición:
+API (FastAPI) → servicios → providers → base de datos (SQLAlchemy).
+
+OpenTelemetry es una dependencia opcional: si los paquetes no están
+instalados o OTEL_ENABLED=false, `traced` y `span` son no-ops y el costo
+por llamada es una sola verificación de variable global.
+"""
+import functools
+import inspect
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende del entorno
+    OTEL_AVAILABLE = False
+
+
+# Tracer activo (None = tracing deshabilitado)
+_tracer = None
+
+
+if OTEL_AVAILABLE:
+
+    class FileSpanExporter(SpanExporter):
+        """
+        Exporter que escribe un span JSON por línea
+
+        Pensado para tests y desarrollo local sin collector OTLP.
+        """
+
+        def __init__(self, file_path: str):
+            self.file_path = file_path
+
+        def export(self, spans) -> "SpanExportResult":
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                for s in spans:
+                    f.write(s.to_json(indent=None) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+
+def _build_exporter():
+    """
+    Crea el exporter según OTEL_EXPORTER ('otlp', 'file', 'console')
+    """
+    exporter_name = settings.OTEL_EXPORTER.lower()
+
+    if exporter_name == "file":
+        return FileSpanExporter(settings.OTEL_FILE_EXPORT_PATH)
+    if exporter_name == "console":
+        return ConsoleSpanExporter()
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+
+    raise ValueError(f"Unknown OTEL exporter: {settings.OTEL_EXPORTER}")
+
+
+def setup_telemetry(app=None, engine=None) -> bool:
+    """
+    Inicializa el tracing e instrumenta FastAPI y SQLAlchemy
+
+    El sampler es ParentBased(TraceIdRatioBased(OTEL_SAMPLE_RATIO)): solo se
+    registra la fracción configurada de trazas (respetando la decisión del
+    servicio que llama), y los spans no muestreados son no-recording. La
+    exportación es en batch en un hilo aparte, fuera del camino de la petición.
+
+    Args:
+        app: Aplicación FastAPI a instrumentar
+        engine: Engine de SQLAlchemy a instrumentar
+
+    Returns:
+        bool: True si el tracing quedó activo
+    """
+    global _tracer
+
+    if not settings.OTEL_ENABLED or not OTEL_AVAILABLE:
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.OTEL_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("mango")
+
+    # Instrumentación automática (cada una es opcional)
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+            FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
+        except ImportError:
+            pass
+
+    if engine is not None:
+        try:
+            from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+            SQLAlchemyInstrumentor().instrument(engine=engine, tracer_provider=provider)
+        except ImportError:
+            pass
+
+    try:
+        # Groq y otros SDKs usan httpx por debajo
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        HTTPXClientInstrumentor().instrument(tracer_provider=provider)
+    except ImportError:
+        pass
+
+    return True
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Context manager para un span manual
+
+    Ejemplo:
+        with span("PromptBuilder.build_copy_prompt", {"platform": platform}):
+            ...
+    """
+    if _tracer is None:
+        yield None
+        return
+
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorador que envuelve una función (sync o async) en un span
+
+    Args:
+        name: Nombre del span (default: Clase.metodo)
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with _tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+
+        return sync_wrapper
+
+    return decorator
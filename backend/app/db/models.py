@@ -94,6 +94,14 @@ class ProductImage(Base):
     width = Column(Integer)
     height = Column(Integer)
     
+    # Metadata calculada en la ingesta (ver ImageMetadataService)
+    image_format = Column(String(10))  # 'JPEG', 'PNG', 'WEBP', 'AVIF'
+    mode = Column(String(10))  # Modo PIL: 'RGB', 'RGBA', 'P', etc.
+    has_alpha = Column(Boolean)  # Transparencia real (no solo canal alfa)
+    dominant_colors = Column(JSON)  # [{"color": "#aabbcc", "ratio": 0.42}, ...]
+    phash = Column(String(16), index=True)  # Hash perceptual de 64 bits (hex)
+    detected_type = Column(String(20))  # 'product' o 'logo' (heurística)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relaciones
@@ -183,9 +191,39 @@ class History(Base):
     generation_id = Column(UUID(as_uuid=True), ForeignKey("generations.id"), nullable=False)
     
     action = Column(String(50))  # 'generated', 'edited', 'regenerated', 'exported'
-    request_metadata = Column(JSON)  # Información adicional de la acción (renombrado de 'metadata' para evitar conflicto con SQLAlchemy)
+    request_metadata = Column("metadata", JSON)  # Información adicional de la acción (renombrado de 'metadata' para evitar conflicto con SQLAlchemy)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relaciones
-    generation = relationship("Generation", back_populates="history")
+    generation = relationship("Generation", back_populates="history_entries")
+
+
+class GenerationResult(Base):
+    """Resultado reciente de una generación por key canónica (single-flight entre workers)"""
+    __tablename__ = "generation_results"
+
+    key = Column(String(64), primary_key=True)  # sha256 del request canónico
+    kind = Column(String(50))  # 'copy', 'copy_variants', 'image'
+    result = Column(JSON)  # Resultado chico en línea
+    result_path = Column(Text)  # Resultado grande (imágenes) en SINGLEFLIGHT_DIR
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class IdempotencyKey(Base):
+    """Peticiones con header Idempotency-Key y su respuesta guardada"""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(320), primary_key=True)  # "{scope}:{Idempotency-Key}"
+    scope = Column(String(50))  # 'copy', 'copy_variants', 'image', 'export_zip'
+    request_hash = Column(String(64), nullable=False)  # sha256 del request canónico
+    status = Column(String(20), nullable=False)  # 'in_progress', 'completed'
+    
+    # Respuesta: JSON o puntero a archivo (respuestas binarias)
+    response_body = Column(JSON)
+    response_path = Column(Text)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api import copy, config, products, history, images, export
+from app.core.database import engine
+from app.core.telemetry import setup_telemetry
+from app.core.profiling import profile_request_middleware
+from app.api import copy, config, products, history, images, export, admin, campaigns
 
 app = FastAPI(
     title="Mango Marketing AI",
@@ -25,6 +28,15 @@ app.include_router(products.router, prefix="/api", tags=["products"])
 app.include_router(history.router, prefix="/api", tags=["history"])
 app.include_router(images.router, prefix="/api", tags=["images"])
 app.include_router(export.router, prefix="/api", tags=["export"])
+app.include_router(campaigns.router, prefix="/api", tags=["campaigns"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+
+# Profiling por petición (header X-Profile, solo admin)
+if settings.PROFILING_ENABLED:
+    app.middleware("http")(profile_request_middleware)
+
+# Tracing (no-op si OTEL_ENABLED=false)
+setup_telemetry(app, engine)
 
 @app.get("/")
 async def root():
@@ -1,5 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+from app.services.output_parser import parse_variants
+
+# Tokens extra de la respuesta con la lista JSON de variantes
+JSON_LIST_TOKENS = 48
+
+
+def flatten_messages(messages: List[Dict[str, Any]]) -> str:
+    """
+    Une mensajes estructurados en un solo prompt de texto
+    
+    Equivale al formato histórico "{system}\n\n{user}".
+    """
+    return "\n\n".join(message["content"] for message in messages)
 
 
 class BaseLLMProvider(ABC):
@@ -7,6 +21,10 @@ class BaseLLMProvider(ABC):
     Clase base abstracta para proveedores de LLM (Large Language Models)
     """
     
+    # True si el provider devuelve N candidatos en una sola petición
+    # (parámetro `n` / candidate_count) vía generate_candidates
+    SUPPORTS_CANDIDATES = False
+    
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
@@ -27,12 +45,135 @@ class BaseLLMProvider(ABC):
             max_tokens: Número máximo de tokens
             temperature: Creatividad del modelo (0-1)
             **kwargs: Parámetros adicionales específicos del provider
+                (`stop`: lista de stop sequences, común a todos)
             
         Returns:
             str: Copy generado
         """
         pass
     
+    async def stream_copy(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Genera copy como stream de fragmentos de texto
+        
+        Implementación por defecto: un solo fragmento con el copy completo.
+        Los providers con streaming nativo la sobrescriben.
+        """
+        yield await self.generate_copy(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+    
+    async def generate_from_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera copy a partir de mensajes estructurados
+        
+        Args:
+            messages: [{"role": "system" | "user", "content": str, "cache": bool}]
+                `cache=True` marca un prefijo estable (idéntico byte a byte
+                entre llamadas) que el provider puede cachear
+            
+        Implementación por defecto: aplana los mensajes y llama a
+        generate_copy. Los providers con roles o caching nativo la
+        sobrescriben.
+        """
+        return await self.generate_copy(
+            prompt=flatten_messages(messages),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+    
+    async def stream_from_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Versión streaming de generate_from_messages
+        """
+        async for chunk in self.stream_copy(
+            prompt=flatten_messages(messages),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        ):
+            yield chunk
+    
+    async def generate_structured(
+        self,
+        messages: List[Dict[str, Any]],
+        schema: Dict[str, Any],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera una respuesta JSON que debe cumplir `schema` (JSON schema)
+        
+        Implementación por defecto: el prompt ya describe el JSON esperado
+        y la respuesta se valida/repara fuera del provider. Los providers
+        con modo JSON nativo la sobrescriben.
+        
+        Returns:
+            str: Texto JSON (posiblemente inválido; ver structured_copy)
+        """
+        return await self.generate_from_messages(
+            messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+    
+    async def generate_candidates(
+        self,
+        messages: List[Dict[str, Any]],
+        n: int,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> List[str]:
+        """
+        Genera hasta `n` candidatos en una sola petición
+        
+        Implementación por defecto: agrega `list_instruction` (la petición
+        de un arreglo JSON de variantes) al último mensaje y parsea la
+        respuesta con output_parser; puede traer menos de `n`. Los
+        providers con SUPPORTS_CANDIDATES la sobrescriben con candidatos
+        nativos e ignoran `list_instruction`.
+        """
+        list_instruction = kwargs.pop("list_instruction", None)
+        # Las stop sequences del copy cortarían la lista ("Variante 2")
+        kwargs.pop("stop", None)
+        
+        if list_instruction:
+            last = messages[-1]
+            messages = messages[:-1] + [{**last, "content": last["content"] + list_instruction}]
+        
+        response = await self.generate_from_messages(
+            messages,
+            max_tokens=max_tokens * n + JSON_LIST_TOKENS,
+            temperature=temperature,
+            **kwargs
+        )
+        return parse_variants(response, n)
+    
     @abstractmethod
     async def get_model_info(self) -> Dict[str, Any]:
         """
@@ -123,7 +264,7 @@ class ProviderFactory:
         Crea una instancia del provider de LLM especificado
         
         Args:
-            provider_name: Nombre del provider ('groq', 'google', 'azure')
+            provider_name: Nombre del provider ('groq', 'google', 'azure', 'fake')
             api_key: API key del provider
             model: Nombre del modelo a usar
             
@@ -132,11 +273,13 @@ class ProviderFactory:
         """
         from app.providers.llm.groq import GroqProvider
         from app.providers.llm.gemini import GeminiProvider
+        from app.providers.llm.fake import FakeLLMProvider
         # from app.providers.llm.azure_openai import AzureOpenAIProvider
         
         providers = {
             'groq': GroqProvider,
             'google': GeminiProvider,
+            'fake': FakeLLMProvider,
             # 'azure': AzureOpenAIProvider,
         }
         
@@ -156,7 +299,7 @@ class ProviderFactory:
         Crea una instancia del provider de imágenes especificado
         
         Args:
-            provider_name: Nombre del provider ('google', 'azure', 'replicate')
+            provider_name: Nombre del provider ('google', 'azure', 'replicate', 'fake')
             api_key: API key del provider
             model: Nombre del modelo a usar
             
@@ -164,10 +307,12 @@ class ProviderFactory:
             BaseImageProvider: Instancia del provider
         """
         from app.providers.image.google_imagen import GoogleImagenProvider
+        from app.providers.image.fake import FakeImageProvider
         # from app.providers.image.azure_flux import AzureFluxProvider
         
         providers = {
             'google': GoogleImagenProvider,
+            'fake': FakeImageProvider,
             # 'azure': AzureFluxProvider,
         }
         
@@ -0,0 +1,192 @@
+import asyncio
+import itertools
+import random
+from io import BytesIO
+from typing import Dict, Any, List
+
+from PIL import Image, ImageDraw
+
+from app.providers.base import BaseImageProvider
+from app.providers.simulation import LatencyModel, stable_seed
+from app.core.telemetry import traced
+
+
+class FakeImageProvider(BaseImageProvider):
+    """
+    Provider de imágenes determinista para desarrollo, benchmarks y load tests
+    - No requiere API key ni red
+    - Mismo prompt + misma semilla → mismos píxeles
+    - Latencia, tasa de errores, tamaño y formato configurables por modelo
+    """
+
+    MODEL_INFO = {
+        "fake-fast": {
+            "name": "Fake Fast",
+            "cost_per_image": 0.0,
+            "max_resolution": "2048x2048",
+            "capabilities": ["text_to_image"],
+            "latency": "lognormal:400:0.3",
+            "error_rate": 0.0,
+            "size": None,  # None = respeta width/height solicitados
+            "format": "PNG",
+            "transparent": False,
+            "seed": 0,
+        },
+        "fake-slow": {
+            "name": "Fake Slow",
+            "cost_per_image": 0.0,
+            "max_resolution": "2048x2048",
+            "capabilities": ["text_to_image"],
+            "latency": "lognormal:6000:0.4",
+            "error_rate": 0.0,
+            "size": None,
+            "format": "PNG",
+            "transparent": False,
+            "seed": 0,
+        },
+        "fake-hires": {
+            "name": "Fake Hi-Res",
+            "cost_per_image": 0.0,
+            "max_resolution": "4000x3000",
+            "capabilities": ["text_to_image"],
+            "latency": "fixed:0",
+            "error_rate": 0.0,
+            "size": (4000, 3000),  # Simula foto de 12MP
+            "format": "JPEG",
+            "transparent": False,
+            "seed": 0,
+        },
+        "fake-logo": {
+            "name": "Fake Logo",
+            "cost_per_image": 0.0,
+            "max_resolution": "1024x1024",
+            "capabilities": ["text_to_image"],
+            "latency": "fixed:0",
+            "error_rate": 0.0,
+            "size": (512, 512),
+            "format": "PNG",
+            "transparent": True,
+            "seed": 0,
+        },
+    }
+
+    _call_counter = itertools.count()
+
+    def __init__(self, api_key: str = None, model: str = "fake-fast"):
+        super().__init__(api_key, model)
+        self.params = self.MODEL_INFO.get(model, self.MODEL_INFO["fake-fast"])
+        self.latency = LatencyModel.parse(self.params["latency"])
+
+    @classmethod
+    def register_model(cls, name: str, base: str = "fake-fast", **params) -> None:
+        """
+        Registra un preset nuevo (p. ej. desde el harness de load test)
+        """
+        cls.MODEL_INFO[name] = {**cls.MODEL_INFO[base], "name": name, **params}
+
+    @classmethod
+    def render(
+        cls,
+        seed_text: str,
+        width: int,
+        height: int,
+        transparent: bool = False,
+        image_format: str = "PNG",
+        seed: int = 0
+    ) -> bytes:
+        """
+        Renderiza una imagen sintética determinista
+
+        Gradiente + formas aleatorias (con semilla) para que la compresión
+        y el procesamiento se comporten parecido a una foto real.
+        """
+        rng = random.Random(stable_seed(seed, seed_text, width, height))
+
+        top = tuple(rng.randrange(256) for _ in range(3))
+        bottom = tuple(rng.randrange(256) for _ in range(3))
+        gradient = Image.linear_gradient("L").resize((width, height))
+        image = Image.composite(
+            Image.new("RGB", (width, height), bottom),
+            Image.new("RGB", (width, height), top),
+            gradient,
+        )
+
+        if transparent:
+            image = image.convert("RGBA")
+            image.putalpha(0)
+
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x0, y0 = rng.randrange(width), rng.randrange(height)
+            x1 = min(width, x0 + rng.randrange(width // 8 + 1, width // 2 + 2))
+            y1 = min(height, y0 + rng.randrange(height // 8 + 1, height // 2 + 2))
+            color = tuple(rng.randrange(256) for _ in range(3)) + (255,)
+            if rng.random() < 0.5:
+                draw.ellipse([x0, y0, x1, y1], fill=color)
+            else:
+                draw.rectangle([x0, y0, x1, y1], fill=color)
+
+        if image_format.upper() == "JPEG":
+            image = image.convert("RGB")
+
+        output = BytesIO()
+        image.save(output, format=image_format)
+        return output.getvalue()
+
+    @traced()
+    async def generate_image(
+        self,
+        prompt: str,
+        width: int = 1024,
+        height: int = 1024,
+        num_images: int = 1,
+        **kwargs
+    ) -> List[bytes]:
+        """
+        Genera imágenes sintéticas
+        """
+        try:
+            rng = random.Random(stable_seed(self.params["seed"], next(self._call_counter)))
+            await asyncio.sleep(self.latency.sample(rng))
+            if rng.random() < self.params["error_rate"]:
+                raise Exception("Simulated provider error")
+
+            width, height = self.params["size"] or (width, height)
+
+            # El render es CPU-bound: fuera del event loop
+            loop = asyncio.get_running_loop()
+            return [
+                await loop.run_in_executor(
+                    None,
+                    self.render,
+                    f"{prompt}:{idx}",
+                    width,
+                    height,
+                    self.params["transparent"],
+                    self.params["format"],
+                    self.params["seed"],
+                )
+                for idx in range(num_images)
+            ]
+
+        except Exception as e:
+            raise Exception(f"Error generating image with Fake: {str(e)}")
+
+    async def edit_image(
+        self,
+        image: bytes,
+        prompt: str,
+        **kwargs
+    ) -> bytes:
+        """
+        "Edita" la imagen retornándola sin cambios tras la latencia simulada
+        """
+        rng = random.Random(stable_seed(self.params["seed"], next(self._call_counter)))
+        await asyncio.sleep(self.latency.sample(rng))
+        return image
+
+    async def get_model_info(self) -> Dict[str, Any]:
+        """
+        Obtiene información del preset simulado
+        """
+        return {**self.params, "latency": repr(self.latency)}
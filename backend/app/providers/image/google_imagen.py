@@ -4,6 +4,7 @@ import base64
 from io import BytesIO
 
 from app.providers.base import BaseImageProvider
+from app.core.telemetry import traced
 
 
 class GoogleImagenProvider(BaseImageProvider):
@@ -49,6 +50,7 @@ class GoogleImagenProvider(BaseImageProvider):
         # Este es un placeholder - necesitará ajustarse según API real
         self.client = genai
     
+    @traced()
     async def generate_image(
         self,
         prompt: str,
@@ -0,0 +1,228 @@
+import asyncio
+import itertools
+import json
+import random
+from typing import Dict, Any, AsyncIterator, List
+
+from app.providers.base import BaseLLMProvider, flatten_messages
+from app.providers.simulation import LatencyModel, stable_seed
+from app.core.telemetry import traced
+
+
+class FakeLLMProvider(BaseLLMProvider):
+    """
+    Provider LLM determinista para desarrollo, benchmarks y load tests
+    - No requiere API key ni red
+    - Mismo prompt + misma semilla → mismo texto
+    - Latencia, velocidad de tokens y tasa de errores configurables por modelo
+    """
+
+    MODEL_INFO = {
+        "fake-fast": {
+            "name": "Fake Fast",
+            "input_cost": 0.0,
+            "output_cost": 0.0,
+            "context_window": 128000,
+            "capabilities": ["text", "stream"],
+            "latency": "lognormal:80:0.3",  # Time-to-first-token
+            "tokens_per_second": 600,
+            "error_rate": 0.0,
+            "seed": 0,
+        },
+        "fake-slow": {
+            "name": "Fake Slow",
+            "input_cost": 0.0,
+            "output_cost": 0.0,
+            "context_window": 128000,
+            "capabilities": ["text", "stream"],
+            "latency": "lognormal:900:0.5",
+            "tokens_per_second": 80,
+            "error_rate": 0.0,
+            "seed": 0,
+        },
+        "fake-flaky": {
+            "name": "Fake Flaky",
+            "input_cost": 0.0,
+            "output_cost": 0.0,
+            "context_window": 128000,
+            "capabilities": ["text", "stream"],
+            "latency": "uniform:50:400",
+            "tokens_per_second": 300,
+            "error_rate": 0.1,
+            "seed": 0,
+        },
+        "fake-instant": {
+            "name": "Fake Instant",
+            "input_cost": 0.0,
+            "output_cost": 0.0,
+            "context_window": 128000,
+            "capabilities": ["text", "stream"],
+            "latency": "fixed:0",
+            "tokens_per_second": 0,  # 0 = sin espera entre tokens
+            "error_rate": 0.0,
+            "seed": 0,
+        },
+    }
+
+    VOCABULARY = {
+        "es-MX": [
+            "descubre", "calidad", "sabor", "único", "hecho", "con", "amor",
+            "para", "ti", "auténtico", "natural", "increíble", "pruébalo",
+            "hoy", "mismo", "tu", "día", "mejor", "experiencia", "local",
+        ],
+        "en": [
+            "discover", "quality", "taste", "unique", "made", "with", "love",
+            "for", "you", "authentic", "natural", "amazing", "try", "it",
+            "today", "your", "day", "better", "experience", "local",
+        ],
+    }
+
+    SUPPORTS_CANDIDATES = True
+
+    # Contador global: latencias/errores reproducibles en el orden de llamadas
+    _call_counter = itertools.count()
+
+    def __init__(self, api_key: str = None, model: str = "fake-fast"):
+        super().__init__(api_key, model)
+        self.params = self.MODEL_INFO.get(model, self.MODEL_INFO["fake-fast"])
+        self.latency = LatencyModel.parse(self.params["latency"])
+
+    @classmethod
+    def register_model(cls, name: str, base: str = "fake-fast", **params) -> None:
+        """
+        Registra un preset nuevo (p. ej. desde el harness de load test)
+        """
+        cls.MODEL_INFO[name] = {**cls.MODEL_INFO[base], "name": name, **params}
+
+    def _call_rng(self) -> random.Random:
+        return random.Random(stable_seed(self.params["seed"], next(self._call_counter)))
+
+    def _tokens(self, prompt: str, max_tokens: int) -> List[str]:
+        """
+        Genera los tokens de forma determinista a partir del prompt
+        """
+        rng = random.Random(stable_seed(self.params["seed"], prompt))
+        language = "en" if "Create marketing copy" in prompt else "es-MX"
+        words = self.VOCABULARY[language]
+
+        num_words = min(max(int(max_tokens * 0.75), 1), 80)
+        tokens = [rng.choice(words) + " " for _ in range(num_words)]
+        tokens[0] = tokens[0].capitalize()
+        tokens[-1] = tokens[-1].strip() + "."
+        tokens.append(f"\n\n#{rng.choice(words)} #{rng.choice(words)}")
+        return tokens
+
+    async def _simulate_call(self, rng: random.Random) -> None:
+        await asyncio.sleep(self.latency.sample(rng))
+        if rng.random() < self.params["error_rate"]:
+            raise Exception("Simulated provider error")
+
+    @traced()
+    async def generate_copy(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera copy simulado (latencia inicial + tiempo de tokens)
+        """
+        try:
+            rng = self._call_rng()
+            await self._simulate_call(rng)
+
+            tokens = self._tokens(prompt, max_tokens)
+            if self.params["tokens_per_second"]:
+                await asyncio.sleep(len(tokens) / self.params["tokens_per_second"])
+
+            return "".join(tokens)
+
+        except Exception as e:
+            raise Exception(f"Error generating copy with Fake: {str(e)}")
+
+    @traced()
+    async def generate_candidates(
+        self,
+        messages: List[Dict[str, Any]],
+        n: int,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> List[str]:
+        """
+        Genera `n` candidatos simulados con una sola latencia inicial
+        
+        Los candidatos se generan en paralelo: el tiempo de tokens es el
+        del más largo, no la suma.
+        """
+        try:
+            rng = self._call_rng()
+            await self._simulate_call(rng)
+
+            prompt = flatten_messages(messages)
+            candidates = [self._tokens(f"{prompt}\0{index}", max_tokens) for index in range(n)]
+            if self.params["tokens_per_second"]:
+                longest = max(len(tokens) for tokens in candidates)
+                await asyncio.sleep(longest / self.params["tokens_per_second"])
+
+            return ["".join(tokens) for tokens in candidates]
+
+        except Exception as e:
+            raise Exception(f"Error generating copy with Fake: {str(e)}")
+
+    @traced()
+    async def generate_structured(
+        self,
+        messages: List[Dict[str, Any]],
+        schema: Dict[str, Any],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera un objeto JSON simulado con las llaves del schema
+        """
+        text = await self.generate_from_messages(messages, max_tokens, temperature, **kwargs)
+        body, _, tags = text.partition("\n\n")
+        words = body.rstrip(".").split()
+
+        data = {}
+        for slot, spec in schema.get("properties", {}).items():
+            if slot == "hashtags":
+                data[slot] = tags.split()
+            elif slot == "body":
+                data[slot] = body
+            elif spec.get("type") == "array":
+                data[slot] = [" ".join(words[start:start + 3]) for start in range(0, 9, 3)]
+            else:
+                data[slot] = " ".join(words[-4:] if slot == "cta" else words[:4]).capitalize()
+        return json.dumps(data, ensure_ascii=False)
+
+    async def stream_copy(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Emite los tokens uno a uno a la velocidad configurada
+        """
+        rng = self._call_rng()
+        try:
+            await self._simulate_call(rng)
+        except Exception as e:
+            raise Exception(f"Error generating copy with Fake: {str(e)}")
+
+        delay = 1 / self.params["tokens_per_second"] if self.params["tokens_per_second"] else 0
+        for token in self._tokens(prompt, max_tokens):
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
+
+    async def get_model_info(self) -> Dict[str, Any]:
+        """
+        Obtiene información del preset simulado
+        """
+        return {**self.params, "latency": repr(self.latency)}
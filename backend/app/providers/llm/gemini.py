@@ -1,7 +1,17 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
+import datetime
+import hashlib
+import time
 import google.generativeai as genai
 
-from app.providers.base import BaseLLMProvider
+from app.providers.base import BaseLLMProvider, flatten_messages
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.telemetry import traced
+
+
+# Modelos con el prefijo estable ya configurado, por (api key, modelo, prefijo)
+_prefix_models = LRUCache(maxsize=32)
 
 
 class GeminiProvider(BaseLLMProvider):
@@ -28,11 +38,14 @@ class GeminiProvider(BaseLLMProvider):
         }
     }
     
+    SUPPORTS_CANDIDATES = True
+    
     def __init__(self, api_key: str, model: str = "gemini-2.0-flash-lite"):
         super().__init__(api_key, model)
         genai.configure(api_key=api_key)
         self.client = genai.GenerativeModel(model)
     
+    @traced()
     async def generate_copy(
         self,
         prompt: str,
@@ -47,6 +60,7 @@ class GeminiProvider(BaseLLMProvider):
             generation_config = genai.GenerationConfig(
                 max_output_tokens=max_tokens,
                 temperature=temperature,
+                stop_sequences=kwargs.get("stop"),
             )
             
             response = self.client.generate_content(
@@ -59,6 +73,166 @@ class GeminiProvider(BaseLLMProvider):
         except Exception as e:
             raise Exception(f"Error generating copy with Gemini: {str(e)}")
     
+    @traced()
+    async def generate_from_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera copy con el prefijo estable como system instruction
+        
+        Los mensajes marcados con `cache` forman el prefijo: va en
+        `system_instruction` (o en un CachedContent explícito si es lo
+        bastante largo) y el resto como contenido de la petición.
+        """
+        try:
+            client, contents = self._split_prefix(messages)
+        except TypeError:  # SDK sin system_instruction
+            return await self.generate_copy(flatten_messages(messages), max_tokens, temperature, **kwargs)
+        
+        try:
+            generation_config = genai.GenerationConfig(
+                max_output_tokens=max_tokens,
+                temperature=temperature,
+                stop_sequences=kwargs.get("stop"),
+            )
+            
+            response = client.generate_content(
+                contents,
+                generation_config=generation_config
+            )
+            
+            return response.text
+            
+        except Exception as e:
+            raise Exception(f"Error generating copy with Gemini: {str(e)}")
+    
+    @traced()
+    async def generate_candidates(
+        self,
+        messages: List[Dict[str, Any]],
+        n: int,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> List[str]:
+        """
+        Genera `n` candidatos en una sola petición (candidate_count)
+        """
+        try:
+            try:
+                client, contents = self._split_prefix(messages)
+            except TypeError:  # SDK sin system_instruction
+                client, contents = self.client, flatten_messages(messages)
+            
+            generation_config = genai.GenerationConfig(
+                candidate_count=n,
+                max_output_tokens=max_tokens,
+                temperature=temperature,
+                stop_sequences=kwargs.get("stop"),
+            )
+            
+            response = client.generate_content(
+                contents,
+                generation_config=generation_config
+            )
+            
+            return [
+                "".join(part.text for part in candidate.content.parts)
+                for candidate in response.candidates
+                if candidate.content.parts
+            ]
+            
+        except Exception as e:
+            raise Exception(f"Error generating copy with Gemini: {str(e)}")
+    
+    @traced()
+    async def generate_structured(
+        self,
+        messages: List[Dict[str, Any]],
+        schema: Dict[str, Any],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera JSON restringido al schema (response_schema)
+        """
+        try:
+            try:
+                client, contents = self._split_prefix(messages)
+            except TypeError:  # SDK sin system_instruction
+                client, contents = self.client, flatten_messages(messages)
+            
+            generation_config = genai.GenerationConfig(
+                max_output_tokens=max_tokens,
+                temperature=temperature,
+                response_mime_type="application/json",
+                response_schema=schema,
+            )
+            
+            response = client.generate_content(
+                contents,
+                generation_config=generation_config
+            )
+            
+            return response.text
+            
+        except Exception as e:
+            raise Exception(f"Error generating copy with Gemini: {str(e)}")
+    
+    def _split_prefix(self, messages: List[Dict[str, Any]]):
+        """
+        (modelo, contenido): el modelo lleva el prefijo cacheable configurado
+        y el contenido es el resto de los mensajes
+        """
+        prefix = "\n\n".join(m["content"] for m in messages if m.get("cache"))
+        rest = [m for m in messages if not m.get("cache")]
+        if not prefix or not rest:
+            return self.client, flatten_messages(messages)
+        return self._client_for_prefix(prefix), flatten_messages(rest)
+    
+    def _client_for_prefix(self, prefix: str):
+        """
+        GenerativeModel con el prefijo configurado, reutilizado entre llamadas
+        
+        - Prefijos ≥ GEMINI_CACHE_MIN_TOKENS (estimado): context caching
+          explícito (CachedContent con TTL), se recrea al expirar
+        - Prefijos cortos: system_instruction; Gemini aplica caching
+          implícito a prefijos idénticos
+        """
+        key = (
+            hashlib.sha256(self.api_key.encode("utf-8")).hexdigest() if self.api_key else None,
+            self.model,
+            hashlib.sha256(prefix.encode("utf-8")).hexdigest(),
+        )
+        entry = _prefix_models.get(key)
+        if entry and entry["expires_at"] > time.time():
+            return entry["client"]
+        
+        client, expires_at = None, float("inf")
+        if len(prefix) // 4 >= settings.GEMINI_CACHE_MIN_TOKENS:
+            try:
+                ttl = settings.GEMINI_CACHE_TTL_SECONDS
+                cached = genai.caching.CachedContent.create(
+                    model=f"models/{self.model}",
+                    system_instruction=prefix,
+                    ttl=datetime.timedelta(seconds=ttl),
+                )
+                client = genai.GenerativeModel.from_cached_content(cached)
+                expires_at = time.time() + ttl * 0.9
+            except Exception:
+                client = None  # Modelo/cuenta sin caching explícito
+        
+        if client is None:
+            client = genai.GenerativeModel(self.model, system_instruction=prefix)
+        
+        _prefix_models.put(key, {"client": client, "expires_at": expires_at})
+        return client
+    
     async def get_model_info(self) -> Dict[str, Any]:
         """
         Obtiene información del modelo Gemini
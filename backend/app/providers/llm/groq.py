@@ -1,8 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from groq import Groq
 import httpx
 
 from app.providers.base import BaseLLMProvider
+from app.core.telemetry import traced
 
 
 class GroqProvider(BaseLLMProvider):
@@ -27,6 +28,7 @@ class GroqProvider(BaseLLMProvider):
         super().__init__(api_key, model)
         self.client = Groq(api_key=api_key)
     
+    @traced()
     async def generate_copy(
         self,
         prompt: str,
@@ -57,6 +59,58 @@ class GroqProvider(BaseLLMProvider):
         except Exception as e:
             raise Exception(f"Error generating copy with Groq: {str(e)}")
     
+    @traced()
+    async def generate_from_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera copy con mensajes system/user nativos
+        
+        El system prompt va primero y sin cambios entre llamadas: Groq
+        reutiliza el prefijo cacheado en los modelos con prompt caching.
+        """
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": message["role"], "content": message["content"]}
+                    for message in messages
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            
+            return response.choices[0].message.content
+            
+        except Exception as e:
+            raise Exception(f"Error generating copy with Groq: {str(e)}")
+    
+    @traced()
+    async def generate_structured(
+        self,
+        messages: List[Dict[str, Any]],
+        schema: Dict[str, Any],
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> str:
+        """
+        Genera JSON con el modo JSON de Groq (objeto JSON garantizado;
+        las llaves las define el prompt)
+        """
+        return await self.generate_from_messages(
+            messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            response_format={"type": "json_object"},
+            **kwargs
+        )
+    
     async def get_model_info(self) -> Dict[str, Any]:
         """
         Obtiene información del modelo Llama 4 Scout
@@ -0,0 +1,59 @@
+"""
+Utilidades de simulación para providers falsos (benchmarks y load tests)
+"""
+import hashlib
+import random
+from typing import Tuple
+
+
+class LatencyModel:
+    """
+    Distribución de latencia simulada
+
+    Se define con un string "tipo:param1:param2" (valores en ms):
+    - "fixed:100"          → siempre 100ms
+    - "uniform:50:400"     → uniforme entre 50 y 400ms
+    - "normal:200:40"      → normal con media 200ms y desviación 40ms
+    - "lognormal:150:0.5"  → log-normal con mediana 150ms y sigma 0.5
+                             (cola larga, parecida a APIs reales)
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind: str = "fixed", params: Tuple[float, ...] = (0.0,)):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, *params = spec.split(":")
+        return cls(kind, tuple(float(p) for p in params) or (0.0,))
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Retorna una latencia en segundos
+        """
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(self.params[0], self.params[1])
+        else:  # lognormal
+            median, sigma = self.params[0], self.params[1]
+            ms = median * rng.lognormvariate(0.0, sigma) if median > 0 else 0.0
+
+        return max(ms, 0.0) / 1000
+
+    def __repr__(self) -> str:
+        return ":".join([self.kind, *(f"{p:g}" for p in self.params)])
+
+
+def stable_seed(*parts) -> int:
+    """
+    Semilla estable entre procesos (a diferencia de hash(), que es aleatorio)
+    """
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
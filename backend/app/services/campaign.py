@@ -0,0 +1,476 @@
+import asyncio
+import base64
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import metrics
+from app.db.models import ImageType
+from app.services.copy_generator import CopyGeneratorService
+from app.services.generation import GenerationService
+from app.services.history import HistoryService
+from app.services.image_compositor import FIT_MODES, ImageCompositorService
+from app.services.image_encoder import EXTENSIONS, sniff_format
+from app.services.image_generator import ImageGeneratorService
+from app.services.product import ProductService
+from app.templates.image_templates import IMAGE_SIZES, get_image_prompt, get_image_size
+
+# Tamaño de la imagen base por orientación: una sola generación alimenta
+# todos los formatos de aspecto parecido (el recorte lo hace el compositor)
+BASE_SIZES = {
+    "square": (1024, 1024),
+    "vertical": (768, 1344),
+    "horizontal": (1344, 768),
+}
+
+
+def orientation_for(size: Tuple[int, int]) -> str:
+    """
+    Orientación de la imagen base para un formato (ancho, alto)
+    """
+    ratio = size[0] / size[1]
+    if ratio < 0.8:
+        return "vertical"
+    if ratio > 1.25:
+        return "horizontal"
+    return "square"
+
+
+class CampaignError(Exception):
+    """
+    Campaña inválida (el status_code se propaga como HTTP)
+    """
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class DependencyFailed(Exception):
+    """
+    Una tarea previa del DAG falló: la tarea se omite
+    """
+
+
+# Tarea del DAG: (dependencias, fn(resultados de las dependencias) -> (valor, info
+# del evento), semáforo opcional que limita cuántas tareas como ésta corren a la vez)
+Task = Tuple[
+    List[str],
+    Callable[[Dict[str, Any]], Awaitable[Tuple[Any, Dict[str, Any]]]],
+    Optional[asyncio.Semaphore],
+]
+
+
+async def run_dag(tasks: Dict[str, Task]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Ejecuta un DAG de tareas async con la máxima concurrencia posible
+
+    Cada tarea arranca en cuanto terminan sus dependencias y obtiene su
+    semáforo (si tiene). Se emite un evento "started" y uno final ("completed", "failed" o "skipped" si
+    falló una dependencia) por tarea, en el orden en que ocurren. El
+    último evento es "dag" con el tiempo total y el del camino crítico
+    (la cadena de tareas más larga, el mínimo alcanzable). Los tiempos de
+    cada tarea no incluyen la espera por el semáforo: la diferencia entre
+    ambos totales es el costo de la espera por concurrencia limitada.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    futures: Dict[str, asyncio.Task] = {}
+    # Fin de cada tarea medido desde el inicio si todo corriera sin esperas
+    path_ms: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    async def run(name: str, deps: List[str], fn, limit: Optional[asyncio.Semaphore]) -> Any:
+        try:
+            results = {dep: await futures[dep] for dep in deps}
+        except Exception:
+            queue.put_nowait({"event": "task", "task": name, "status": "skipped"})
+            raise DependencyFailed(name)
+
+        if limit is not None:
+            await limit.acquire()
+        try:
+            queue.put_nowait({"event": "task", "task": name, "status": "started"})
+            task_started = time.perf_counter()
+            try:
+                value, info = await fn(results)
+            except Exception as e:
+                queue.put_nowait({"event": "task", "task": name, "status": "failed", "detail": str(e)})
+                raise
+            elapsed_ms = (time.perf_counter() - task_started) * 1000
+        finally:
+            if limit is not None:
+                limit.release()
+
+        path_ms[name] = elapsed_ms + max((path_ms[dep] for dep in deps), default=0.0)
+        queue.put_nowait({
+            "event": "task",
+            "task": name,
+            "status": "completed",
+            "elapsed_ms": round(elapsed_ms, 1),
+            **info,
+        })
+        return value
+
+    for name, (deps, fn, limit) in tasks.items():
+        futures[name] = asyncio.ensure_future(run(name, deps, fn, limit))
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event["status"] != "started":
+                remaining -= 1
+            yield event
+
+        # Recoger excepciones (ya reportadas como eventos)
+        await asyncio.gather(*futures.values(), return_exceptions=True)
+        yield {
+            "event": "dag",
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "critical_path_ms": round(max(path_ms.values(), default=0.0), 1),
+        }
+    finally:
+        for future in futures.values():
+            future.cancel()
+
+
+class CampaignService:
+    """
+    Genera una campaña completa (Generation con copys e imágenes) de un producto
+
+    Plan de tareas:
+    - copy:{plataforma}: copy (o variantes) de cada plataforma
+    - image:{orientación}: una imagen base por orientación (cuadrada,
+      vertical, horizontal) compartida por los formatos de esa orientación
+    - logo: logo del producto (si tiene), leído de disco
+    - compose:{plataforma}:{formato}: resize/recorte + logo, después de
+      image:{orientación} y logo
+
+    Copys e imágenes corren en paralelo (hasta CAMPAIGN_MAX_CONCURRENCY
+    llamadas a providers); sin esa espera la latencia total se acerca al
+    camino crítico (normalmente imagen base + composición). Cada resultado
+    se guarda en cuanto está listo, con su propia sesión de DB; si una
+    tarea falla, sus dependientes se omiten y el resto de la campaña
+    continúa.
+    """
+
+    def __init__(self):
+        self.copy_service = CopyGeneratorService()
+        self.image_service = ImageGeneratorService()
+        self.compositor = ImageCompositorService()
+        self.generation_service = GenerationService()
+        self.history_service = HistoryService()
+        self.product_service = ProductService()
+        self.output_dir = settings.GENERATED_DIR
+
+    @staticmethod
+    def plan(
+        platforms: List[str],
+        formats: Optional[Dict[str, List[str]]] = None,
+        include_images: bool = True,
+        fit: str = "smart",
+    ) -> Dict[str, Any]:
+        """
+        Valida plataformas/formatos/encuadre y agrupa los formatos por orientación
+
+        Sin formatos explícitos se usa el primero de IMAGE_SIZES por plataforma.
+
+        Returns:
+            Dict con platforms y images {orientación: [(plataforma, formato)]}
+        """
+        platforms = list(dict.fromkeys(platforms))
+        if not platforms:
+            raise CampaignError("Se requiere al menos una plataforma")
+        if fit not in FIT_MODES:
+            raise CampaignError(f"fit no soportado: {fit} (contain, cover o smart)")
+
+        images: Dict[str, List[Tuple[str, str]]] = {}
+        for platform in platforms:
+            sizes = IMAGE_SIZES.get(platform)
+            if sizes is None:
+                raise CampaignError(f"Plataforma no soportada: {platform}")
+            if not include_images:
+                continue
+
+            for format_type in dict.fromkeys((formats or {}).get(platform) or [next(iter(sizes))]):
+                if format_type not in sizes:
+                    raise CampaignError(f"Formato '{format_type}' no disponible para {platform}")
+                orientation = orientation_for(get_image_size(platform, format_type))
+                images.setdefault(orientation, []).append((platform, format_type))
+
+        return {"platforms": platforms, "images": images}
+
+    async def run(
+        self,
+        product_id: str,
+        platforms: List[str],
+        formats: Optional[Dict[str, List[str]]] = None,
+        include_images: bool = True,
+        # Copy
+        language: str = "es-MX",
+        quality_level: str = "rapido",
+        llm_provider: str = "groq",
+        llm_model: str = "llama-4-scout",
+        api_key: Optional[str] = None,
+        tone: str = "casual",
+        length: str = "medio",
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        num_variants: int = 1,
+        temperature: float = 0.7,
+        # Imágenes
+        image_provider: str = "google",
+        image_model: str = "imagen-4-fast",
+        image_api_key: Optional[str] = None,
+        image_prompt: Optional[str] = None,
+        add_logo: bool = True,
+        fit: str = "smart",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ejecuta la campaña y emite eventos de progreso
+
+        Eventos:
+        - {"event": "plan", "generation_id", "tasks"}
+        - {"event": "task", "task", "status", ...} por tarea (ver run_dag)
+        - {"event": "done", "generation_id", "status", "copies", "images",
+          "failed", "elapsed_ms", "critical_path_ms"}
+
+        Raises:
+            CampaignError: Producto inexistente o plataformas/formatos/fit inválidos
+        """
+        plan = self.plan(platforms, formats, include_images, fit)
+        semaphore = asyncio.Semaphore(settings.CAMPAIGN_MAX_CONCURRENCY)
+
+        with SessionLocal() as db:
+            product = self.product_service.get_product(db, product_id)
+            if not product:
+                raise CampaignError("Producto no encontrado", 404)
+
+            logos = self.product_service.get_product_images(db, product.id, ImageType.LOGO) if add_logo else []
+            logo_path = logos[-1].file_path if logos else None
+
+            generation = self.generation_service.create_generation(
+                db,
+                platforms=plan["platforms"],
+                product_id=product.id,
+                tone=tone,
+                length=length,
+                use_emojis=use_emojis,
+                cta=cta,
+                quality_level=quality_level,
+                llm_used=f"{llm_provider}/{llm_model}",
+                image_model_used=f"{image_provider}/{image_model}" if plan["images"] else None,
+                image_options={
+                    "formats": {
+                        orientation: [f"{platform}:{format_type}" for platform, format_type in targets]
+                        for orientation, targets in plan["images"].items()
+                    },
+                    "has_logo": bool(logo_path),
+                    "fit": fit,
+                },
+            )
+            generation_id = generation.id
+            output_dir = os.path.join(self.output_dir, str(generation_id))
+            saved = {"copies": 0, "images": 0}
+
+            async def write_file(name: str, data: bytes) -> str:
+                path = os.path.join(output_dir, f"{name}.{EXTENSIONS[sniff_format(data)]}")
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._write_file, path, data)
+                return path
+
+            def copy_task(platform: str) -> Task:
+                async def fn(_):
+                    if num_variants > 1:
+                        result = await self.copy_service.generate_variants(
+                            product_name=product.name,
+                            description=product.description or "",
+                            platform=platform,
+                            num_variants=num_variants,
+                            language=language,
+                            quality_level=quality_level,
+                            llm_provider=llm_provider,
+                            llm_model=llm_model,
+                            api_key=api_key,
+                            tone=tone,
+                            length=length,
+                            use_emojis=use_emojis,
+                            cta=cta,
+                            benefits=product.benefits,
+                            keywords=product.keywords,
+                            temperature=temperature,
+                        )
+                        texts = result["variants"]
+                    else:
+                        result = await self.copy_service.generate_copy(
+                            product_name=product.name,
+                            description=product.description or "",
+                            platform=platform,
+                            language=language,
+                            quality_level=quality_level,
+                            llm_provider=llm_provider,
+                            llm_model=llm_model,
+                            api_key=api_key,
+                            tone=tone,
+                            length=length,
+                            use_emojis=use_emojis,
+                            cta=cta,
+                            benefits=product.benefits,
+                            keywords=product.keywords,
+                            temperature=temperature,
+                            category=product.category,
+                        )
+                        texts = [result["copy_text"]]
+
+                    if not texts:
+                        raise Exception("El modelo no devolvió copy")
+                    with SessionLocal() as task_db:
+                        copies = self.generation_service.add_copies(task_db, generation_id, platform, texts)
+                    saved["copies"] += len(copies)
+                    return copies, {
+                        "copies": [
+                            {"id": str(copy.id), "variant_number": copy.variant_number, "copy_text": copy.copy_text}
+                            for copy in copies
+                        ]
+                    }
+                return [], fn, semaphore
+
+            def image_task(orientation: str) -> Task:
+                async def fn(_):
+                    width, height = BASE_SIZES[orientation]
+                    prompt = image_prompt or get_image_prompt("producto", language, product_name=product.name)
+                    result = await self.image_service.generate_image(
+                        image_provider=image_provider,
+                        image_model=image_model,
+                        api_key=image_api_key,
+                        prompt=prompt,
+                        width=width,
+                        height=height,
+                        num_images=1,
+                    )
+                    if not result["images"]:
+                        raise Exception(result.get("note") or "El provider no devolvió imágenes")
+
+                    image_bytes = base64.b64decode(result["images"][0])
+                    path = await write_file(f"base_{orientation}", image_bytes)
+                    with SessionLocal() as task_db:
+                        image = self.generation_service.add_image(
+                            task_db,
+                            generation_id,
+                            ImageType.GENERATED,
+                            path,
+                            width=width,
+                            height=height,
+                            processing_options={"orientation": orientation, "prompt": prompt},
+                        )
+                    saved["images"] += 1
+                    return (image.id, image_bytes), {"image_id": str(image.id), "file_path": path}
+                return [], fn, semaphore
+
+            def logo_task() -> Task:
+                async def fn(_):
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(None, self._read_file, logo_path), {}
+                return [], fn, None
+
+            def compose_task(orientation: str, platform: str, format_type: str) -> Task:
+                deps = [f"image:{orientation}"] + (["logo"] if logo_path else [])
+
+                async def fn(results):
+                    base_id, base_bytes = results[f"image:{orientation}"]
+                    logo_bytes = results.get("logo")
+                    composed = await self.compositor.compose_for_platform(
+                        base_bytes, platform, format_type, logo_bytes=logo_bytes, fit=fit
+                    )
+                    path = await write_file(f"{platform}_{format_type}", composed)
+                    width, height = get_image_size(platform, format_type)
+                    with SessionLocal() as task_db:
+                        image = self.generation_service.add_image(
+                            task_db,
+                            generation_id,
+                            ImageType.FUSED if logo_bytes else ImageType.VARIANT,
+                            path,
+                            platform=platform,
+                            width=width,
+                            height=height,
+                            processing_options={
+                                "format_type": format_type,
+                                "fit": fit,
+                                "has_logo": bool(logo_bytes),
+                                "source_image_id": str(base_id),
+                            },
+                        )
+                    saved["images"] += 1
+                    return image.id, {"image_id": str(image.id), "file_path": path}
+                return deps, fn, None
+
+            tasks: Dict[str, Task] = {}
+            for platform in plan["platforms"]:
+                tasks[f"copy:{platform}"] = copy_task(platform)
+            if logo_path and plan["images"]:
+                tasks["logo"] = logo_task()
+            for orientation, targets in plan["images"].items():
+                tasks[f"image:{orientation}"] = image_task(orientation)
+                for platform, format_type in targets:
+                    tasks[f"compose:{platform}:{format_type}"] = compose_task(orientation, platform, format_type)
+
+            yield {"event": "plan", "generation_id": str(generation_id), "tasks": list(tasks)}
+
+            failed = []
+            async for event in run_dag(tasks):
+                if event["event"] == "dag":
+                    summary = event
+                    continue
+                if event["status"] in ("failed", "skipped"):
+                    failed.append(event["task"])
+                if event["status"] != "started":
+                    metrics.increment("campaign_tasks_total", kind=event["task"].split(":")[0], status=event["status"])
+                yield event
+
+            status = "completed" if not failed else ("failed" if len(failed) == len(tasks) else "partial")
+            metrics.increment("campaign_total", status=status)
+            metrics.observe("campaign_ms", summary["elapsed_ms"])
+            metrics.observe("campaign_critical_path_ms", summary["critical_path_ms"])
+
+            self.history_service.create_history_entry(
+                db,
+                generation_id=generation_id,
+                action="generated",
+                metadata={
+                    "campaign": True,
+                    "status": status,
+                    "copies": saved["copies"],
+                    "images": saved["images"],
+                    "failed": failed,
+                    "elapsed_ms": summary["elapsed_ms"],
+                    "critical_path_ms": summary["critical_path_ms"],
+                },
+            )
+
+            yield {
+                "event": "done",
+                "generation_id": str(generation_id),
+                "status": status,
+                **saved,
+                "failed": failed,
+                "elapsed_ms": summary["elapsed_ms"],
+                "critical_path_ms": summary["critical_path_ms"],
+            }
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+
+# Instancia global del servicio
+campaign_service = CampaignService()
@@ -1,6 +1,13 @@
-from typing import Dict, Any, Optional
-from app.providers.base import ProviderFactory, BaseLLMProvider
+import asyncio
+import time
+from typing import Dict, Any, AsyncIterator, Optional
+from app.providers.base import ProviderFactory, BaseLLMProvider, flatten_messages
+from app.services.copy_length import copy_length, max_tokens_for, stop_sequences_for
+from app.services.instant_copy import instant_copy
 from app.services.prompt_builder import PromptBuilder
+from app.services.structured_copy import copy_schema, parse_structured_copy, render_structured_copy
+from app.templates.copy_templates import get_structure, get_structure_slots
+from app.core.telemetry import traced, span
 
 
 class CopyGeneratorService:
@@ -11,6 +18,7 @@ class CopyGeneratorService:
     def __init__(self):
         self.prompt_builder = PromptBuilder()
     
+    @traced()
     async def generate_copy(
         self,
         # Producto
@@ -33,16 +41,51 @@ class CopyGeneratorService:
         keywords: Optional[list] = None,
         # Generation params
         temperature: float = 0.7,
+        structured: bool = False,
+        enforce_length: bool = True,
+        # Modo instantáneo (templates, sin LLM)
+        mode: str = "llm",
+        category: Optional[str] = None,
+        seed: int = 0,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Genera copy de marketing
         
+        Con `mode="instant"` no se llama al LLM: el copy sale de
+        COPY_TEMPLATES (ver generate_instant).
+        
+        Con `structured=True` el modelo responde un objeto JSON con los
+        slots de la estructura de la plataforma (hook, body, benefits,
+        hashtags, cta); se valida y repara localmente, sin re-llamar al
+        modelo, y copy_text se arma con la estructura.
+        
+        Con `enforce_length` el copy se ajusta al límite de caracteres de
+        la plataforma (ver CopyLengthService).
+        
         Returns:
             Dict con:
             - copy_text: El copy generado
+            - structured: Slots del copy (solo con structured=True)
             - metadata: Info del provider, modelo, costos, etc.
         """
+        if mode == "instant":
+            return self.generate_instant(
+                product_name=product_name,
+                description=description,
+                platform=platform,
+                language=language,
+                quality_level=quality_level,
+                length=length,
+                use_emojis=use_emojis,
+                cta=cta,
+                benefits=benefits,
+                keywords=keywords,
+                category=category,
+                seed=seed,
+                structured=structured,
+            )
+        
         try:
             # 1. Crear provider
             provider: BaseLLMProvider = ProviderFactory.create_llm_provider(
@@ -52,34 +95,217 @@ class CopyGeneratorService:
             )
             
             # 2. Construir prompt
-            prompts = self.prompt_builder.build_copy_prompt(
+            with span("PromptBuilder.build_copy_prompt", {"platform": platform, "language": language}):
+                prompts = self.prompt_builder.build_copy_prompt(
+                    product_name=product_name,
+                    description=description,
+                    platform=platform,
+                    tone=tone,
+                    length=length,
+                    use_emojis=use_emojis,
+                    cta=cta,
+                    benefits=benefits,
+                    keywords=keywords,
+                    language=language
+                )
+            
+            if structured:
+                slots = get_structure_slots(platform, language)
+                prompts = self.prompt_builder.with_structure(prompts, language, slots)
+            
+            # max_tokens según lo pedido (no el default de 500) y stop sequences
+            kwargs.setdefault("max_tokens", max_tokens_for(platform, length, language, use_emojis, structured))
+            if not structured:
+                kwargs.setdefault("stop", stop_sequences_for(language))
+            
+            # 3. Mensajes estructurados: system fijo (prefijo cacheable) + user
+            messages = self.prompt_builder.to_messages(prompts)
+            full_prompt = flatten_messages(messages)
+            
+            # 4. Generar copy
+            if structured:
+                response = await provider.generate_structured(
+                    messages,
+                    copy_schema(slots),
+                    temperature=temperature,
+                    **kwargs
+                )
+                data, repaired = parse_structured_copy(response, slots)
+                copy_text = render_structured_copy(data, get_structure(platform, language))
+            else:
+                copy_text = await provider.generate_from_messages(
+                    messages,
+                    temperature=temperature,
+                    **kwargs
+                )
+            
+            # 5. Límite de caracteres de la plataforma
+            enforced = None
+            if enforce_length:
+                enforced = await copy_length.enforce(
+                    provider,
+                    copy_text,
+                    platform,
+                    length,
+                    language,
+                    structured=data if structured else None,
+                    structure=get_structure(platform, language) if structured else None,
+                )
+                copy_text = enforced["copy_text"]
+                if structured:
+                    data = enforced["structured"]
+            
+            # 6. Obtener metadata del modelo
+            model_info = await provider.get_model_info()
+            
+            result = {
+                "copy_text": copy_text,
+                "metadata": {
+                    "provider": llm_provider,
+                    "model": llm_model,
+                    "platform": platform,
+                    "language": language,
+                    "quality_level": quality_level,
+                    "model_info": model_info,
+                    "prompt_tokens": len(full_prompt.split()),  # Aproximado
+                    "prompt_key": self.prompt_builder.canonical_key(prompts),
+                }
+            }
+            if structured:
+                result["structured"] = data
+                result["metadata"]["structured_repaired"] = repaired
+            if enforced:
+                result["metadata"]["length"] = {
+                    "limit": enforced["limit"],
+                    "original_length": enforced["original_length"],
+                    "path": enforced["path"],
+                }
+            
+            return result
+            
+        except Exception as e:
+            raise Exception(f"Error generating copy: {str(e)}")
+    
+    @traced()
+    async def generate_variants(
+        self,
+        # Producto
+        product_name: str,
+        description: str,
+        # Configuración
+        platform: str,
+        num_variants: int = 3,
+        language: str = "es-MX",
+        quality_level: str = "rapido",
+        # Provider config
+        llm_provider: str = "groq",
+        llm_model: str = "llama-4-scout",
+        api_key: str = None,
+        # Copy config
+        tone: str = "casual",
+        length: str = "medio",
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        benefits: Optional[list] = None,
+        keywords: Optional[list] = None,
+        # Generation params
+        temperature: float = 0.7,
+        enforce_length: bool = True,
+        # Modo instantáneo (templates, sin LLM)
+        mode: str = "llm",
+        category: Optional[str] = None,
+        seed: int = 0,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Genera varias variantes de copy en una sola petición al provider
+        
+        - Providers con SUPPORTS_CANDIDATES: N candidatos nativos
+          (candidate_count / n)
+        - Resto: el prompt pide un arreglo JSON con las N variantes y la
+          respuesta se parsea con output_parser
+        - `mode="instant"`: N variantes de template sin LLM (ver
+          generate_instant_variants)
+        
+        Returns:
+            Dict con:
+            - variants: Lista de copys (puede traer menos de num_variants
+              si el modelo repite o no respeta el formato)
+            - metadata: Igual que generate_copy, más variants_mode
+        """
+        if mode == "instant":
+            return self.generate_instant_variants(
                 product_name=product_name,
                 description=description,
                 platform=platform,
-                tone=tone,
+                num_variants=num_variants,
+                language=language,
+                quality_level=quality_level,
                 length=length,
                 use_emojis=use_emojis,
                 cta=cta,
                 benefits=benefits,
                 keywords=keywords,
-                language=language
+                category=category,
+                seed=seed,
+            )
+        
+        try:
+            provider: BaseLLMProvider = ProviderFactory.create_llm_provider(
+                provider_name=llm_provider,
+                api_key=api_key,
+                model=llm_model
             )
             
-            # 3. Crear prompt completo (system + user)
-            full_prompt = f"{prompts['system']}\n\n{prompts['user']}"
+            with span("PromptBuilder.build_copy_prompt", {"platform": platform, "language": language}):
+                prompts = self.prompt_builder.build_copy_prompt(
+                    product_name=product_name,
+                    description=description,
+                    platform=platform,
+                    tone=tone,
+                    length=length,
+                    use_emojis=use_emojis,
+                    cta=cta,
+                    benefits=benefits,
+                    keywords=keywords,
+                    language=language
+                )
             
-            # 4. Generar copy
-            copy_text = await provider.generate_copy(
-                prompt=full_prompt,
+            max_tokens = kwargs.pop("max_tokens", None) or max_tokens_for(platform, length, language, use_emojis)
+            
+            # Candidatos nativos o, por defecto, lista JSON en un solo copy
+            variants_mode = "candidates" if provider.SUPPORTS_CANDIDATES else "json_list"
+            messages = self.prompt_builder.to_messages(prompts)
+            candidates = await provider.generate_candidates(
+                messages,
+                num_variants,
+                max_tokens=max_tokens,
                 temperature=temperature,
+                stop=kwargs.pop("stop", stop_sequences_for(language)),
+                list_instruction=self.prompt_builder.variants_instruction(language, num_variants),
                 **kwargs
             )
+            variants = []
+            for candidate in candidates:
+                candidate = candidate.strip()
+                if candidate and candidate not in variants:
+                    variants.append(candidate)
+            
+            # Límite de caracteres por variante (en paralelo; normalmente local)
+            length_paths = None
+            if enforce_length:
+                enforced = await asyncio.gather(*(
+                    copy_length.enforce(provider, variant, platform, length, language)
+                    for variant in variants
+                ))
+                variants = [result["copy_text"] for result in enforced]
+                length_paths = [result["path"] for result in enforced]
             
-            # 5. Obtener metadata del modelo
             model_info = await provider.get_model_info()
+            full_prompt = flatten_messages(messages)
             
             return {
-                "copy_text": copy_text,
+                "variants": variants,
                 "metadata": {
                     "provider": llm_provider,
                     "model": llm_model,
@@ -88,8 +314,234 @@ class CopyGeneratorService:
                     "quality_level": quality_level,
                     "model_info": model_info,
                     "prompt_tokens": len(full_prompt.split()),  # Aproximado
+                    "prompt_key": self.prompt_builder.canonical_key(prompts),
+                    "variants_mode": variants_mode,
+                    "variants_requested": num_variants,
+                    "length_paths": length_paths,
                 }
             }
             
+        except Exception as e:
+            raise Exception(f"Error generating copy variants: {str(e)}")
+    
+    def generate_instant(
+        self,
+        product_name: str,
+        description: str,
+        platform: str,
+        language: str = "es-MX",
+        quality_level: str = "rapido",
+        length: str = "medio",
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        benefits: Optional[list] = None,
+        keywords: Optional[list] = None,
+        category: Optional[str] = None,
+        seed: int = 0,
+        structured: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Copy instantáneo desde COPY_TEMPLATES (sin LLM, <1ms)
+        
+        Returns:
+            Dict con copy_text, structured (si se pidió) y metadata
+        """
+        started = time.perf_counter()
+        instant = instant_copy.generate(
+            product_name=product_name,
+            description=description,
+            platform=platform,
+            language=language,
+            length=length,
+            use_emojis=use_emojis,
+            cta=cta,
+            benefits=benefits,
+            keywords=keywords,
+            category=category,
+            seed=seed,
+        )
+        
+        result = {
+            "copy_text": instant["copy_text"],
+            "metadata": {
+                "provider": "template",
+                "model": "instant",
+                "platform": platform,
+                "language": language,
+                "quality_level": quality_level,
+                "seed": seed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+        }
+        if structured:
+            result["structured"] = instant["structured"]
+        return result
+    
+    def generate_instant_variants(
+        self,
+        product_name: str,
+        description: str,
+        platform: str,
+        num_variants: int = 3,
+        language: str = "es-MX",
+        quality_level: str = "rapido",
+        length: str = "medio",
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        benefits: Optional[list] = None,
+        keywords: Optional[list] = None,
+        category: Optional[str] = None,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Variantes de template sin LLM: cada variante rota hook y CTA
+        
+        Returns:
+            Dict con variants y metadata (como generate_variants)
+        """
+        started = time.perf_counter()
+        variants = []
+        for variant in range(num_variants):
+            copy_text = instant_copy.generate(
+                product_name=product_name,
+                description=description,
+                platform=platform,
+                language=language,
+                length=length,
+                use_emojis=use_emojis,
+                cta=cta,
+                benefits=benefits,
+                keywords=keywords,
+                category=category,
+                seed=seed,
+                variant=variant,
+            )["copy_text"]
+            if copy_text not in variants:
+                variants.append(copy_text)
+        
+        return {
+            "variants": variants,
+            "metadata": {
+                "provider": "template",
+                "model": "instant",
+                "platform": platform,
+                "language": language,
+                "quality_level": quality_level,
+                "seed": seed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+                "variants_mode": "instant",
+                "variants_requested": num_variants,
+                "length_paths": None,
+            }
+        }
+    
+    async def stream_copy(
+        self,
+        # Producto
+        product_name: str,
+        description: str,
+        # Configuración
+        platform: str,
+        language: str = "es-MX",
+        quality_level: str = "rapido",
+        # Provider config
+        llm_provider: str = "groq",
+        llm_model: str = "llama-4-scout",
+        api_key: str = None,
+        # Copy config
+        tone: str = "casual",
+        length: str = "medio",
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        benefits: Optional[list] = None,
+        keywords: Optional[list] = None,
+        category: Optional[str] = None,
+        seed: int = 0,
+        # Generation params
+        temperature: float = 0.7,
+        enforce_length: bool = True,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Copy instantáneo de inmediato y luego el del LLM en streaming
+        
+        Eventos, en orden:
+        - {"event": "instant", "copy_text", "metadata"}: copy de template
+        - {"event": "delta", "text"}: fragmentos del LLM
+        - {"event": "final", "copy_text", "metadata"}: copy del LLM completo,
+          ya ajustado al límite de la plataforma
+        """
+        yield {
+            "event": "instant",
+            **self.generate_instant(
+                product_name=product_name,
+                description=description,
+                platform=platform,
+                language=language,
+                quality_level=quality_level,
+                length=length,
+                use_emojis=use_emojis,
+                cta=cta,
+                benefits=benefits,
+                keywords=keywords,
+                category=category,
+                seed=seed,
+            ),
+        }
+        
+        try:
+            provider: BaseLLMProvider = ProviderFactory.create_llm_provider(
+                provider_name=llm_provider,
+                api_key=api_key,
+                model=llm_model
+            )
+            
+            prompts = self.prompt_builder.build_copy_prompt(
+                product_name=product_name,
+                description=description,
+                platform=platform,
+                tone=tone,
+                length=length,
+                use_emojis=use_emojis,
+                cta=cta,
+                benefits=benefits,
+                keywords=keywords,
+                language=language
+            )
+            messages = self.prompt_builder.to_messages(prompts)
+            kwargs.setdefault("max_tokens", max_tokens_for(platform, length, language, use_emojis))
+            kwargs.setdefault("stop", stop_sequences_for(language))
+            
+            chunks = []
+            async for chunk in provider.stream_from_messages(
+                messages,
+                temperature=temperature,
+                **kwargs
+            ):
+                chunks.append(chunk)
+                yield {"event": "delta", "text": chunk}
+            copy_text = "".join(chunks)
+            
+            metadata = {
+                "provider": llm_provider,
+                "model": llm_model,
+                "platform": platform,
+                "language": language,
+                "quality_level": quality_level,
+                "model_info": await provider.get_model_info(),
+                "prompt_tokens": len(flatten_messages(messages).split()),  # Aproximado
+                "prompt_key": self.prompt_builder.canonical_key(prompts),
+            }
+            if enforce_length:
+                enforced = await copy_length.enforce(provider, copy_text, platform, length, language)
+                copy_text = enforced["copy_text"]
+                metadata["length"] = {
+                    "limit": enforced["limit"],
+                    "original_length": enforced["original_length"],
+                    "path": enforced["path"],
+                }
+            
+            yield {"event": "final", "copy_text": copy_text, "metadata": metadata}
+            
         except Exception as e:
             raise Exception(f"Error generating copy: {str(e)}")
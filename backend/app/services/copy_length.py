@@ -0,0 +1,302 @@
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.telemetry import traced
+from app.providers.base import BaseLLMProvider
+from app.services.prompt_builder import PromptBuilder
+from app.services.structured_copy import render_structured_copy
+from app.templates.copy_templates import get_copy_limit
+
+# Palabras máximas por longitud (LENGTH_GUIDES del PromptBuilder)
+LENGTH_WORDS = {"corto": 50, "medio": 100, "largo": 150}
+
+# Caracteres promedio por palabra (con espacio) y por token según idioma
+CHARS_PER_WORD = 6.5
+CHARS_PER_TOKEN = {"es-MX": 3.5, "en": 4.0}
+
+# Tokens extra: emojis (3-4, ~3 tokens cada uno) y llaves/comillas del JSON
+EMOJI_TOKENS = 12
+JSON_TOKENS = 48
+
+MIN_MAX_TOKENS = 64
+MAX_MAX_TOKENS = 1024
+
+# Stop sequences: notas, alternativas o separadores que los modelos agregan
+# después del copy (no aplican a respuestas JSON)
+STOP_SEQUENCES = {
+    "es-MX": ["\n---", "\nNota:", "\nOpción 2", "\nVariante 2"],
+    "en": ["\n---", "\nNote:", "\nOption 2", "\nVariant 2"],
+}
+
+
+def max_tokens_for(
+    platform: str,
+    length: str = "medio",
+    language: str = "es-MX",
+    use_emojis: bool = False,
+    structured: bool = False,
+) -> int:
+    """
+    max_tokens para la longitud pedida en vez del default de 500
+
+    Se toma el mayor entre el límite de caracteres de la plataforma y las
+    palabras que pide el prompt (lo que exceda el límite lo recorta
+    CopyLengthService), con margen de COPY_MAX_TOKENS_MARGIN.
+    """
+    chars = max(get_copy_limit(platform, length), LENGTH_WORDS.get(length, 100) * CHARS_PER_WORD)
+    tokens = chars / CHARS_PER_TOKEN.get(language, CHARS_PER_TOKEN["en"])
+    if use_emojis:
+        tokens += EMOJI_TOKENS
+    if structured:
+        tokens += JSON_TOKENS
+    tokens = int(tokens * settings.COPY_MAX_TOKENS_MARGIN)
+    return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, tokens))
+
+
+def stop_sequences_for(language: str = "es-MX") -> List[str]:
+    """
+    Stop sequences para copy de texto libre
+    """
+    return STOP_SEQUENCES["es-MX" if language == "es-MX" else "en"]
+
+
+# Fin de oración (seguido de espacio) o salto de línea: cortes válidos
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Bloque de hashtags al final del copy
+_TRAILING_HASHTAGS = re.compile(r"(\s*)((?:#\w+\s*)+)$", re.UNICODE)
+
+
+def _split_hashtags(text: str) -> Tuple[str, List[str], str]:
+    """
+    (cuerpo, hashtags finales, separador entre ambos)
+    """
+    match = _TRAILING_HASHTAGS.search(text)
+    if not match or match.start() == 0:
+        return text, [], ""
+    return text[:match.start()], match.group(2).split(), match.group(1) or " "
+
+
+def _join(body: str, tags: List[str], separator: str) -> str:
+    return body + separator + " ".join(tags) if tags else body
+
+
+class CopyLengthService:
+    """
+    Aplica los límites de PLATFORM_COPY_LIMITS después de generar
+
+    Orden de intentos, del más barato al más caro:
+    1. Recorte local: hashtags finales, luego oraciones completas desde el
+       final (sin perder más de COPY_TRIM_MIN_KEEP del cuerpo)
+    2. Llamada "shorten" al provider: prompt corto (solo el copy) y
+       max_tokens acotado al límite
+    3. Corte duro en el último espacio, con "…"
+
+    Cada resultado se cuenta en la métrica copy_length_total por path
+    (ok, trimmed, shortened, truncated) y plataforma.
+    """
+
+    def __init__(self):
+        self.prompt_builder = PromptBuilder()
+
+    def trim(self, text: str, limit: int) -> Optional[str]:
+        """
+        Recorta localmente en límites de hashtag u oración
+
+        Returns:
+            El texto dentro del límite, o None si no se puede sin perder
+            demasiado contenido
+        """
+        text = text.strip()
+        if len(text) <= limit:
+            return text
+
+        body, tags, separator = _split_hashtags(text)
+
+        # 1. Hashtags desde el final
+        for count in range(len(tags) - 1, -1, -1):
+            candidate = _join(body, tags[:count], separator)
+            if len(candidate) <= limit:
+                return candidate
+
+        # 2. Oraciones completas desde el final; luego los hashtags que quepan
+        min_keep = settings.COPY_TRIM_MIN_KEEP * len(body)
+        cuts = [match.start() for match in _SENTENCE_BOUNDARY.finditer(body)]
+        for cut in reversed(cuts):
+            kept = body[:cut].rstrip()
+            if len(kept) < min_keep:
+                break
+            if len(kept) > limit:
+                continue
+            for count in range(len(tags), -1, -1):
+                candidate = _join(kept, tags[:count], separator)
+                if len(candidate) <= limit:
+                    return candidate
+        return None
+
+    def trim_structured(
+        self,
+        data: Dict[str, Any],
+        structure: str,
+        limit: int,
+    ) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Recorte local por slots: hashtags, luego beneficios (desde el final),
+        luego oraciones del body
+
+        Returns:
+            (slots recortados, copy renderizado) o None
+        """
+        data = {slot: list(value) if isinstance(value, list) else value for slot, value in data.items()}
+
+        text = render_structured_copy(data, structure)
+        for slot in ("hashtags", "benefits"):
+            while len(text) > limit and data.get(slot):
+                data[slot].pop()
+                text = render_structured_copy(data, structure)
+        if len(text) <= limit:
+            return data, text
+
+        body = data.get("body") or ""
+        budget = limit - (len(text) - len(body))
+        trimmed = self.trim(body, budget) if budget > 0 else None
+        if not trimmed:
+            return None
+        data["body"] = trimmed
+        return data, render_structured_copy(data, structure)
+
+    @staticmethod
+    def truncate(text: str, limit: int) -> str:
+        """
+        Corte duro en el último espacio antes del límite, con "…"
+        """
+        text = text.strip()
+        if len(text) <= limit:
+            return text
+        cut = text[:limit - 1]
+        if " " in cut:
+            cut = cut[:cut.rfind(" ")]
+        return cut.rstrip(" ,;:-") + "…"
+
+    async def shorten(
+        self,
+        provider: BaseLLMProvider,
+        text: str,
+        limit: int,
+        language: str = "es-MX",
+    ) -> str:
+        """
+        Pide al provider una versión más corta (sin el prompt del producto)
+        """
+        prompts = self.prompt_builder.build_shorten_prompt(text, limit, language)
+        response = await provider.generate_from_messages(
+            self.prompt_builder.to_messages(prompts),
+            # ~3 caracteres por token, con margen
+            max_tokens=limit // 3 + 32,
+            temperature=0.3,
+            stop=stop_sequences_for(language),
+        )
+        return response.strip().strip('"')
+
+    @traced()
+    async def enforce(
+        self,
+        provider: Optional[BaseLLMProvider],
+        copy_text: str,
+        platform: str,
+        length: str = "medio",
+        language: str = "es-MX",
+        structured: Optional[Dict[str, Any]] = None,
+        structure: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aplica el límite de caracteres de la plataforma
+
+        Args:
+            provider: Provider para el fallback "shorten" (None = solo local)
+            structured/structure: Slots y estructura del copy estructurado;
+                el recorte se hace por slots y el shorten solo sobre el body
+
+        Returns:
+            Dict con copy_text, structured, path, limit y original_length
+        """
+        limit = get_copy_limit(platform, length)
+        original_length = len(copy_text)
+        path = "ok"
+
+        if original_length > limit:
+            started = time.perf_counter()
+            if structured is not None and structure:
+                copy_text, structured, path = await self._enforce_structured(
+                    provider, structured, structure, limit, language
+                )
+            else:
+                copy_text, path = await self._enforce_text(provider, copy_text, limit, language)
+            metrics.observe("copy_length_enforce_ms", (time.perf_counter() - started) * 1000, path=path)
+            metrics.observe("copy_length_overflow_chars", original_length - limit, platform=platform)
+
+        metrics.increment("copy_length_total", path=path, platform=platform)
+        return {
+            "copy_text": copy_text,
+            "structured": structured,
+            "path": path,
+            "limit": limit,
+            "original_length": original_length,
+        }
+
+    async def _enforce_text(
+        self,
+        provider: Optional[BaseLLMProvider],
+        text: str,
+        limit: int,
+        language: str,
+    ) -> Tuple[str, str]:
+        trimmed = self.trim(text, limit)
+        if trimmed is not None:
+            return trimmed, "trimmed"
+
+        if provider is not None:
+            try:
+                shortened = await self.shorten(provider, text, limit, language)
+            except Exception:
+                metrics.increment("copy_length_shorten_errors_total")
+                shortened = ""
+            # El modelo puede pasarse un poco: se recorta localmente
+            trimmed = self.trim(shortened, limit) if shortened else None
+            if trimmed:
+                return trimmed, "shortened"
+
+        return self.truncate(text, limit), "truncated"
+
+    async def _enforce_structured(
+        self,
+        provider: Optional[BaseLLMProvider],
+        data: Dict[str, Any],
+        structure: str,
+        limit: int,
+        language: str,
+    ) -> Tuple[str, Dict[str, Any], str]:
+        result = self.trim_structured(data, structure, limit)
+        if result is not None:
+            data, text = result
+            return text, data, "trimmed"
+
+        # Sin hashtags ni beneficios: solo el body necesita acortarse
+        data = {slot: [] if slot in ("hashtags", "benefits") else value for slot, value in data.items()}
+        rendered = render_structured_copy(data, structure)
+        body = data.get("body") or ""
+        budget = limit - (len(rendered) - len(body))
+        if budget <= 0:
+            text = self.truncate(rendered, limit)
+            return text, data, "truncated"
+
+        body, path = await self._enforce_text(provider, body, budget, language)
+        data["body"] = body
+        return render_structured_copy(data, structure), data, path
+
+
+# Instancia global del servicio
+copy_length = CopyLengthService()
@@ -4,6 +4,9 @@ from typing import Dict, List, Optional
 import json
 from datetime import datetime
 
+from app.core.telemetry import traced
+from app.services.image_encoder import sniff_format, EXTENSIONS
+
 
 class ExportService:
     """
@@ -15,6 +18,7 @@ class ExportService:
     - Optimización para compartir
     """
     
+    @traced()
     async def create_export_package(
         self,
         copy_data: Dict[str, str],  # {platform: copy_text}
@@ -53,12 +57,13 @@ class ExportService:
             for platform, copy_text in copy_data.items():
                 zip_file.writestr(f'copy/{platform}.txt', copy_text)
             
-            # Images
+            # Images (ya comprimidas: se guardan sin deflate)
             for platform, img_list in images.items():
                 for idx, img_bytes in enumerate(img_list, 1):
                     zip_file.writestr(
-                        f'images/{platform}/image_{idx}.jpg',
-                        img_bytes
+                        f'images/{platform}/image_{idx}.{self._extension(img_bytes)}',
+                        img_bytes,
+                        compress_type=zipfile.ZIP_STORED
                     )
             
             # Metadata
@@ -74,6 +79,13 @@ class ExportService:
         zip_buffer.seek(0)
         return zip_buffer.getvalue()
     
+    @staticmethod
+    def _extension(img_bytes: bytes) -> str:
+        """
+        Extensión de archivo según el formato real de la imagen
+        """
+        return EXTENSIONS[sniff_format(img_bytes)]
+    
     def _generate_readme(self, product_name: str, platforms: List[str]) -> str:
         """
         Genera README.txt para el package
@@ -111,6 +123,7 @@ Generado con ❤️ por Mango Marketing AI
 https://mango.ubrokers.mx
 """
     
+    @traced()
     async def create_single_platform_export(
         self,
         platform: str,
@@ -128,7 +141,11 @@ https://mango.ubrokers.mx
             
             # Images
             for idx, img_bytes in enumerate(images, 1):
-                zip_file.writestr(f'{platform}_image_{idx}.jpg', img_bytes)
+                zip_file.writestr(
+                    f'{platform}_image_{idx}.{self._extension(img_bytes)}',
+                    img_bytes,
+                    compress_type=zipfile.ZIP_STORED
+                )
         
         zip_buffer.seek(0)
         return zip_buffer.getvalue()
@@ -0,0 +1,123 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Fuentes incluidas en el repo (siempre disponibles, con o sin fuentes del sistema)
+BUNDLED_FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "fonts")
+FALLBACK_FONT = os.path.join(BUNDLED_FONT_DIR, "DejaVuSans.ttf")
+
+
+class FontRegistry:
+    """
+    Registro de fuentes y cache de capas de texto renderizadas
+
+    - Indexa una sola vez los TTF/OTF de FONT_DIRS y de app/assets/fonts
+      por nombre de archivo ("DejaVuSans.ttf" → familia "dejavusans");
+      las del sistema tienen prioridad
+    - Cachea un FreeTypeFont por (familia, tamaño)
+    - Fallback: DejaVuSans incluida en el repo, así el texto se ve igual
+      en cualquier worker (sin depender de la versión de Pillow)
+    - Cachea capas de texto RGBA recortadas al bounding box del texto
+    """
+
+    def __init__(self, font_dirs=None):
+        self.font_dirs = font_dirs if font_dirs is not None else settings.FONT_DIRS
+        self._index: Optional[Dict[str, str]] = None
+        self._index_lock = threading.Lock()
+        self._fonts = LRUCache(maxsize=64)
+        self._text_layers = LRUCache(maxsize=settings.TEXT_LAYER_CACHE_SIZE)
+
+    def _build_index(self) -> Dict[str, str]:
+        index: Dict[str, str] = {}
+        for font_dir in list(self.font_dirs) + [BUNDLED_FONT_DIR]:
+            for root, _, files in os.walk(font_dir):
+                for filename in sorted(files):
+                    stem, ext = os.path.splitext(filename)
+                    if ext.lower() in FONT_EXTENSIONS:
+                        index.setdefault(stem.lower(), os.path.join(root, filename))
+        return index
+
+    def resolve(self, family: str) -> Optional[str]:
+        """
+        Ruta del archivo de fuente para una familia (o ruta directa)
+        """
+        if os.path.isfile(family):
+            return family
+
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._build_index()
+
+        key = os.path.splitext(family)[0].lower()
+        return self._index.get(key)
+
+    def get_font(self, family: Optional[str], size: int) -> ImageFont.ImageFont:
+        """
+        Obtiene la fuente (cacheada) para familia y tamaño
+        """
+        family = family or settings.WATERMARK_FONT
+        return self._fonts.get_or_create((family, size), lambda: self._load(family, size))
+
+    def _load(self, family: str, size: int) -> ImageFont.ImageFont:
+        path = self.resolve(family)
+        if path:
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError:
+                pass
+
+        return ImageFont.truetype(FALLBACK_FONT, size)
+
+    def render_text_layer(
+        self,
+        text: str,
+        family: Optional[str],
+        size: int,
+        opacity: float,
+        color: Tuple[int, int, int] = (255, 255, 255)
+    ) -> Tuple[Image.Image, Tuple[int, int, int, int]]:
+        """
+        Capa RGBA con el texto ya rasterizado (cacheada)
+
+        Returns:
+            (capa, bbox) donde bbox es el textbbox del texto dibujado en (0, 0):
+            la capa debe colocarse en (x + bbox[0], y + bbox[1])
+        """
+        family = family or settings.WATERMARK_FONT
+        key = (text, family, size, round(opacity, 3), color)
+        return self._text_layers.get_or_create(
+            key, lambda: self._render(text, family, size, opacity, color)
+        )
+
+    def _render(
+        self,
+        text: str,
+        family: str,
+        size: int,
+        opacity: float,
+        color: Tuple[int, int, int]
+    ) -> Tuple[Image.Image, Tuple[int, int, int, int]]:
+        font = self.get_font(family, size)
+        bbox = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+        width, height = max(bbox[2] - bbox[0], 1), max(bbox[3] - bbox[1], 1)
+
+        layer = Image.new('RGBA', (width, height), color + (0,))
+        draw = ImageDraw.Draw(layer)
+        draw.text((-bbox[0], -bbox[1]), text, font=font, fill=color + (int(255 * opacity),))
+        return layer, bbox
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"fonts": self._fonts.stats(), "text_layers": self._text_layers.stats()}
+
+
+# Instancia global del registro
+font_registry = FontRegistry()
@@ -0,0 +1,125 @@
+from typing import Optional, List
+from sqlalchemy.orm import Session
+from app.db.models import Generation, Copy, GeneratedImage, ImageType, QualityLevel
+import uuid
+
+
+class GenerationService:
+    """
+    Servicio para persistir generaciones y sus copys
+    """
+
+    def create_generation(
+        self,
+        db: Session,
+        platforms: List[str],
+        product_id: Optional[str] = None,
+        tone: Optional[str] = None,
+        length: Optional[str] = None,
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        quality_level: Optional[str] = None,
+        llm_used: Optional[str] = None,
+        image_model_used: Optional[str] = None,
+        image_options: Optional[dict] = None,
+    ) -> Generation:
+        """
+        Crea una generación
+        """
+        generation = Generation(
+            id=uuid.uuid4(),
+            product_id=product_id,
+            platforms=platforms,
+            tone=tone,
+            length=length,
+            use_emojis=use_emojis,
+            cta=cta,
+            quality_level=QualityLevel(quality_level) if quality_level else None,
+            llm_used=llm_used,
+            image_model_used=image_model_used,
+            image_options=image_options,
+        )
+
+        db.add(generation)
+        db.commit()
+        db.refresh(generation)
+
+        return generation
+
+    def add_copies(
+        self,
+        db: Session,
+        generation_id: str,
+        platform: str,
+        texts: List[str],
+    ) -> List[Copy]:
+        """
+        Guarda las variantes de copy de una plataforma (una fila por variante,
+        variant_number desde 1) en un solo commit
+        """
+        copies = [
+            Copy(
+                id=uuid.uuid4(),
+                generation_id=generation_id,
+                platform=platform,
+                variant_number=number,
+                copy_text=text,
+            )
+            for number, text in enumerate(texts, start=1)
+        ]
+
+        db.add_all(copies)
+        db.commit()
+        for copy in copies:
+            db.refresh(copy)
+
+        return copies
+
+    def add_image(
+        self,
+        db: Session,
+        generation_id: str,
+        image_type: ImageType,
+        file_path: str,
+        platform: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        variant_number: Optional[int] = None,
+        processing_options: Optional[dict] = None,
+    ) -> GeneratedImage:
+        """
+        Guarda una imagen generada o compuesta de la generación
+        """
+        image = GeneratedImage(
+            id=uuid.uuid4(),
+            generation_id=generation_id,
+            image_type=image_type,
+            platform=platform,
+            file_path=file_path,
+            width=width,
+            height=height,
+            variant_number=variant_number,
+            processing_options=processing_options,
+        )
+
+        db.add(image)
+        db.commit()
+        db.refresh(image)
+
+        return image
+
+    def get_copies(
+        self,
+        db: Session,
+        generation_id: str,
+        platform: Optional[str] = None,
+    ) -> List[Copy]:
+        """
+        Obtiene los copys de una generación, ordenados por plataforma y variante
+        """
+        query = db.query(Copy).filter(Copy.generation_id == generation_id)
+
+        if platform:
+            query = query.filter(Copy.platform == platform)
+
+        return query.order_by(Copy.platform, Copy.variant_number).all()
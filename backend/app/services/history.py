@@ -28,7 +28,7 @@ class HistoryService:
             id=uuid.uuid4(),
             generation_id=generation_id,
             action=action,
-            metadata=metadata,
+            request_metadata=metadata,
         )
         
         db.add(history)
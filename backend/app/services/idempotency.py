@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import metrics
+from app.core.singleflight import request_key
+from app.db.models import IdempotencyKey
+
+# Largo máximo del header Idempotency-Key
+MAX_KEY_LENGTH = 255
+
+# Intervalo de sondeo mientras la petición original sigue en curso
+POLL_SECONDS = 0.2
+
+
+class IdempotencyError(Exception):
+    """
+    Petición idempotente rechazada (el status_code se propaga como HTTP)
+    """
+
+    def __init__(self, detail: str, status_code: int = 409):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class IdempotencyService:
+    """
+    Soporte del header `Idempotency-Key` para endpoints con costo
+
+    - La primera petición con una key registra (key, hash del request,
+      'in_progress'), ejecuta el trabajo y guarda la respuesta: JSON chico
+      en `response_body` o, para respuestas grandes o binarias, un puntero
+      a archivo en `response_path` (si el archivo ya no existe, un
+      reintento vuelve a ejecutar)
+    - Un reintento con la misma key y el mismo request recibe la respuesta
+      guardada; si la original sigue en curso, espera a que termine (en
+      cualquier worker) en vez de ejecutar de nuevo
+    - Misma key con otro request: 422
+    - Si la petición original falla, el registro se borra y un reintento
+      vuelve a ejecutar (no hay respuesta que reutilizar)
+    - Las keys expiran a IDEMPOTENCY_TTL_SECONDS; un 'in_progress' de un
+      worker caído expira a IDEMPOTENCY_LOCK_SECONDS
+    """
+
+    async def execute(
+        self,
+        scope: str,
+        key: Optional[str],
+        payload: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]],
+        as_file: bool = False,
+    ) -> Tuple[Any, bool]:
+        """
+        Ejecuta `fn()` (resultado serializable a JSON) como máximo una vez por key
+
+        Args:
+            as_file: Guardar la respuesta como archivo JSON en IDEMPOTENCY_DIR
+                (respuestas grandes, p. ej. imágenes en base64); la tabla
+                guarda solo la ruta
+
+        Returns:
+            (resultado, True si es una respuesta guardada)
+        """
+        if not key:
+            return await fn(), False
+        return await self._execute(scope, key, payload, fn, "json_file" if as_file else "json")
+
+    async def execute_file(
+        self,
+        scope: str,
+        key: Optional[str],
+        payload: Dict[str, Any],
+        fn: Callable[[], Awaitable[bytes]],
+    ) -> Tuple[bytes, bool]:
+        """
+        Igual que execute para respuestas binarias: se guardan en
+        IDEMPOTENCY_DIR y la tabla guarda la ruta
+
+        Returns:
+            (bytes de la respuesta, True si es una respuesta guardada)
+        """
+        if not key:
+            return await fn(), False
+        return await self._execute(scope, key, payload, fn, "bytes")
+
+    async def _execute(
+        self,
+        scope: str,
+        key: str,
+        payload: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]],
+        storage: str,
+    ) -> Tuple[Any, bool]:
+        """
+        storage: 'json' (en response_body), 'json_file' o 'bytes' (archivo
+        en response_path)
+        """
+        if len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyError(f"Idempotency-Key demasiado larga (máximo {MAX_KEY_LENGTH})", 400)
+
+        loop = asyncio.get_event_loop()
+        record_key = f"{scope}:{key}"
+        request_hash = request_key(scope, payload)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            created, record = await loop.run_in_executor(
+                None, self._begin, scope, record_key, request_hash
+            )
+
+            if created:
+                metrics.increment("idempotency_total", scope=scope, result="executed")
+                return await self._run(record_key, fn, storage), False
+
+            if record["request_hash"] != request_hash:
+                raise IdempotencyError("Idempotency-Key ya usada con otro request", 422)
+
+            if record["status"] == "completed":
+                if storage == "json":
+                    metrics.increment("idempotency_total", scope=scope, result="replayed")
+                    return record["response_body"], True
+                try:
+                    data = await loop.run_in_executor(
+                        None, self._read_file, record["response_path"], storage == "bytes"
+                    )
+                except (FileNotFoundError, TypeError):
+                    # Archivo borrado: como si no hubiera registro, se ejecuta de nuevo
+                    metrics.increment("idempotency_total", scope=scope, result="missing_file")
+                    await loop.run_in_executor(None, self._delete, record_key)
+                    continue
+                metrics.increment("idempotency_total", scope=scope, result="replayed")
+                return data, True
+
+            # En curso: esperar a la petición original (o a que falle/expire)
+            if time.monotonic() >= deadline:
+                metrics.increment("idempotency_total", scope=scope, result="in_progress")
+                raise IdempotencyError("La petición con esta Idempotency-Key sigue en curso", 409)
+            await asyncio.sleep(POLL_SECONDS)
+
+    async def _run(self, record_key: str, fn: Callable[[], Awaitable[Any]], storage: str) -> Any:
+        loop = asyncio.get_event_loop()
+        try:
+            result = await fn()
+        except BaseException:
+            await loop.run_in_executor(None, self._delete, record_key)
+            raise
+
+        if storage == "json":
+            body = json.loads(json.dumps(result, default=str))
+            await loop.run_in_executor(None, self._complete, record_key, body, None)
+            return result
+
+        if storage == "bytes":
+            data, path = result, self._file_path(record_key, "bin")
+        else:
+            data = json.dumps(result, default=str, ensure_ascii=False).encode("utf-8")
+            path = self._file_path(record_key, "json")
+        await loop.run_in_executor(None, self._write_file, path, data)
+        await loop.run_in_executor(None, self._complete, record_key, None, path)
+        return result
+
+    @staticmethod
+    def _file_path(record_key: str, extension: str) -> str:
+        digest = hashlib.sha256(record_key.encode("utf-8")).hexdigest()
+        return os.path.join(settings.IDEMPOTENCY_DIR, f"{digest}.{extension}")
+
+    @staticmethod
+    def _read_file(path: str, binary: bool) -> Any:
+        with open(path, "rb") as f:
+            data = f.read()
+        return data if binary else json.loads(data)
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _begin(self, scope: str, record_key: str, request_hash: str) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Registra la key como 'in_progress' o retorna el registro existente
+
+        Returns:
+            (True si se creó, registro como dict)
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            self._cleanup(db, now)
+
+            record = IdempotencyKey(
+                key=record_key,
+                scope=scope,
+                request_hash=request_hash,
+                status="in_progress",
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            )
+            db.add(record)
+            try:
+                db.commit()
+                return True, self._as_dict(record)
+            except IntegrityError:
+                db.rollback()
+
+            existing = db.query(IdempotencyKey).filter(IdempotencyKey.key == record_key).first()
+            if existing is None:
+                # Se borró entre el insert y el select (falló o expiró): reintentar
+                return self._begin(scope, record_key, request_hash)
+            return False, self._as_dict(existing)
+
+    @staticmethod
+    def _cleanup(db, now: datetime) -> None:
+        """
+        Borra keys expiradas y sus archivos (índice por expires_at)
+        """
+        expired = db.query(IdempotencyKey.key, IdempotencyKey.response_path)\
+            .filter(IdempotencyKey.expires_at <= now)\
+            .all()
+        if not expired:
+            return
+
+        db.query(IdempotencyKey)\
+            .filter(IdempotencyKey.key.in_([key for key, _ in expired]))\
+            .delete(synchronize_session=False)
+        db.commit()
+
+        for _, path in expired:
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _complete(record_key: str, body: Any, path: Optional[str]) -> None:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            db.query(IdempotencyKey).filter(IdempotencyKey.key == record_key).update({
+                "status": "completed",
+                "response_body": body,
+                "response_path": path,
+                "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            }, synchronize_session=False)
+            db.commit()
+
+    @staticmethod
+    def _delete(record_key: str) -> None:
+        with SessionLocal() as db:
+            db.query(IdempotencyKey).filter(IdempotencyKey.key == record_key).delete()
+            db.commit()
+
+    @staticmethod
+    def _as_dict(record: IdempotencyKey) -> Dict[str, Any]:
+        return {
+            "request_hash": record.request_hash,
+            "status": record.status,
+            "response_body": record.response_body,
+            "response_path": record.response_path,
+        }
+
+
+# Instancia global del servicio
+idempotency_service = IdempotencyService()
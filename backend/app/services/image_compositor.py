@@ -1,8 +1,53 @@
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageEnhance
 from io import BytesIO
-from typing import Tuple, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Tuple, Optional, List, AsyncIterator
+import asyncio
+import hashlib
+import math
 import os
 
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.telemetry import traced
+from app.services.font_registry import font_registry
+from app.services.image_encoder import image_encoder
+from app.services.image_metadata import classify_image_type
+from app.services.smart_crop import smart_crop
+from app.templates.image_templates import get_image_size
+
+
+# Logos preescalados listos para componer (ver _prepare_logo)
+_logo_tiles = LRUCache(maxsize=settings.LOGO_CACHE_SIZE)
+
+# Máscaras de esquinas redondeadas por radio (ver _corner_masks)
+_corner_masks = LRUCache(maxsize=32)
+
+# Executor del compositor: Pillow libera el GIL en resize/encode/composite,
+# así que los slides de un carousel corren en paralelo en hilos
+_executor = ThreadPoolExecutor(
+    max_workers=settings.COMPOSITOR_WORKERS or os.cpu_count() or 4,
+    thread_name_prefix="compositor"
+)
+
+MAX_CAROUSEL_SLIDES = 10
+
+# Modos de encuadre (ver resize_for_platform)
+FIT_MODES = ("contain", "cover", "smart")
+
+
+def _check_fit(fit: str) -> None:
+    if fit not in FIT_MODES:
+        raise ValueError(f"fit no soportado: {fit} (contain, cover o smart)")
+
+
+async def _run_in_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
 
 class ImageCompositorService:
     """
@@ -21,6 +66,7 @@ class ImageCompositorService:
         self.default_logo_position = "bottom-right"
         self.default_logo_opacity = 0.8
     
+    @traced()
     async def detect_image_type(
         self,
         image_bytes: bytes,
@@ -45,85 +91,217 @@ class ImageCompositorService:
             }
             return type_mapping.get(user_hint.lower(), "product")
         
-        # Si no hay hint, hacer detección básica
-        image = Image.open(BytesIO(image_bytes))
-        width, height = image.size
+        # Si no hay hint, hacer detección básica (solo header, sin decodificar)
+        # Para imágenes ya ingeridas usar ProductImage.detected_type
+        info = self.probe(image_bytes)
+        width, height = info["size"]
         
         # Logos tienden a ser cuadrados y tienen transparencia
-        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
-        aspect_ratio = width / height
-        
-        if has_alpha and 0.8 < aspect_ratio < 1.2:
-            return "logo"
-        
-        # Por defecto, asumir producto
-        return "product"
+        return classify_image_type(width, height, info["has_alpha"])
     
-    async def resize_for_platform(
-        self,
-        image_bytes: bytes,
-        platform: str,
-        format_type: str = "cuadrado"
-    ) -> bytes:
+    @staticmethod
+    def probe(image_bytes: bytes) -> dict:
         """
-        Redimensiona imagen según plataforma y formato
+        Formato, modo, tamaño y transparencia leyendo solo el header
         
-        Según implementation_plan.md líneas 459-487
+        Image.open es lazy: no se decodifican píxeles mientras no se
+        llame a load() o se acceda a los datos.
         """
-        image = Image.open(BytesIO(image_bytes))
-        
-        # Tamaños del plan
-        sizes = {
-            "facebook": {
-                "feed": (1200, 630),
-                "story": (1080, 1920),
-                "cuadrado": (1080, 1080)
-            },
-            "instagram": {
-                "cuadrado": (1080, 1080),
-                "portrait": (1080, 1350),
-                "story": (1080, 1920),
-                "landscape": (1080, 566)
-            },
-            "tiktok": {
-                "video": (1080, 1920),
-                "thumbnail": (1080, 1920)
-            },
-            "linkedin": {
-                "feed": (1200, 627),
-                "story": (1080, 1920)
-            },
-            "whatsapp": {
-                "status": (1080, 1920),
-                "cuadrado": (1080, 1080)
+        with Image.open(BytesIO(image_bytes)) as image:
+            mode = image.mode
+            has_alpha = (
+                mode in ('RGBA', 'LA', 'PA', 'RGBa', 'La')
+                or 'transparency' in image.info
+            )
+            return {
+                "format": image.format,
+                "mode": mode,
+                "size": image.size,
+                "has_alpha": has_alpha,
             }
-        }
+    
+    @staticmethod
+    def _open_scaled(image_bytes: bytes, max_size: Tuple[int, int]) -> Image.Image:
+        """
+        Abre una imagen decodificándola lo más cerca posible del tamaño
+        final que tendrá al encajar en max_size
         
-        target_size = sizes.get(platform, {}).get(format_type, (1080, 1080))
+        - JPEG: draft() escala en el dominio DCT (1/2, 1/4, 1/8) al decodificar
+        - Resto: reduce() por la mayor potencia de dos que no baja del tamaño final
         
-        # Resize manteniendo aspect ratio y centrando
-        image.thumbnail(target_size, Image.Resampling.LANCZOS)
+        El resample final (LANCZOS) queda a cargo del llamador.
+        """
+        image = Image.open(BytesIO(image_bytes))
+        scale = min(max_size[0] / image.width, max_size[1] / image.height)
+        if scale >= 1:
+            return image
+        
+        fitted = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image.draft(None, fitted)
+        
+        # reduce() no soporta paleta ni bitonal
+        if image.mode in ('1', 'P'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        
+        factor = 1
+        while image.width // (factor * 2) >= fitted[0] and image.height // (factor * 2) >= fitted[1]:
+            factor *= 2
+        if factor > 1:
+            image = image.reduce(factor)
+        return image
+    
+    @classmethod
+    def _fit_on_canvas(
+        cls,
+        image_bytes: bytes,
+        target_size: Tuple[int, int],
+        padding: int = 0,
+        background: Tuple[int, int, int] = (255, 255, 255)
+    ) -> Image.Image:
+        """
+        Encaja la imagen (manteniendo aspect ratio) centrada en un canvas
+        de tamaño exacto, dejando `padding` px libres en cada borde
+        """
+        content_size = (
+            max(1, target_size[0] - 2 * padding),
+            max(1, target_size[1] - 2 * padding)
+        )
         
-        # Crear canvas con tamaño exacto
-        canvas = Image.new('RGB', target_size, (255, 255, 255))
+        # Decodificar ya reducida (draft/reduce) y terminar con LANCZOS
+        image = cls._open_scaled(image_bytes, content_size)
+        image.thumbnail(content_size, Image.Resampling.LANCZOS)
         
-        # Centrar imagen
+        # Crear canvas con tamaño exacto y centrar imagen
+        canvas = Image.new('RGB', target_size, background)
         offset = ((target_size[0] - image.size[0]) // 2,
                   (target_size[1] - image.size[1]) // 2)
         canvas.paste(image, offset)
+        return canvas
+    
+    @classmethod
+    def _crop_to_fill(
+        cls,
+        image_bytes: bytes,
+        target_size: Tuple[int, int],
+        smart: bool = True
+    ) -> Image.Image:
+        """
+        Recorta al aspecto del destino y escala para llenarlo sin bordes
+        
+        smart=True usa la región de interés (SmartCropService); si no,
+        recorte centrado.
+        """
+        aspect = target_size[0] / target_size[1]
+        full_size = cls.probe(image_bytes)["size"]
+        if smart:
+            box = smart_crop.crop_box(image_bytes, aspect)
+        elif full_size[0] / full_size[1] > aspect:
+            fraction = aspect * full_size[1] / full_size[0]
+            box = ((1 - fraction) / 2, 0.0, (1 + fraction) / 2, 1.0)
+        else:
+            fraction = full_size[0] / (full_size[1] * aspect)
+            box = (0.0, (1 - fraction) / 2, 1.0, (1 + fraction) / 2)
+        
+        # Decodificar reducida a lo justo para que el recorte cubra el destino
+        crop_width = (box[2] - box[0]) * full_size[0]
+        scale = target_size[0] / crop_width
+        image = cls._open_scaled(image_bytes, (
+            math.ceil(full_size[0] * scale), math.ceil(full_size[1] * scale)
+        ))
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA')
+        
+        width, height = image.size
+        crop = (box[0] * width, box[1] * height, box[2] * width, box[3] * height)
+        resized = image.resize(target_size, Image.Resampling.LANCZOS, box=crop)
+        
+        if resized.mode == 'RGB':
+            return resized
+        canvas = Image.new('RGB', target_size, (255, 255, 255))
+        canvas.paste(resized, (0, 0))
+        return canvas
+    
+    @traced()
+    async def resize_for_platform(
+        self,
+        image_bytes: bytes,
+        platform: str,
+        format_type: str = "cuadrado",
+        output_profile: Optional[str] = None,
+        target_max_bytes: Optional[int] = None,
+        fit: str = "contain"
+    ) -> bytes:
+        """
+        Redimensiona imagen según plataforma y formato
+        
+        Según implementation_plan.md líneas 459-487 (tamaños en IMAGE_SIZES)
+        
+        Args:
+            fit: "contain" (imagen completa sobre canvas blanco), "cover"
+                (recorte centrado que llena el formato) o "smart" (recorte
+                a la región de interés, ver SmartCropService)
+            output_profile: Perfil de codificación (default: el de la plataforma)
+            target_max_bytes: Tamaño máximo del archivo de salida
+        
+        Raises:
+            ValueError: fit distinto de contain, cover o smart
+        """
+        _check_fit(fit)
+        target_size = get_image_size(platform, format_type)
+        if fit in ("cover", "smart"):
+            canvas = self._crop_to_fill(image_bytes, target_size, smart=fit == "smart")
+        else:
+            canvas = self._fit_on_canvas(image_bytes, target_size)
         
         # Convertir a bytes
-        output = BytesIO()
-        canvas.save(output, format='JPEG', quality=95, optimize=True)
-        return output.getvalue()
+        return self._encode(canvas, platform, output_profile, target_max_bytes)
     
+    @traced()
+    async def compose_for_platform(
+        self,
+        image_bytes: bytes,
+        platform: str,
+        format_type: str = "cuadrado",
+        logo_bytes: Optional[bytes] = None,
+        fit: str = "smart",
+        output_profile: Optional[str] = None
+    ) -> bytes:
+        """
+        Resize al formato de la plataforma + logo en una sola pasada,
+        en el executor del compositor (no bloquea el event loop)
+
+        Mismo pipeline que un slide de carousel sin badge; lo usa la
+        orquestación de campañas para componer formatos en paralelo.
+        
+        Raises:
+            ValueError: fit distinto de contain, cover o smart
+        """
+        _check_fit(fit)
+        return await _run_in_executor(
+            self._build_slide,
+            image_bytes,
+            0,
+            1,
+            get_image_size(platform, format_type),
+            platform,
+            output_profile,
+            logo_bytes,
+            False,
+            0,
+            (255, 255, 255),
+            fit,
+        )
+
+    @traced()
     async def add_logo_overlay(
         self,
         base_image_bytes: bytes,
         logo_bytes: bytes,
         position: str = "bottom-right",
         opacity: float = 0.8,
-        size_percentage: float = 0.15
+        size_percentage: float = 0.15,
+        output_profile: Optional[str] = None,
+        target_max_bytes: Optional[int] = None
     ) -> bytes:
         """
         Fusiona logo en la imagen base
@@ -136,21 +314,17 @@ class ImageCompositorService:
             position: "top-left", "top-right", "bottom-left", "bottom-right"
             opacity: 0.0 a 1.0
             size_percentage: Tamaño del logo relativo a la imagen base
+            output_profile: Perfil de codificación (jpeg, jpeg_hq, webp, avif, png)
+            target_max_bytes: Tamaño máximo del archivo de salida
         """
-        base = Image.open(BytesIO(base_image_bytes)).convert('RGBA')
-        logo = Image.open(BytesIO(logo_bytes)).convert('RGBA')
+        base = self._open_for_overlay(base_image_bytes)
         
         # Calcular tamaño del logo
         base_width, base_height = base.size
         logo_target_width = int(base_width * size_percentage)
         
-        # Resize logo manteniendo aspect ratio
-        logo.thumbnail((logo_target_width, logo_target_width), Image.Resampling.LANCZOS)
-        
-        # Ajustar opacidad
-        alpha = logo.split()[3]
-        alpha = ImageEnhance.Brightness(alpha).enhance(opacity)
-        logo.putalpha(alpha)
+        # Logo preescalado y con opacidad aplicada (cacheado)
+        logo = self._prepare_logo(logo_bytes, logo_target_width, opacity)
         
         # Calcular posición
         margin = int(base_width * 0.02)  # 2% de margen
@@ -163,40 +337,157 @@ class ImageCompositorService:
         
         pos = positions.get(position, positions["bottom-right"])
         
-        # Superponer logo
-        base.paste(logo, pos, logo)
+        # Superponer logo (solo la región del logo)
+        self._overlay(base, logo, max(0, pos[0]), max(0, pos[1]))
         
         # Convertir a RGB y guardar
-        final = base.convert('RGB')
-        output = BytesIO()
-        final.save(output, format='JPEG', quality=95)
-        return output.getvalue()
+        final = base if base.mode == 'RGB' else base.convert('RGB')
+        return self._encode(final, None, output_profile, target_max_bytes)
+    
+    @staticmethod
+    def _corner_masks(radius: int) -> List[Image.Image]:
+        """
+        Máscaras (radio + 1)² de lo que queda fuera de las esquinas
+        redondeadas: superior izquierda, superior derecha, inferior
+        izquierda, inferior derecha
+        
+        Cada una dibuja el mismo rounded_rectangle que la máscara completa
+        (cuyo borde derecho/inferior cae un píxel fuera de la imagen),
+        trasladado al origen de su tile: el resultado es idéntico.
+        """
+        def build() -> List[Image.Image]:
+            tile = radius + 1
+            far = 4 * tile
+            boxes = [
+                [(0, 0), (far, far)],
+                [(-far, 0), (tile, far)],
+                [(0, -far), (far, tile)],
+                [(-far, -far), (tile, tile)],
+            ]
+            masks = []
+            for box in boxes:
+                mask = Image.new('L', (tile, tile), 255)
+                ImageDraw.Draw(mask).rounded_rectangle(box, radius, fill=0)
+                masks.append(mask)
+            return masks
+        
+        return _corner_masks.get_or_create(radius, build)
+    
+    @staticmethod
+    def _open_for_overlay(image_bytes: bytes) -> Image.Image:
+        """
+        Abre la imagen base para superponer capas
+        
+        RGB (caso JPEG) se deja tal cual: las capas se pegan con su alpha
+        como máscara sobre la región afectada, sin convertir todo el canvas
+        a RGBA y de vuelta. Otros modos se convierten a RGBA.
+        """
+        image = Image.open(BytesIO(image_bytes))
+        if image.mode == 'RGB':
+            image.load()
+            return image
+        return image.convert('RGBA')
+    
+    @staticmethod
+    def _overlay(base: Image.Image, layer: Image.Image, left: int, top: int) -> None:
+        """
+        Compone una capa RGBA sobre `base` en (left, top), in-place,
+        tocando solo la región de la capa (recortada a los bordes)
+        
+        Sobre RGB opaco paste(capa, máscara=alpha) da el mismo resultado
+        que alpha_composite.
+        """
+        source = (
+            max(0, -left),
+            max(0, -top),
+            min(layer.size[0], base.size[0] - left),
+            min(layer.size[1], base.size[1] - top),
+        )
+        if source[2] <= source[0] or source[3] <= source[1]:
+            return
+        
+        dest = (max(0, left), max(0, top))
+        if base.mode == 'RGB':
+            region = layer if source == (0, 0) + layer.size else layer.crop(source)
+            base.paste(region, dest, region)
+        else:
+            base.alpha_composite(layer, dest=dest, source=source)
+    
+    @staticmethod
+    def _encode(
+        image: Image.Image,
+        platform: Optional[str] = None,
+        output_profile: Optional[str] = None,
+        target_max_bytes: Optional[int] = None
+    ) -> bytes:
+        """
+        Codifica la imagen de salida (ver ImageEncoderService)
+        """
+        return image_encoder.encode(
+            image,
+            platform=platform,
+            profile=output_profile,
+            target_max_bytes=target_max_bytes
+        )["data"]
+    
+    @staticmethod
+    def _prepare_logo(
+        logo_bytes: bytes,
+        target_width: int,
+        opacity: float
+    ) -> Image.Image:
+        """
+        Logo listo para componer, cacheado por (hash, ancho, opacidad)
+        
+        Un mismo logo de marca se estampa en cientos de imágenes: el decode,
+        el LANCZOS y el ajuste de alpha se hacen una sola vez. El tile
+        cacheado es compartido, no debe modificarse.
+        """
+        key = (
+            hashlib.blake2b(logo_bytes, digest_size=16).hexdigest(),
+            target_width,
+            round(opacity, 3),
+        )
+        
+        def build() -> Image.Image:
+            logo = Image.open(BytesIO(logo_bytes)).convert('RGBA')
+            
+            # Resize logo manteniendo aspect ratio
+            logo.thumbnail((target_width, target_width), Image.Resampling.LANCZOS)
+            
+            # Ajustar opacidad
+            alpha = logo.getchannel('A')
+            alpha = ImageEnhance.Brightness(alpha).enhance(opacity)
+            logo.putalpha(alpha)
+            return logo
+        
+        return _logo_tiles.get_or_create(key, build)
     
+    @traced()
     async def add_watermark(
         self,
         image_bytes: bytes,
         watermark_text: str,
         position: str = "bottom-center",
         font_size: int = 24,
-        opacity: float = 0.5
+        opacity: float = 0.5,
+        font_family: Optional[str] = None,
+        output_profile: Optional[str] = None,
+        target_max_bytes: Optional[int] = None
     ) -> bytes:
         """
         Agrega watermark de texto
-        """
-        image = Image.open(BytesIO(image_bytes)).convert('RGBA')
         
-        # Crear capa para texto
-        txt_layer = Image.new('RGBA', image.size, (255, 255, 255, 0))
-        draw = ImageDraw.Draw(txt_layer)
+        La fuente y la capa de texto rasterizada vienen del font_registry
+        (cacheadas por texto, fuente, tamaño y opacidad).
+        """
+        image = self._open_for_overlay(image_bytes)
         
-        # Intentar cargar fuente, si no, usar default
-        try:
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except:
-            font = ImageFont.load_default()
+        txt_layer, bbox = font_registry.render_text_layer(
+            watermark_text, font_family, font_size, opacity
+        )
         
         # Calcular posición del texto
-        bbox = draw.textbbox((0, 0), watermark_text, font=font)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         
@@ -209,83 +500,275 @@ class ImageCompositorService:
         
         pos = positions.get(position, positions["bottom-center"])
         
-        # Dibujar texto con opacidad
-        text_color = (255, 255, 255, int(255 * opacity))
-        draw.text(pos, watermark_text, font=font, fill=text_color)
+        # Combinar solo la región del texto
+        self._overlay(image, txt_layer, pos[0] + bbox[0], pos[1] + bbox[1])
+        final = image if image.mode == 'RGB' else image.convert('RGB')
         
-        # Combinar capas
-        watermarked = Image.alpha_composite(image, txt_layer)
-        final = watermarked.convert('RGB')
-        
-        output = BytesIO()
-        final.save(output, format='JPEG', quality=95)
-        return output.getvalue()
+        return self._encode(final, None, output_profile, target_max_bytes)
     
+    @traced()
     async def create_rounded_corners(
         self,
         image_bytes: bytes,
-        radius: int = 50
+        radius: int = 50,
+        output_profile: str = "png"
     ) -> bytes:
         """
         Crea esquinas redondeadas
+        
+        La salida necesita transparencia: usar un perfil con alpha (png, webp, avif)
         """
         image = Image.open(BytesIO(image_bytes)).convert('RGBA')
+        width, height = image.size
         
-        # Crear máscara para esquinas redondeadas
-        mask = Image.new('L', image.size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.rounded_rectangle([(0, 0), image.size], radius, fill=255)
-        
-        # Aplicar máscara
-        rounded = Image.new('RGBA', image.size, (255, 255, 255, 0))
-        rounded.paste(image, (0, 0), mask)
+        if radius <= 0:
+            return self._encode(image, None, output_profile)
         
-        output = BytesIO()
-        rounded.save(output, format='PNG')
-        return output.getvalue()
+        if 2 * (radius + 1) > min(width, height):
+            # Radio casi del tamaño de la imagen: máscara completa
+            mask = Image.new('L', image.size, 0)
+            draw = ImageDraw.Draw(mask)
+            draw.rounded_rectangle([(0, 0), image.size], radius, fill=255)
+            
+            rounded = Image.new('RGBA', image.size, (255, 255, 255, 0))
+            rounded.paste(image, (0, 0), mask)
+            return self._encode(rounded, None, output_profile)
+        
+        # Solo las cuatro esquinas cambian: recortarlas con máscaras de
+        # (radio + 1)² cacheadas por radio, en lugar de una máscara y una
+        # capa RGBA del tamaño de la imagen
+        tile = radius + 1
+        origins = [(0, 0), (width - tile, 0), (0, height - tile), (width - tile, height - tile)]
+        for origin, corner_mask in zip(origins, self._corner_masks(radius)):
+            image.paste((255, 255, 255, 0), origin, corner_mask)
+        
+        return self._encode(image, None, output_profile)
     
+    @traced()
     async def apply_glow_effect(
         self,
         image_bytes: bytes,
         glow_radius: int = 10,
-        glow_color: Tuple[int, int, int] = (255, 215, 0)  # Gold
+        glow_color: Tuple[int, int, int] = (255, 215, 0),  # Gold
+        output_profile: Optional[str] = None,
+        target_max_bytes: Optional[int] = None
     ) -> bytes:
         """
         Aplica efecto de brillo/glow
         """
-        image = Image.open(BytesIO(image_bytes)).convert('RGBA')
-        
-        # Crear capa de glow
-        glow = Image.new('RGBA', image.size, glow_color + (0,))
-        glow.paste(image, (0, 0), image)
-        
-        # Aplicar blur para efecto glow
-        for _ in range(3):
-            glow = glow.filter(ImageFilter.GaussianBlur(glow_radius))
-        
-        # Combinar glow con imagen original
-        result = Image.alpha_composite(glow, image)
-        final = result.convert('RGB')
+        image = Image.open(BytesIO(image_bytes))
+        final = self._apply_glow(image, glow_radius, glow_color)
         
-        output = BytesIO()
-        final.save(output, format='JPEG', quality=95)
-        return output.getvalue()
+        return self._encode(final, None, output_profile, target_max_bytes)
     
+    @staticmethod
+    def _apply_glow(
+        image: Image.Image,
+        glow_radius: int,
+        glow_color: Tuple[int, int, int]
+    ) -> Image.Image:
+        """
+        Glow calculado a resolución reducida
+        
+        Equivale a pegar la imagen sobre una capa del color de glow
+        (paste con la imagen como máscara), aplicar GaussianBlur(glow_radius)
+        tres veces y componer la imagen encima:
+        - La capa pegada tiene RGB = rgb·α + color·(1 - α) y alpha α²
+          (paste mezcla también el canal alpha)
+        - Tres blurs de sigma r equivalen a uno de sigma r·√3, que se aplica
+          a 1/scale de resolución (la capa es casi plana tras el blur)
+        - rgb·α y α son lineales: se reducen ya premultiplicados y la capa
+          se arma con NumPy a baja resolución; α² se calcula antes de reducir
+        - Se reescala y se compone con un solo alpha_composite
+        - Imágenes opacas: el glow queda totalmente cubierto, se omite
+        """
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        if not has_alpha:
+            return image.convert('RGB')
+        
+        image = image.convert('RGBA')
+        if image.getchannel('A').getextrema()[0] == 255:
+            return image.convert('RGB')
+        
+        sigma = glow_radius * math.sqrt(3)
+        scale = max(1, min(8, int(sigma / 2)))
+        
+        # Canales por separado: reduce()/resize() de RGBA premultiplican y
+        # perderían el color de la capa donde α = 0
+        red, green, blue, alpha = image.convert('RGBa').split()
+        bands = [red, green, blue, alpha, ImageChops.multiply(alpha, alpha)]
+        if scale > 1:
+            bands = [band.reduce(scale) for band in bands]
+        small = np.stack([np.asarray(band, dtype=np.float32) for band in bands], axis=-1) / 255
+        
+        color = np.asarray(glow_color, dtype=np.float32) / 255
+        layer = np.concatenate([
+            small[..., :3] + color * (1 - small[..., 3:4]),
+            small[..., 4:],
+        ], axis=-1)
+        glow = Image.fromarray((np.clip(layer, 0, 1) * 255 + 0.5).astype(np.uint8), 'RGBA')
+        glow = glow.filter(ImageFilter.GaussianBlur(sigma / scale))
+        glow = Image.merge('RGBA', [
+            band.resize(image.size, Image.Resampling.BILINEAR) for band in glow.split()
+        ])
+        
+        return Image.alpha_composite(glow, image).convert('RGB')
+    
+    @traced()
     async def create_carousel_images(
         self,
         images: List[bytes],
-        platform: str = "instagram"
+        platform: str = "instagram",
+        output_profile: Optional[str] = None,
+        format_type: str = "cuadrado",
+        logo_bytes: Optional[bytes] = None,
+        number_badges: bool = False,
+        padding: int = 0,
+        background: Tuple[int, int, int] = (255, 255, 255),
+        fit: str = "contain"
     ) -> List[bytes]:
         """
         Crea set de imágenes optimizadas para carousel
         
         Del implementation_plan.md: generación de carousels
-        """
-        carousel = []
-        format_type = "cuadrado"  # Default para carousels
         
-        for img_bytes in images[:10]:  # Máximo 10 imágenes
-            resized = await self.resize_for_platform(img_bytes, platform, format_type)
-            carousel.append(resized)
+        Los slides se procesan en paralelo en el executor del compositor;
+        el resultado respeta el orden de entrada. Ver iter_carousel_images
+        para recibirlos a medida que terminan.
+        """
+        carousel: List[Optional[bytes]] = [None] * min(len(images), MAX_CAROUSEL_SLIDES)
+        
+        async for index, slide in self.iter_carousel_images(
+            images,
+            platform=platform,
+            output_profile=output_profile,
+            format_type=format_type,
+            logo_bytes=logo_bytes,
+            number_badges=number_badges,
+            padding=padding,
+            background=background,
+            fit=fit,
+        ):
+            carousel[index] = slide
         
         return carousel
+    
+    async def iter_carousel_images(
+        self,
+        images: List[bytes],
+        platform: str = "instagram",
+        output_profile: Optional[str] = None,
+        format_type: str = "cuadrado",
+        logo_bytes: Optional[bytes] = None,
+        number_badges: bool = False,
+        padding: int = 0,
+        background: Tuple[int, int, int] = (255, 255, 255),
+        fit: str = "contain"
+    ) -> AsyncIterator[Tuple[int, bytes]]:
+        """
+        Genera los slides del carousel en paralelo y los entrega
+        a medida que terminan como (índice, bytes)
+        
+        Pipeline por slide:
+        - Resize al tamaño de la plataforma con el mismo padding y fondo
+          (fit: contain, cover o smart, como en resize_for_platform)
+        - Logo solo en el primer slide
+        - Badge de numeración "n/total" (opcional)
+        
+        Raises:
+            ValueError: fit distinto de contain, cover o smart
+        """
+        _check_fit(fit)
+        slides = images[:MAX_CAROUSEL_SLIDES]  # Máximo 10 imágenes
+        target_size = get_image_size(platform, format_type)
+        
+        async def build(index: int, img_bytes: bytes) -> Tuple[int, bytes]:
+            slide = await _run_in_executor(
+                self._build_slide,
+                img_bytes,
+                index,
+                len(slides),
+                target_size,
+                platform,
+                output_profile,
+                logo_bytes if index == 0 else None,
+                number_badges,
+                padding,
+                background,
+                fit,
+            )
+            return index, slide
+        
+        tasks = [asyncio.ensure_future(build(i, img)) for i, img in enumerate(slides)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _build_slide(
+        self,
+        image_bytes: bytes,
+        index: int,
+        total: int,
+        target_size: Tuple[int, int],
+        platform: str,
+        output_profile: Optional[str],
+        logo_bytes: Optional[bytes],
+        number_badge: bool,
+        padding: int,
+        background: Tuple[int, int, int],
+        fit: str = "contain"
+    ) -> bytes:
+        """
+        Pipeline síncrono de un slide (corre en el executor)
+        """
+        _check_fit(fit)
+        if fit in ("cover", "smart"):
+            content_size = (
+                max(1, target_size[0] - 2 * padding),
+                max(1, target_size[1] - 2 * padding)
+            )
+            canvas = self._crop_to_fill(image_bytes, content_size, smart=fit == "smart")
+            if padding:
+                framed = Image.new('RGB', target_size, background)
+                framed.paste(canvas, (padding, padding))
+                canvas = framed
+        else:
+            canvas = self._fit_on_canvas(image_bytes, target_size, padding, background)
+        
+        margin = int(target_size[0] * 0.02)
+        
+        if logo_bytes:
+            logo = self._prepare_logo(
+                logo_bytes, int(target_size[0] * 0.15), self.default_logo_opacity
+            )
+            self._overlay(
+                canvas,
+                logo,
+                max(0, target_size[0] - logo.size[0] - margin),
+                max(0, target_size[1] - logo.size[1] - margin)
+            )
+        
+        if number_badge:
+            badge = self._render_badge(f"{index + 1}/{total}", max(12, target_size[1] // 30))
+            self._overlay(canvas, badge, max(0, target_size[0] - badge.size[0] - margin), margin)
+        
+        return self._encode(canvas, platform, output_profile)
+    
+    @staticmethod
+    def _render_badge(text: str, font_size: int) -> Image.Image:
+        """
+        Badge de numeración: texto blanco sobre pastilla oscura semitransparente
+        """
+        text_layer, bbox = font_registry.render_text_layer(text, None, font_size, 1.0)
+        pad_x, pad_y = font_size // 2, font_size // 3
+        size = (text_layer.size[0] + 2 * pad_x, text_layer.size[1] + 2 * pad_y)
+        
+        badge = Image.new('RGBA', size, (0, 0, 0, 0))
+        ImageDraw.Draw(badge).rounded_rectangle(
+            [(0, 0), (size[0] - 1, size[1] - 1)], radius=size[1] // 2, fill=(0, 0, 0, 150)
+        )
+        badge.alpha_composite(text_layer, dest=(pad_x, pad_y))
+        return badge
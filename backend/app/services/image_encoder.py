@@ -0,0 +1,166 @@
+import time
+from io import BytesIO
+from typing import Dict, Any, Optional
+
+from PIL import Image
+
+from app.core.metrics import metrics
+from app.templates.image_templates import OUTPUT_PROFILES, get_output_profile
+
+try:  # Plugin AVIF opcional para Pillow sin soporte nativo
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+
+MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "AVIF": "image/avif",
+    "PNG": "image/png",
+}
+
+EXTENSIONS = {
+    "JPEG": "jpg",
+    "WEBP": "webp",
+    "AVIF": "avif",
+    "PNG": "png",
+}
+
+
+def sniff_format(data: bytes) -> str:
+    """
+    Detecta el formato de una imagen codificada por sus magic bytes
+    """
+    if data[:3] == b"\xff\xd8\xff":
+        return "JPEG"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "PNG"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "WEBP"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"avif", b"avis"):
+        return "AVIF"
+    return "JPEG"
+
+
+def _supports(image_format: str) -> bool:
+    Image.init()
+    return image_format in Image.SAVE
+
+
+class ImageEncoderService:
+    """
+    Codificación de imágenes de salida según perfiles por plataforma
+
+    - JPEG progresivo/optimizado con control de chroma subsampling
+    - WebP y AVIF (con fallback si Pillow no los soporta)
+    - Modo "target max bytes": búsqueda binaria de la calidad más alta
+      que cabe en el límite
+    - Métricas de tiempo y tamaño por formato
+    """
+
+    def encode(
+        self,
+        image: Image.Image,
+        platform: Optional[str] = None,
+        profile: Optional[str] = None,
+        target_max_bytes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Codifica una imagen
+
+        Args:
+            image: Imagen PIL
+            platform: Plataforma destino (elige el perfil por defecto)
+            profile: Perfil explícito (jpeg, jpeg_progressive, jpeg_hq, webp, avif, png)
+            target_max_bytes: Tamaño máximo deseado (solo formatos con pérdida)
+
+        Returns:
+            Dict con data, format, mime_type, extension, quality, size,
+            encode_ms y target_met
+        """
+        options = dict(get_output_profile(platform, profile))
+        image_format = options.pop("format")
+
+        while not _supports(image_format) and options.get("fallback"):
+            options = dict(OUTPUT_PROFILES[options["fallback"]])
+            image_format = options.pop("format")
+
+        options.pop("fallback", None)
+        lossless = options.pop("lossless", False)
+        min_quality = options.pop("min_quality", None)
+
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        started = time.perf_counter()
+
+        if target_max_bytes and not lossless:
+            data, quality = self._encode_to_target(
+                image, image_format, options, min_quality or 1, target_max_bytes
+            )
+        else:
+            quality = options.get("quality")
+            data = self._save(image, image_format, options)
+
+        encode_ms = (time.perf_counter() - started) * 1000
+
+        metrics.increment("image_encode_total", format=image_format)
+        metrics.observe("image_encode_ms", encode_ms, format=image_format)
+        metrics.observe("image_encode_bytes", len(data), format=image_format)
+
+        return {
+            "data": data,
+            "format": image_format,
+            "mime_type": MIME_TYPES[image_format],
+            "extension": EXTENSIONS[image_format],
+            "quality": quality,
+            "size": len(data),
+            "encode_ms": encode_ms,
+            "target_met": target_max_bytes is None or len(data) <= target_max_bytes,
+        }
+
+    @staticmethod
+    def _save(image: Image.Image, image_format: str, options: Dict[str, Any]) -> bytes:
+        output = BytesIO()
+        image.save(output, format=image_format, **options)
+        return output.getvalue()
+
+    def _encode_to_target(
+        self,
+        image: Image.Image,
+        image_format: str,
+        options: Dict[str, Any],
+        min_quality: int,
+        target_max_bytes: int
+    ):
+        """
+        Búsqueda binaria de la calidad más alta que cabe en target_max_bytes
+
+        Si ni la calidad mínima cabe, retorna el resultado de calidad mínima.
+        """
+        low, high = min_quality, options.get("quality", 85)
+        best = None
+
+        # Caso común: la calidad del perfil ya cabe
+        data = self._save(image, image_format, {**options, "quality": high})
+        if len(data) <= target_max_bytes:
+            return data, high
+
+        high -= 1
+        while low <= high:
+            quality = (low + high) // 2
+            data = self._save(image, image_format, {**options, "quality": quality})
+            if len(data) <= target_max_bytes:
+                best = (data, quality)
+                low = quality + 1
+            else:
+                high = quality - 1
+
+        if best is None:
+            best = (self._save(image, image_format, {**options, "quality": min_quality}), min_quality)
+        return best
+
+
+# Instancia global del encoder
+image_encoder = ImageEncoderService()
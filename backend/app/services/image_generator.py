@@ -1,5 +1,7 @@
+import base64
 from typing import Dict, Any, List
 from app.providers.base import ProviderFactory, BaseImageProvider
+from app.core.telemetry import traced
 
 
 class ImageGeneratorService:
@@ -14,6 +16,7 @@ class ImageGeneratorService:
     4. Compositor para fusión de logos, watermarks, etc.
     """
     
+    @traced()
     async def generate_image(
         self,
         # Provider config
@@ -42,7 +45,7 @@ class ImageGeneratorService:
             
         Returns:
             Dict con:
-            - images: Lista de rutas a las imágenes generadas
+            - images: Lista de imágenes generadas (base64)
             - metadata: Info del provider y modelo
             
         Raises:
@@ -66,25 +69,24 @@ class ImageGeneratorService:
                 **kwargs
             )
             
-            # 3. Guardar imágenes
-            # TODO: Implementar almacenamiento de archivos
-            # Por ahora retornamos estructura de respuesta
+            # 3. Codificar imágenes: la respuesta lleva las imágenes en base64;
+            # quien necesita archivos los escribe (campañas, Idempotency-Key)
+            images = [base64.b64encode(img).decode("ascii") for img in images_bytes]
             
             # 4. Obtener metadata del modelo
             model_info = await provider.get_model_info()
             
             return {
-                "images": [],  # TODO: Rutas a archivos guardados
+                "images": images,
                 "metadata": {
                     "provider": image_provider,
                     "model": image_model,
                     "width": width,
                     "height": height,
-                    "num_generated": num_images,
+                    "num_generated": len(images),
                     "model_info": model_info,
                 },
-                "status": "pending_implementation",
-                "note": "La generación de imágenes requiere configuración de API real de Imagen/Flux"
+                "status": "completed",
             }
             
         except NotImplementedError as e:
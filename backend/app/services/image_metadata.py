@@ -0,0 +1,138 @@
+from io import BytesIO
+from typing import Any, Dict, List, Union
+
+import numpy as np
+from PIL import Image
+
+# Lado máximo de la copia reducida sobre la que se analiza
+ANALYSIS_SIZE = 128
+
+# pHash: DCT de 32x32, se conservan las 8x8 frecuencias más bajas (64 bits)
+PHASH_SIZE = 32
+PHASH_LOW = 8
+
+# Píxeles con alfa menor se consideran transparentes
+ALPHA_THRESHOLD = 250
+
+
+def classify_image_type(width: int, height: int, has_alpha: bool) -> str:
+    """
+    Heurística de tipo: "logo" si tiene transparencia y es casi cuadrada;
+    "product" en cualquier otro caso
+    """
+    aspect_ratio = width / height
+    if has_alpha and 0.8 < aspect_ratio < 1.2:
+        return "logo"
+    return "product"
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+class ImageMetadataService:
+    """
+    Metadata de imagen calculada una sola vez (en la ingesta)
+
+    Decodifica una copia reducida (draft JPEG + thumbnail) y obtiene:
+    dimensiones, formato, modo, transparencia real, colores dominantes,
+    hash perceptual (pHash de 64 bits en hex) y tipo detectado.
+    """
+
+    def extract(self, source: Union[str, bytes]) -> Dict[str, Any]:
+        """
+        Extrae la metadata de una imagen (ruta o bytes)
+
+        Returns:
+            Dict con width, height, format, mode, has_alpha,
+            dominant_colors, phash y detected_type
+        """
+        fp = BytesIO(source) if isinstance(source, bytes) else source
+        with Image.open(fp) as image:
+            width, height = image.size
+            image_format = image.format
+            mode = image.mode
+
+            # thumbnail() usa draft() en JPEG: no se decodifica a tamaño completo
+            image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR)
+            small = image.convert("RGBA")
+
+        alpha = np.asarray(small.getchannel("A"))
+        has_alpha = bool(alpha.min() < ALPHA_THRESHOLD)
+
+        return {
+            "width": width,
+            "height": height,
+            "format": image_format,
+            "mode": mode,
+            "has_alpha": has_alpha,
+            "dominant_colors": self.dominant_colors(small),
+            "phash": self.phash(small),
+            "detected_type": classify_image_type(width, height, has_alpha),
+        }
+
+    @staticmethod
+    def phash(image: Image.Image) -> str:
+        """
+        Hash perceptual (DCT) en 16 caracteres hex
+
+        La transparencia se aplana sobre blanco para que un logo con o sin
+        fondo produzca el mismo hash.
+        """
+        if image.mode == "RGBA":
+            flat = Image.new("RGBA", image.size, (255, 255, 255, 255))
+            flat.alpha_composite(image)
+            image = flat
+
+        gray = image.convert("L").resize((PHASH_SIZE, PHASH_SIZE), Image.Resampling.LANCZOS)
+        pixels = np.asarray(gray, dtype=np.float64)
+        low = (_DCT @ pixels @ _DCT.T)[:PHASH_LOW, :PHASH_LOW]
+        bits = (low > np.median(low)).flatten()
+
+        value = 0
+        for bit in bits:
+            value = (value << 1) | int(bit)
+        return f"{value:016x}"
+
+    @staticmethod
+    def hamming(hash_a: str, hash_b: str) -> int:
+        """
+        Distancia de Hamming entre dos pHash hex
+        """
+        return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+    @staticmethod
+    def dominant_colors(image: Image.Image, count: int = 5) -> List[Dict[str, Any]]:
+        """
+        Colores dominantes de los píxeles opacos (median cut)
+
+        Returns:
+            Lista de {"color": "#rrggbb", "ratio": float} de mayor a menor
+        """
+        pixels = np.asarray(image.convert("RGBA")).reshape(-1, 4)
+        opaque = pixels[pixels[:, 3] >= 128][:, :3]
+        if len(opaque) == 0:
+            return []
+
+        strip = Image.fromarray(np.ascontiguousarray(opaque).reshape(1, -1, 3), "RGB")
+        quantized = strip.quantize(colors=count, method=Image.Quantize.MEDIANCUT)
+        palette = quantized.getpalette()
+
+        colors = []
+        for pixel_count, index in sorted(quantized.getcolors(), reverse=True):
+            r, g, b = palette[index * 3:index * 3 + 3]
+            colors.append({
+                "color": f"#{r:02x}{g:02x}{b:02x}",
+                "ratio": round(pixel_count / len(opaque), 3),
+            })
+        return colors
+
+
+# Instancia global del servicio
+image_metadata = ImageMetadataService()
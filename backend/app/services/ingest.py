@@ -0,0 +1,285 @@
+import asyncio
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.telemetry import traced
+from app.services.image_encoder import EXTENSIONS
+from app.services.image_metadata import image_metadata
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+# Límite global de Pillow: Image.open lanza DecompressionBombError a partir
+# del doble de este valor en cualquier parte del proceso (compositor incluido)
+Image.MAX_IMAGE_PIXELS = int(settings.MAX_IMAGE_MEGAPIXELS * 1_000_000)
+
+ALLOWED_FORMATS = ("JPEG", "PNG", "WEBP", "AVIF")
+
+# Campos de texto del formulario (no archivos): límite total
+MAX_FIELDS_BYTES = 64 * 1024
+
+# Orientación EXIF
+EXIF_ORIENTATION = 0x0112
+
+
+class IngestError(Exception):
+    """
+    Upload rechazado (el status_code se propaga como HTTP)
+    """
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class _MultipartSink:
+    """
+    Callbacks del parser multipart: escribe el primer archivo del campo
+    `field_name` directo a disco y acumula los campos de texto
+    """
+
+    def __init__(self, field_name: str, tmp_path: str, max_file_bytes: int):
+        self.field_name = field_name
+        self.tmp_path = tmp_path
+        self.max_file_bytes = max_file_bytes
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.file_size = 0
+        self._file = None
+        self._fields_bytes = 0
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition: Dict[bytes, bytes] = {}
+        self._target = None  # 'file' | 'field' | None (parte ignorada)
+        self._field_name = ""
+        self._field_value = bytearray()
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._disposition = {}
+        self._target = None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            _, self._disposition = parse_options_header(self._header_value)
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        name = self._disposition.get(b"name", b"").decode("utf-8", "replace")
+        filename = self._disposition.get(b"filename")
+
+        if filename is not None:
+            # Solo el primer archivo del campo esperado; el resto se descarta
+            if name == self.field_name and self._file is None and self.filename is None:
+                self.filename = filename.decode("utf-8", "replace")
+                self._file = open(self.tmp_path, "wb")
+                self._target = "file"
+        else:
+            self._field_name = name
+            self._field_value = bytearray()
+            self._target = "field"
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        chunk = data[start:end]
+        if self._target == "file":
+            self.file_size += len(chunk)
+            if self.file_size > self.max_file_bytes:
+                raise IngestError(
+                    f"Archivo demasiado grande (máximo {self.max_file_bytes} bytes)", 413
+                )
+            self._file.write(chunk)
+        elif self._target == "field":
+            self._fields_bytes += len(chunk)
+            if self._fields_bytes > MAX_FIELDS_BYTES:
+                raise IngestError("Campos del formulario demasiado grandes", 413)
+            self._field_value.extend(chunk)
+
+    def on_part_end(self):
+        if self._target == "file":
+            self._file.close()
+        elif self._target == "field":
+            self.fields[self._field_name] = self._field_value.decode("utf-8", "replace")
+        self._target = None
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+class IngestService:
+    """
+    Ingesta de imágenes subidas por el usuario
+
+    - Recibe el multipart en streaming y lo escribe a disco por chunks
+      (nunca el body completo en memoria); el parseo y la escritura de
+      cada chunk corren en el executor, no en el event loop
+    - Límite de bytes (MAX_UPLOAD_BYTES) y de megapíxeles (MAX_IMAGE_MEGAPIXELS)
+    - Valida formato y dimensiones leyendo solo el header
+    - Aplica la orientación EXIF una sola vez, aquí; el resto del pipeline
+      puede asumir píxeles ya orientados
+    - Semáforo por worker para acotar decodificaciones simultáneas
+    """
+
+    def __init__(self):
+        self.upload_dir = settings.UPLOAD_DIR
+        self.max_bytes = settings.MAX_UPLOAD_BYTES
+        self.max_pixels = int(settings.MAX_IMAGE_MEGAPIXELS * 1_000_000)
+        self._semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_INGESTS)
+
+    async def receive_upload(self, request: Request, field_name: str = "file") -> Dict[str, Any]:
+        """
+        Lee un upload multipart/form-data en streaming
+
+        Returns:
+            Dict con tmp_path, filename, file_size y fields (campos de texto)
+        """
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        boundary = options.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise IngestError("Se esperaba multipart/form-data", 415)
+
+        # Rechazo temprano si el cliente declara un body mayor al permitido
+        max_body = self.max_bytes + MAX_FIELDS_BYTES
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_body:
+            raise IngestError(f"Archivo demasiado grande (máximo {self.max_bytes} bytes)", 413)
+
+        os.makedirs(self.upload_dir, exist_ok=True)
+        tmp_path = os.path.join(self.upload_dir, f".upload-{uuid.uuid4().hex}")
+
+        sink = _MultipartSink(field_name, tmp_path, self.max_bytes)
+        parser = MultipartParser(boundary, sink.callbacks())
+
+        loop = asyncio.get_event_loop()
+        try:
+            async for chunk in request.stream():
+                await loop.run_in_executor(None, parser.write, chunk)
+            await loop.run_in_executor(None, parser.finalize)
+        except Exception as e:
+            sink.close()
+            self._remove(tmp_path)
+            if isinstance(e, IngestError):
+                raise
+            raise IngestError(f"Upload multipart inválido: {str(e)}", 400)
+        sink.close()
+
+        if sink.filename is None:
+            self._remove(tmp_path)
+            raise IngestError(f"Falta el archivo en el campo '{field_name}'", 400)
+
+        return {
+            "tmp_path": tmp_path,
+            "filename": sink.filename,
+            "file_size": sink.file_size,
+            "fields": sink.fields,
+        }
+
+    @traced()
+    async def ingest(self, tmp_path: str) -> Dict[str, Any]:
+        """
+        Valida y normaliza un archivo recibido; lo mueve a su ruta final
+
+        Returns:
+            Dict con file_path, file_size y la metadata de ImageMetadataService
+            (width, height, format, mode, has_alpha, dominant_colors, phash,
+            detected_type)
+        """
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(None, self._process, tmp_path)
+        except IngestError:
+            self._remove(tmp_path)
+            raise
+        except Exception as e:
+            self._remove(tmp_path)
+            raise Exception(f"Error procesando upload: {str(e)}")
+
+    def _process(self, tmp_path: str) -> Dict[str, Any]:
+        try:
+            image = Image.open(tmp_path)
+        except Image.DecompressionBombError:
+            raise IngestError("Imagen demasiado grande (megapíxeles)", 413)
+        except Exception:
+            raise IngestError("El archivo no es una imagen válida", 415)
+
+        with image:
+            image_format = image.format
+            if image_format not in ALLOWED_FORMATS:
+                raise IngestError(f"Formato no soportado: {image_format}", 415)
+
+            width, height = image.size
+            if width * height > self.max_pixels:
+                raise IngestError(
+                    f"Imagen demasiado grande: {width}x{height} "
+                    f"(máximo {settings.MAX_IMAGE_MEGAPIXELS:g} MP)",
+                    413,
+                )
+
+            final_path = os.path.join(
+                self.upload_dir, f"{uuid.uuid4().hex}.{EXTENSIONS[image_format]}"
+            )
+
+            orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+            if orientation != 1:
+                # Única decodificación completa: rotar y re-guardar ya orientada
+                oriented = ImageOps.exif_transpose(image)
+                save_options = {"exif": oriented.getexif()}
+                if image_format == "JPEG":
+                    save_options["quality"] = 95
+                oriented.save(final_path, format=image_format, **save_options)
+
+        if orientation != 1:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+
+        # Metadata sobre el archivo final (ya orientado), una sola vez
+        return {
+            "file_path": final_path,
+            "file_size": os.path.getsize(final_path),
+            **image_metadata.extract(final_path),
+        }
+
+    def discard(self, file_path: str) -> None:
+        """
+        Borra un archivo ya ingestado que no llegó a registrarse en la DB
+        """
+        self._remove(file_path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Instancia global del servicio
+ingest_service = IngestService()
@@ -0,0 +1,108 @@
+import random
+import re
+from typing import Any, Dict, List, Optional
+
+from app.providers.simulation import stable_seed
+from app.services.copy_length import copy_length
+from app.services.structured_copy import render_structured_copy
+from app.templates.copy_templates import get_copy_limit, get_structure, get_template
+
+# Emojis y símbolos pictográficos de hooks/CTAs (se quitan sin use_emojis)
+_EMOJI = re.compile(r"[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0F\u200D]+\s*")
+
+# Fin de la primera oración de la descripción
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _hashtag(text: str) -> Optional[str]:
+    """
+    "Café artesanal" → "#CaféArtesanal"
+    """
+    words = re.findall(r"\w+", text, re.UNICODE)
+    tag = "".join(word[:1].upper() + word[1:] for word in words)
+    return f"#{tag}" if tag else None
+
+
+class InstantCopyService:
+    """
+    Copy sin LLM a partir de COPY_TEMPLATES (tier rápido y previews)
+
+    Llena los slots de la estructura de la plataforma con hooks y CTAs del
+    template, la descripción, beneficios y keywords del producto. La
+    elección de hook/CTA es determinista por (seed, plataforma, idioma,
+    producto, variante): el mismo request siempre da el mismo copy y cada
+    variante da otra combinación. Respeta el límite de caracteres con el
+    recorte local de CopyLengthService.
+    """
+
+    def generate(
+        self,
+        product_name: str,
+        description: str,
+        platform: str,
+        language: str = "es-MX",
+        length: str = "medio",
+        use_emojis: bool = False,
+        cta: Optional[str] = None,
+        benefits: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        seed: int = 0,
+        variant: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Genera copy de template
+
+        Returns:
+            Dict con copy_text y structured (slots)
+        """
+        template = get_template(platform, language) or get_template("facebook", language)
+        structure = get_structure(platform, language)
+        rng = random.Random(stable_seed(seed, platform, language, product_name, variant))
+
+        # Hooks y CTAs en orden rotado por variante: variantes distintas
+        # no repiten combinación mientras haya opciones
+        hooks, ctas = template["hooks"], template["ctas"]
+        offset = rng.randrange(len(hooks))
+        hook = hooks[(offset + variant) % len(hooks)].format(
+            product_name=product_name, category=category or product_name
+        )
+        if not cta:
+            cta = ctas[(rng.randrange(len(ctas)) + variant) % len(ctas)]
+        if not use_emojis:
+            hook = _EMOJI.sub("", hook).strip()
+            cta = _EMOJI.sub("", cta).strip()
+
+        # Body: la descripción; con longitud corta solo la primera oración
+        body = (description or "").strip()
+        if length == "corto":
+            body = _SENTENCE_END.split(body, maxsplit=1)[0]
+
+        hashtags = []
+        for text in [product_name, *(keywords or [])[:5]]:
+            tag = _hashtag(text)
+            if tag and tag not in hashtags:
+                hashtags.append(tag)
+
+        data = {
+            "hook": hook,
+            "body": body,
+            "benefits": list((benefits or [])[:3]),
+            "hashtags": hashtags,
+            "cta": cta,
+        }
+
+        limit = get_copy_limit(platform, length)
+        result = copy_length.trim_structured(data, structure, limit)
+        if result is None:
+            data["benefits"], data["hashtags"] = [], []
+            rest = len(render_structured_copy({**data, "body": "x"}, structure)) - 1
+            data["body"] = copy_length.truncate(body, max(limit - rest, 1))
+            result = data, render_structured_copy(data, structure)
+
+        data, copy_text = result
+        return {"copy_text": copy_text, "structured": data}
+
+
+# Instancia global del servicio
+instant_copy = InstantCopyService()
@@ -0,0 +1,191 @@
+import json
+import re
+from typing import Any, List, Optional
+
+# Bloques ```json ... ``` que algunos modelos agregan alrededor del JSON
+_CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+# Separadores explícitos de variantes en texto libre: "Variante 2:",
+# "**Option 2**", "---". Las listas numeradas no separan: suelen ser
+# beneficios dentro de un mismo copy.
+_VARIANT_SPLIT = re.compile(
+    r"^\s*(?:[*#]+\s*)?(?:variante|variant|opción|opcion|option)\s*\d+\s*[:.-]?\s*\**\s*|^\s*-{3,}\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Llaves con el texto cuando el modelo devuelve objetos en lugar de strings
+_TEXT_KEYS = ("copy", "copy_text", "text", "texto", "content")
+
+
+def _strip_quotes(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'“”":
+        text = text[1:-1].strip()
+    return text
+
+
+def _item_text(item: Any) -> Optional[str]:
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        for key in _TEXT_KEYS:
+            if isinstance(item.get(key), str):
+                return item[key]
+    return None
+
+
+# Comas antes de cerrar un objeto o arreglo: {"a": 1,} / [1, 2,]
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _scan_open(text: str):
+    """
+    Cierres pendientes y si el texto termina dentro de un string
+
+    Returns:
+        (lista de "]"/"}" por cerrar, True si hay un string sin cerrar)
+    """
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}" and stack:
+            stack.pop()
+    return stack, in_string
+
+
+def _close_truncated(text: str) -> str:
+    """
+    Cierra strings, arreglos y objetos abiertos (respuesta cortada por
+    max_tokens)
+    """
+    stack, in_string = _scan_open(text)
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += ' ""'
+    return text + "".join(reversed(stack))
+
+
+def load_json(text: str) -> Optional[Any]:
+    """
+    Carga el primer objeto o arreglo JSON del texto, reparando localmente
+    los errores típicos de los modelos: bloque ```json, texto alrededor,
+    saltos de línea sin escapar, comas finales y respuesta truncada
+
+    Returns:
+        El valor JSON o None si no se pudo recuperar
+    """
+    fenced = _CODE_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    else:
+        # Bloque ``` sin cerrar (respuesta truncada)
+        text = re.sub(r"^\s*```(?:json)?", "", text, flags=re.IGNORECASE)
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return None
+    text = text[min(starts):]
+
+    closing = "}" if text[0] == "{" else "]"
+    end = text.rfind(closing)
+    attempts = [text[:end + 1]] if end > 0 else []
+    attempts.append(_close_truncated(text))
+
+    for attempt in attempts:
+        for candidate in (attempt, _TRAILING_COMMA.sub(r"\1", attempt)):
+            try:
+                return json.loads(candidate, strict=False)
+            except ValueError:
+                continue
+    return None
+
+
+def _load_json_list(text: str) -> Optional[List[Any]]:
+    """
+    Primer arreglo JSON del texto (tolera texto alrededor y saltos de
+    línea sin escapar dentro de los strings)
+    """
+    start, end = text.find("["), text.rfind("]")
+    candidates = [text[start:end + 1]] if 0 <= start < end else []
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate, strict=False)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = next((value for value in data.values() if isinstance(value, list)), None)
+        if isinstance(data, list):
+            return data
+    return None
+
+
+def _load_truncated_list(text: str) -> Optional[List[Any]]:
+    """
+    Arreglo JSON cortado por max_tokens, reparado con load_json
+
+    Si el corte quedó dentro de un string, ese último elemento es media
+    frase y se descarta.
+    """
+    data = load_json(text)
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), None)
+    if not isinstance(data, list):
+        return None
+    if _scan_open(text)[1]:
+        data = data[:-1]
+    return data
+
+
+def parse_variants(text: str, expected: int) -> List[str]:
+    """
+    Extrae hasta `expected` variantes de la respuesta de un modelo
+
+    Acepta, en orden: arreglo JSON (de strings u objetos con el texto),
+    objeto JSON con una lista, arreglo JSON truncado (se descarta el
+    último elemento si quedó a medias), texto con marcadores
+    "Variante N" / "Option N" o separado por "---".
+    Si nada de eso aplica, el texto completo es una sola variante.
+
+    Returns:
+        Variantes sin duplicados, en el orden de la respuesta
+    """
+    fenced = _CODE_FENCE.search(text)
+    body = fenced.group(1) if fenced else text
+
+    items = _load_json_list(body)
+    if items is None:
+        items = _load_truncated_list(text)
+    if items is not None:
+        variants = [_item_text(item) for item in items]
+    else:
+        variants = _VARIANT_SPLIT.split(body)
+        if len([variant for variant in variants if variant.strip()]) < 2:
+            variants = [body]
+
+    result = []
+    seen = set()
+    for variant in variants:
+        if variant is None:
+            continue
+        variant = _strip_quotes(variant)
+        if variant and variant not in seen:
+            seen.add(variant)
+            result.append(variant)
+    return result[:expected]
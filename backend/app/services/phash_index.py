@@ -0,0 +1,214 @@
+import threading
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import ProductImage
+
+# Radio máximo por trozo del multi-index hashing: con 16 bits y radio 3
+# son ~700 máscaras por tabla; por encima conviene un recorrido lineal
+MAX_CHUNK_RADIUS = 3
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _flip_masks(bits: int, radius: int) -> List[int]:
+    """
+    Máscaras XOR de todos los valores de `bits` bits a distancia <= radius
+    """
+    return [
+        sum(1 << position for position in positions)
+        for distance in range(radius + 1)
+        for positions in combinations(range(bits), distance)
+    ]
+
+
+class MultiIndexHash:
+    """
+    Índice de Hamming por multi-index hashing
+
+    El hash de 64 bits se parte en `chunks` trozos, cada uno con su tabla
+    hash. Por el principio del palomar, si dos hashes están a distancia
+    <= r, al menos un trozo está a distancia <= r // chunks: basta con
+    consultar esos vecinos en cada tabla y verificar los candidatos.
+
+    Con 4 trozos de 16 bits y r = 8 son ~550 lookups por consulta,
+    independiente del tamaño del índice (un BK-tree con hashes de 64 bits
+    termina recorriendo buena parte del árbol). Radios mayores a
+    max_radius (chunks * MAX_CHUNK_RADIUS) se resuelven con un recorrido
+    lineal: las máscaras crecen combinatoriamente y el índice deja de servir.
+    """
+
+    def __init__(self, bits: int = 64, chunks: int = 4):
+        self.chunks = chunks
+        self.chunk_bits = bits // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self._items: Dict[int, List[Hashable]] = {}
+        self._masks: Dict[int, List[int]] = {}
+        self.size = 0
+        self.max_radius = chunks * MAX_CHUNK_RADIUS
+
+    def _split(self, value: int) -> List[int]:
+        return [(value >> (i * self.chunk_bits)) & self._chunk_mask for i in range(self.chunks)]
+
+    def add(self, value: int, item: Hashable) -> None:
+        self.size += 1
+        if value in self._items:
+            self._items[value].append(item)
+            return
+
+        self._items[value] = [item]
+        for table, chunk in zip(self._tables, self._split(value)):
+            table.setdefault(chunk, []).append(value)
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, Hashable]]:
+        """
+        Items a distancia <= radius, ordenados por distancia
+        """
+        if radius > self.max_radius:
+            candidates = self._items.keys()
+        else:
+            chunk_radius = radius // self.chunks
+            masks = self._masks.get(chunk_radius)
+            if masks is None:
+                masks = self._masks.setdefault(chunk_radius, _flip_masks(self.chunk_bits, chunk_radius))
+
+            candidates = set()
+            for table, chunk in zip(self._tables, self._split(value)):
+                for mask in masks:
+                    bucket = table.get(chunk ^ mask)
+                    if bucket:
+                        candidates.update(bucket)
+
+        results = []
+        for candidate in candidates:
+            distance = hamming(value, candidate)
+            if distance <= radius:
+                results.extend((distance, item) for item in self._items[candidate])
+
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+class PHashIndexService:
+    """
+    Índice en memoria de pHash de ProductImage para encontrar casi-duplicados
+
+    - Se carga desde la DB en la primera búsqueda y luego de forma
+      incremental en cada ingesta, así ve también los uploads de otros
+      workers. created_at se toma al insertar, no al hacer commit: cada
+      refresh vuelve a leer PHASH_REFRESH_OVERLAP_SECONDS antes de la
+      última fila vista para no perder commits tardíos (las repetidas se
+      ignoran)
+    - Índice multi-index hashing (MultiIndexHash)
+    - Las búsquedas no consultan el índice en la DB; los resultados se
+      validan contra la DB al armar la respuesta (imágenes borradas se
+      descartan)
+    """
+
+    def __init__(self):
+        self._tree = MultiIndexHash()
+        self._seen = set()
+        self._last_created_at: Optional[datetime] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def add(self, image_id: str, phash: str) -> None:
+        with self._lock:
+            self._add(str(image_id), phash)
+
+    def _add(self, image_id: str, phash: str) -> None:
+        if image_id in self._seen:
+            return
+        self._seen.add(image_id)
+        self._tree.add(int(phash, 16), image_id)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Agrega al índice las imágenes creadas desde la última carga (con
+        una ventana de solapamiento, ver la docstring de la clase)
+
+        Returns:
+            Número de imágenes agregadas
+        """
+        query = db.query(ProductImage.id, ProductImage.phash, ProductImage.created_at)\
+            .filter(ProductImage.phash.isnot(None))
+        if self._last_created_at is not None:
+            since = self._last_created_at - timedelta(seconds=settings.PHASH_REFRESH_OVERLAP_SECONDS)
+            query = query.filter(ProductImage.created_at >= since)
+
+        rows = query.all()
+        with self._lock:
+            before = self._tree.size
+            for image_id, phash, created_at in rows:
+                self._add(str(image_id), phash)
+                if created_at and (self._last_created_at is None or created_at > self._last_created_at):
+                    self._last_created_at = created_at
+            self._loaded = True
+            return self._tree.size - before
+
+    def search(self, phash: str, max_distance: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        (distancia, image_id) de las imágenes a distancia <= max_distance
+        """
+        if max_distance is None:
+            max_distance = settings.PHASH_DUPLICATE_DISTANCE
+        with self._lock:
+            return self._tree.search(int(phash, 16), max_distance)
+
+    def find_near_duplicates(
+        self,
+        db: Session,
+        phash: str,
+        max_distance: Optional[int] = None,
+        product_id: Optional[str] = None,
+        exclude_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Casi-duplicados de un pHash, opcionalmente dentro de un producto
+
+        Returns:
+            Lista de {image_id, product_id, distance, file_path, width, height}
+        """
+        if not self._loaded:
+            self.refresh(db)
+
+        exclude_id = str(exclude_id) if exclude_id else None
+        matches = [
+            (distance, image_id)
+            for distance, image_id in self.search(phash, max_distance)
+            if image_id != exclude_id
+        ]
+        if not matches:
+            return []
+
+        query = db.query(ProductImage).filter(ProductImage.id.in_([image_id for _, image_id in matches]))
+        if product_id:
+            query = query.filter(ProductImage.product_id == product_id)
+        images = {str(image.id): image for image in query.all()}
+
+        return [
+            {
+                "image_id": image_id,
+                "product_id": str(images[image_id].product_id),
+                "distance": distance,
+                "file_path": images[image_id].file_path,
+                "width": images[image_id].width,
+                "height": images[image_id].height,
+            }
+            for distance, image_id in matches
+            if image_id in images
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": self._tree.size, "last_created_at": self._last_created_at, "max_radius": self._tree.max_radius}
+
+
+# Instancia global del índice
+phash_index = PHashIndexService()
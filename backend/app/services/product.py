@@ -111,9 +111,18 @@ class ProductService:
         width: Optional[int] = None,
         height: Optional[int] = None,
         file_size: Optional[int] = None,
+        image_format: Optional[str] = None,
+        mode: Optional[str] = None,
+        has_alpha: Optional[bool] = None,
+        dominant_colors: Optional[List[dict]] = None,
+        phash: Optional[str] = None,
+        detected_type: Optional[str] = None,
     ) -> Optional[ProductImage]:
         """
         Agrega una imagen al producto
+        
+        La metadata (formato, modo, alfa, colores, phash, tipo detectado)
+        viene de la ingesta; así nadie más necesita reabrir el archivo.
         """
         product = self.get_product(db, product_id)
         if not product:
@@ -127,6 +136,12 @@ class ProductService:
             width=width,
             height=height,
             file_size=file_size,
+            image_format=image_format,
+            mode=mode,
+            has_alpha=has_alpha,
+            dominant_colors=dominant_colors,
+            phash=phash,
+            detected_type=detected_type,
         )
         
         db.add(image)
@@ -134,3 +149,23 @@ class ProductService:
         db.refresh(image)
         
         return image
+    
+    def get_product_image(self, db: Session, image_id: str) -> Optional[ProductImage]:
+        """
+        Obtiene una imagen de producto por ID
+        """
+        return db.query(ProductImage).filter(ProductImage.id == image_id).first()
+    
+    def get_product_images(
+        self,
+        db: Session,
+        product_id: str,
+        image_type: Optional[ImageType] = None
+    ) -> List[ProductImage]:
+        """
+        Lista las imágenes de un producto (con su metadata)
+        """
+        query = db.query(ProductImage).filter(ProductImage.product_id == product_id)
+        if image_type:
+            query = query.filter(ProductImage.image_type == image_type)
+        return query.order_by(ProductImage.created_at).all()
@@ -1,10 +1,135 @@
-from typing import Dict, Any, Optional
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Guías de longitud por idioma
+LENGTH_GUIDES = {
+    "es-MX": {
+        "corto": "máximo 50 palabras",
+        "medio": "entre 50-100 palabras",
+        "largo": "entre 100-150 palabras"
+    },
+    "en": {
+        "corto": "maximum 50 words",
+        "medio": "between 50-100 words",
+        "largo": "between 100-150 words"
+    }
+}
+
+# Guías por plataforma
+PLATFORM_GUIDES = {
+    "facebook": {
+        "es-MX": "contenido que fomente la interacción y el compartir",
+        "en": "content that encourages interaction and sharing"
+    },
+    "instagram": {
+        "es-MX": "conciso, visual, con hashtags relevantes al final",
+        "en": "concise, visual-focused, with relevant hashtags at the end"
+    },
+    "tiktok": {
+        "es-MX": "dinámico, juvenil, que llame a la acción inmediata",
+        "en": "dynamic, youthful, with immediate call-to-action"
+    },
+    "linkedin": {
+        "es-MX": "profesional, enfocado en valor y resultados",
+        "en": "professional, focused on value and results"
+    },
+    "whatsapp": {
+        "es-MX": "personal, directo, como un mensaje de amigo",
+        "en": "personal, direct, like a message from a friend"
+    }
+}
+
+# Textos fijos del prompt de usuario por idioma. Cualquier idioma distinto
+# de es-MX usa las secciones en inglés (las guías de longitud sí exigen
+# un idioma conocido)
+SECTIONS = {
+    "es-MX": {
+        "intro": "Crea un copy de marketing para {platform} sobre el siguiente producto:\n\nProducto: ",
+        "description": "\nDescripción: ",
+        "tone": "\n\nEspecificaciones:\n- Tono: ",
+        "specs": "\n- Longitud: {length}\n- Plataforma: {platform} ({guide})\n",
+        "benefits": "\nBeneficios clave:\n",
+        "keywords": "\nPalabras clave a incluir: ",
+        "emojis": "\n✨ Incluye emojis relevantes (máximo 3-4) para hacer el copy más atractivo.\n",
+        "cta": "\nCall-to-action: ",
+        "default_cta": "\nIncluye un call-to-action efectivo al final.\n",
+        "structured": "\nResponde solo con un objeto JSON con estas llaves, sin texto adicional:\n{fields}",
+        "variants": "\nEscribe {n} variantes distintas del copy (cambia el enfoque o el gancho en cada una). "
+                    "Responde solo con un arreglo JSON de {n} strings, sin texto adicional.\n",
+    },
+    "en": {
+        "intro": "Create marketing copy for {platform} about the following product:\n\nProduct: ",
+        "description": "\nDescription: ",
+        "tone": "\n\nSpecifications:\n- Tone: ",
+        "specs": "\n- Length: {length}\n- Platform: {platform} ({guide})\n",
+        "benefits": "\nKey benefits:\n",
+        "keywords": "\nKeywords to include: ",
+        "emojis": "\n✨ Include relevant emojis (maximum 3-4) to make the copy more engaging.\n",
+        "cta": "\nCall-to-action: ",
+        "default_cta": "\nInclude an effective call-to-action at the end.\n",
+        "structured": "\nReply only with a JSON object with these keys, no additional text:\n{fields}",
+        "variants": "\nWrite {n} distinct variants of the copy (change the angle or hook in each one). "
+                    "Reply only with a JSON array of {n} strings, no additional text.\n",
+    }
+}
+
+
+# Descripción de cada slot del copy estructurado (ver structured_copy)
+STRUCTURED_FIELDS = {
+    "es-MX": {
+        "hook": "frase de apertura que capte la atención",
+        "body": "cuerpo del copy",
+        "benefits": "lista de beneficios, uno por elemento",
+        "hashtags": "lista de hashtags, cada uno con # y sin espacios",
+        "cta": "call-to-action final",
+    },
+    "en": {
+        "hook": "opening line that grabs attention",
+        "body": "main copy text",
+        "benefits": "list of benefits, one per item",
+        "hashtags": "list of hashtags, each with # and no spaces",
+        "cta": "closing call-to-action",
+    }
+}
+
+
+def _compile(language: str, platform: str, length: str) -> Tuple[str, str, str, str]:
+    """
+    Segmentos fijos del prompt para (idioma, plataforma, longitud)
+    
+    El prompt de usuario queda como:
+    intro + producto + description + descripción + tone + tono + specs + opcionales
+    """
+    sections = SECTIONS["es-MX" if language == "es-MX" else "en"]
+    guide = PLATFORM_GUIDES.get(platform, {}).get(language, '')
+    return (
+        sections["intro"].format(platform=platform),
+        sections["description"],
+        sections["tone"],
+        sections["specs"].format(
+            length=LENGTH_GUIDES[language][length], platform=platform, guide=guide
+        ),
+    )
+
+
+# Prefijos precompilados al importar para las plataformas conocidas;
+# plataformas no listadas se compilan en cada llamada
+COMPILED_PREFIXES = {
+    (language, platform, length): _compile(language, platform, length)
+    for language in LENGTH_GUIDES
+    for platform in PLATFORM_GUIDES
+    for length in LENGTH_GUIDES[language]
+}
 
 
 class PromptBuilder:
     """
     Constructor de prompts para generación de copy
     Soporta ES-MX e EN
+    
+    Los textos fijos se precompilan por (idioma, plataforma, longitud) al
+    importar el módulo; cada llamada solo concatena los slots variables.
     """
     
     SYSTEM_PROMPTS = {
@@ -69,108 +194,113 @@ Important:
         Returns:
             Dict con 'system' y 'user' prompts
         """
+        system = PromptBuilder.SYSTEM_PROMPTS[language]
         
-        # Mapeo de longitudes
-        length_guides = {
-            "es-MX": {
-                "corto": "máximo 50 palabras",
-                "medio": "entre 50-100 palabras",
-                "largo": "entre 100-150 palabras"
-            },
-            "en": {
-                "corto": "maximum 50 words",
-                "medio": "between 50-100 words",
-                "largo": "between 100-150 words"
-            }
-        }
+        prefix = COMPILED_PREFIXES.get((language, platform, length))
+        if prefix is None:
+            prefix = _compile(language, platform, length)
+        sections = SECTIONS["es-MX" if language == "es-MX" else "en"]
         
-        # Mapeo de plataformas
-        platform_guides = {
-            "facebook": {
-                "es-MX": "contenido que fomente la interacción y el compartir",
-                "en": "content that encourages interaction and sharing"
-            },
-            "instagram": {
-                "es-MX": "conciso, visual, con hashtags relevantes al final",
-                "en": "concise, visual-focused, with relevant hashtags at the end"
-            },
-            "tiktok": {
-                "es-MX": "dinámico, juvenil, que llame a la acción inmediata",
-                "en": "dynamic, youthful, with immediate call-to-action"
-            },
-            "linkedin": {
-                "es-MX": "profesional, enfocado en valor y resultados",
-                "en": "professional, focused on value and results"
-            },
-            "whatsapp": {
-                "es-MX": "personal, directo, como un mensaje de amigo",
-                "en": "personal, direct, like a message from a friend"
-            }
-        }
+        parts = [
+            prefix[0], str(product_name),
+            prefix[1], str(description),
+            prefix[2], str(tone),
+            prefix[3],
+        ]
         
-        # Construir prompt de usuario
-        if language == "es-MX":
-            user_prompt = f"""Crea un copy de marketing para {platform} sobre el siguiente producto:
-
-Producto: {product_name}
-Descripción: {description}
-
-Especificaciones:
-- Tono: {tone}
-- Longitud: {length_guides[language][length]}
-- Plataforma: {platform} ({platform_guides.get(platform, {}).get(language, '')})
-"""
-        else:  # en
-            user_prompt = f"""Create marketing copy for {platform} about the following product:
-
-Product: {product_name}
-Description: {description}
-
-Specifications:
-- Tone: {tone}
-- Length: {length_guides[language][length]}
-- Platform: {platform} ({platform_guides.get(platform, {}).get(language, '')})
-"""
-        
-        # Agregar beneficios si existen
+        # Beneficios (máximo 3)
         if benefits:
-            if language == "es-MX":
-                user_prompt += f"\nBeneficios clave:\n"
-                for benefit in benefits[:3]:  # Máximo 3
-                    user_prompt += f"- {benefit}\n"
-            else:
-                user_prompt += f"\nKey benefits:\n"
-                for benefit in benefits[:3]:
-                    user_prompt += f"- {benefit}\n"
+            parts.append(sections["benefits"])
+            parts.extend(f"- {benefit}\n" for benefit in benefits[:3])
         
-        # Agregar keywords si existen
+        # Keywords (máximo 5)
         if keywords:
-            keywords_str = ", ".join(keywords[:5])  # Máximo 5
-            if language == "es-MX":
-                user_prompt += f"\nPalabras clave a incluir: {keywords_str}\n"
-            else:
-                user_prompt += f"\nKeywords to include: {keywords_str}\n"
+            parts.extend((sections["keywords"], ", ".join(keywords[:5]), "\n"))
         
-        # Agregar emojis
         if use_emojis:
-            if language == "es-MX":
-                user_prompt += "\n✨ Incluye emojis relevantes (máximo 3-4) para hacer el copy más atractivo.\n"
-            else:
-                user_prompt += "\n✨ Include relevant emojis (maximum 3-4) to make the copy more engaging.\n"
+            parts.append(sections["emojis"])
         
-        # Agregar CTA
         if cta:
-            if language == "es-MX":
-                user_prompt += f"\nCall-to-action: {cta}\n"
-            else:
-                user_prompt += f"\nCall-to-action: {cta}\n"
+            parts.extend((sections["cta"], str(cta), "\n"))
         else:
-            if language == "es-MX":
-                user_prompt += "\nIncluye un call-to-action efectivo al final.\n"
-            else:
-                user_prompt += "\nInclude an effective call-to-action at the end.\n"
+            parts.append(sections["default_cta"])
         
         return {
-            "system": PromptBuilder.SYSTEM_PROMPTS[language],
-            "user": user_prompt
+            "system": system,
+            "user": "".join(parts)
         }
+    
+    # Prompt corto para acortar un copy existente (fallback de longitud)
+    SHORTEN_PROMPTS = {
+        "es-MX": {
+            "system": "Eres un editor de copy para redes sociales. Acortas textos sin cambiar su idioma, tono ni mensaje principal. Respondes solo con el texto acortado.",
+            "user": "Acorta este texto a máximo {limit} caracteres. Conserva el call-to-action y los hashtags más relevantes si caben.\n\n{text}",
+        },
+        "en": {
+            "system": "You are a social media copy editor. You shorten texts without changing their language, tone or main message. You reply only with the shortened text.",
+            "user": "Shorten this text to at most {limit} characters. Keep the call-to-action and the most relevant hashtags if they fit.\n\n{text}",
+        },
+    }
+    
+    @staticmethod
+    def build_shorten_prompt(text: str, limit: int, language: str = "es-MX") -> Dict[str, str]:
+        """
+        Prompt para acortar `text` a `limit` caracteres
+        
+        Returns:
+            Dict con 'system' y 'user' prompts
+        """
+        prompts = PromptBuilder.SHORTEN_PROMPTS["es-MX" if language == "es-MX" else "en"]
+        return {
+            "system": prompts["system"],
+            "user": prompts["user"].format(limit=limit, text=text),
+        }
+    
+    @staticmethod
+    def to_messages(prompts: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Mensajes estructurados para los providers
+        
+        El system prompt (fijo por idioma) se marca como prefijo cacheable;
+        todo lo variable va en el mensaje de usuario, después.
+        """
+        return [
+            {"role": "system", "content": prompts["system"], "cache": True},
+            {"role": "user", "content": prompts["user"]},
+        ]
+    
+    @staticmethod
+    def variants_instruction(language: str, n: int) -> str:
+        """
+        Instrucción que pide `n` variantes como arreglo JSON en una sola
+        respuesta (ver BaseLLMProvider.generate_candidates)
+        
+        Va al final del mensaje de usuario: el prefijo cacheable no cambia.
+        """
+        sections = SECTIONS["es-MX" if language == "es-MX" else "en"]
+        return sections["variants"].format(n=n)
+    
+    @staticmethod
+    def with_structure(prompts: Dict[str, str], language: str, slots: List[str]) -> Dict[str, str]:
+        """
+        Prompt que pide el copy como objeto JSON con los slots de la plataforma
+        """
+        key = "es-MX" if language == "es-MX" else "en"
+        fields = "".join(
+            f'- "{slot}": {STRUCTURED_FIELDS[key].get(slot, slot)}\n' for slot in slots
+        )
+        return {**prompts, "user": prompts["user"] + SECTIONS[key]["structured"].format(fields=fields)}
+    
+    @staticmethod
+    def canonical_key(prompts: Dict[str, str]) -> str:
+        """
+        Forma canónica estable de un prompt, usable como cache key
+        
+        Prompts idénticos (mismo system y user, byte a byte) producen la
+        misma key; no depende del orden de los kwargs ni del proceso.
+        """
+        digest = hashlib.sha256()
+        digest.update(prompts["system"].encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(prompts["user"].encode("utf-8"))
+        return digest.hexdigest()
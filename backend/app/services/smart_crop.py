@@ -0,0 +1,144 @@
+import hashlib
+from io import BytesIO
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+# Lado máximo de la copia sobre la que se calcula la energía
+ANALYSIS_SIZE = 256
+
+# Peso del sesgo hacia el centro (0 = ninguno)
+CENTER_BIAS = 0.5
+
+
+def _to_gray(image: Image.Image) -> Image.Image:
+    """
+    Luminancia en modo "L"
+
+    Los modos de 16/32 bits (I;16 de PNGs de 16 bits, I, F) se escalan a
+    0..255 por su máximo: convert("L") los satura a blanco y thumbnail()
+    no los soporta.
+    """
+    if image.mode in ("L", "RGB", "RGBA", "P", "LA", "1", "CMYK", "YCbCr"):
+        return image.convert("L")
+
+    values = np.asarray(image, dtype=np.float32)
+    if values.ndim == 3:
+        values = values.mean(axis=2)
+    peak = float(values.max()) if values.size else 0.0
+    if peak > 0:
+        values = values * (255.0 / peak)
+    return Image.fromarray(np.clip(values, 0, 255).astype(np.uint8), "L")
+
+
+class SmartCropService:
+    """
+    Recorte inteligente: ventana de aspecto fijo con más "energía"
+
+    - Mapa de energía de bordes (|∂x| + |∂y| de la luminancia suavizada)
+      sobre una copia de ≤256 px, con un sesgo suave hacia el centro
+    - Para un aspecto dado, la ventana más grande que cabe se desliza
+      sobre una tabla de sumas acumuladas: todas las posiciones en una
+      operación vectorizada
+    - Cache del mapa por hash de imagen y del recorte por (hash, aspecto):
+      todos los formatos de todas las plataformas reutilizan el análisis
+    """
+
+    def __init__(self):
+        self._energy_maps = LRUCache(maxsize=64)
+        self._crop_boxes = LRUCache(maxsize=settings.SMART_CROP_CACHE_SIZE)
+
+    def crop_box(self, image_bytes: bytes, aspect: float) -> Tuple[float, float, float, float]:
+        """
+        Caja de recorte (left, top, right, bottom) en fracciones del tamaño
+        original, con aspecto width / height = aspect
+        """
+        digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        return self._crop_boxes.get_or_create(
+            (digest, round(aspect, 4)),
+            lambda: self._find_window(self._energy_map(digest, image_bytes), aspect)
+        )
+
+    def _energy_map(self, digest: str, image_bytes: bytes) -> Dict:
+        def build() -> Dict:
+            with Image.open(BytesIO(image_bytes)) as image:
+                size = image.size
+                # JPEG: decodifica ya reducida y en gris (como haría thumbnail)
+                image.draft("L", (ANALYSIS_SIZE, ANALYSIS_SIZE))
+                # Convertir antes de reducir: thumbnail falla con modos de 16 bits
+                gray = _to_gray(image)
+            gray.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR)
+            gray = gray.filter(ImageFilter.GaussianBlur(1))
+
+            luma = np.asarray(gray, dtype=np.float32)
+            energy = np.zeros_like(luma)
+            energy[:, 1:] += np.abs(np.diff(luma, axis=1))
+            energy[1:, :] += np.abs(np.diff(luma, axis=0))
+
+            # Sesgo al centro: a igual energía, preferir el encuadre centrado
+            height, width = energy.shape
+            ys = (np.arange(height, dtype=np.float32) - height / 2) / height
+            xs = (np.arange(width, dtype=np.float32) - width / 2) / width
+            weight = 1 + CENTER_BIAS * np.exp(-(ys[:, None] ** 2 + xs[None, :] ** 2) * 8)
+            energy = energy * weight + 1e-3
+
+            return {"size": size, "energy": energy}
+
+        return self._energy_maps.get_or_create(digest, build)
+
+    @staticmethod
+    def _find_window(analysis: Dict, aspect: float) -> Tuple[float, float, float, float]:
+        energy = analysis["energy"]
+        width, height = analysis["size"]
+        map_height, map_width = energy.shape
+
+        if width / height > aspect:
+            # Más ancha que el destino: ventana de alto completo, se desliza en x
+            profile = energy.sum(axis=0)
+            window = min(map_width, max(1, round(map_width * aspect * height / width)))
+            start = SmartCropService._best_start(profile, window)
+            # Ancho exacto en fracciones (el mapa tiene resolución de ~1/256)
+            fraction = aspect * height / width
+            left = min(start / map_width, 1 - fraction)
+            return (left, 0.0, left + fraction, 1.0)
+
+        # Más alta que el destino: ventana de ancho completo, se desliza en y
+        profile = energy.sum(axis=1)
+        window = min(map_height, max(1, round(map_height * width / (height * aspect))))
+        start = SmartCropService._best_start(profile, window)
+        fraction = width / (height * aspect)
+        top = min(start / map_height, 1 - fraction)
+        return (0.0, top, 1.0, top + fraction)
+
+    @staticmethod
+    def _best_start(profile: np.ndarray, window: int) -> int:
+        """
+        Inicio de la ventana de largo `window` con mayor suma (sumas acumuladas)
+        
+        Si el sujeto cabe holgado, muchas posiciones empatan: se recentra la
+        ventana en el centroide de energía de la mejor, mientras conserve
+        al menos el 97% de su energía.
+        """
+        if window >= len(profile):
+            return 0
+        cumulative = np.concatenate([[0.0], np.cumsum(profile, dtype=np.float64)])
+        sums = cumulative[window:] - cumulative[:-window]
+        best = int(np.argmax(sums))
+        
+        segment = profile[best:best + window]
+        centroid = best + float((segment * np.arange(window)).sum() / segment.sum())
+        centered = int(np.clip(round(centroid - window / 2), 0, len(sums) - 1))
+        if sums[centered] >= 0.97 * sums[best]:
+            return centered
+        return best
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"energy_maps": self._energy_maps.stats(), "crop_boxes": self._crop_boxes.stats()}
+
+
+# Instancia global del servicio
+smart_crop = SmartCropService()
@@ -0,0 +1,159 @@
+import json
+import re
+from string import Formatter
+from typing import Any, Dict, List, Tuple
+
+from app.services.output_parser import load_json
+
+# Tipo JSON de cada slot de COPY_TEMPLATES[*][*]["structure"]
+SLOT_TYPES = {
+    "hook": "string",
+    "body": "string",
+    "benefits": "array",
+    "hashtags": "array",
+    "cta": "string",
+}
+
+# Llaves alternativas que usan los modelos para los mismos slots
+SLOT_ALIASES = {
+    "gancho": "hook",
+    "headline": "hook",
+    "cuerpo": "body",
+    "text": "body",
+    "texto": "body",
+    "copy": "body",
+    "beneficios": "benefits",
+    "tags": "hashtags",
+    "call_to_action": "cta",
+    "llamado": "cta",
+}
+
+_HASHTAG = re.compile(r"#(\w+)", re.UNICODE)
+_BULLET = re.compile(r"^\s*(?:[-•*✓✔✅]|\d+[.)])\s*")
+
+
+def copy_schema(slots: List[str]) -> Dict[str, Any]:
+    """
+    JSON schema del copy estructurado para los slots de una plataforma
+    """
+    properties = {}
+    for slot in slots:
+        if SLOT_TYPES.get(slot, "string") == "array":
+            properties[slot] = {"type": "array", "items": {"type": "string"}}
+        else:
+            properties[slot] = {"type": "string"}
+    return {"type": "object", "properties": properties, "required": list(slots)}
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        items = value
+    elif isinstance(value, str):
+        items = value.splitlines() if "\n" in value else value.split(",")
+    else:
+        return []
+    return [_BULLET.sub("", str(item)).strip() for item in items if str(item).strip()]
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, list):
+        return " ".join(str(item).strip() for item in value if str(item).strip())
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _hashtags(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    tags = []
+    for item in _as_list(value):
+        tag = "".join(re.findall(r"\w", item, re.UNICODE))
+        if tag and f"#{tag}" not in tags:
+            tags.append(f"#{tag}")
+    return tags
+
+
+def _coerce(data: Dict[str, Any], slots: List[str]) -> Dict[str, Any]:
+    data = {SLOT_ALIASES.get(key.lower(), key.lower()): value for key, value in data.items()}
+    result = {}
+    for slot in slots:
+        value = data.get(slot)
+        if slot == "hashtags":
+            result[slot] = _hashtags(value)
+        elif SLOT_TYPES.get(slot, "string") == "array":
+            result[slot] = _as_list(value)
+        else:
+            result[slot] = _as_text(value)
+    return result
+
+
+def _from_free_text(text: str, slots: List[str]) -> Dict[str, Any]:
+    """
+    Último recurso sin JSON: los hashtags se extraen del texto y el resto
+    queda como body
+    """
+    data = {slot: [] if SLOT_TYPES.get(slot, "string") == "array" else "" for slot in slots}
+    if "hashtags" in data:
+        data["hashtags"] = _hashtags(_HASHTAG.findall(text))
+        text = _HASHTAG.sub("", text)
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    data["body"] = re.sub(r"[ \t]+\n", "\n", text).strip()
+    return data
+
+
+def parse_structured_copy(text: str, slots: List[str]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Valida la respuesta contra el schema de los slots, reparando localmente
+
+    - JSON válido con los tipos correctos: se usa tal cual
+    - JSON con errores (truncado, comas finales, texto alrededor) o tipos
+      incorrectos (lista como string, hashtags sin #): se repara
+    - Sin JSON: hashtags extraídos del texto y el resto como body
+
+    Returns:
+        (copy estructurado con todos los slots, True si hubo que reparar)
+    """
+    try:
+        data = json.loads(text)
+        repaired = False
+    except ValueError:
+        data = load_json(text)
+        repaired = True
+
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        data, repaired = data[0], True
+    if not isinstance(data, dict):
+        return _from_free_text(text, slots), True
+
+    result = _coerce(data, slots)
+    if not repaired:
+        repaired = any(result[slot] != data.get(slot) for slot in slots)
+    return result, repaired
+
+
+def render_structured_copy(data: Dict[str, Any], structure: str) -> str:
+    """
+    Arma el copy de texto con la estructura de la plataforma
+
+    Los slots vacíos se omiten junto con su separador.
+    """
+    parts = []
+    separator = ""
+    for literal, field, _, _ in Formatter().parse(structure):
+        separator += literal
+        if field is None:
+            continue
+
+        value = data.get(field)
+        if field == "hashtags":
+            value = " ".join(value or [])
+        elif isinstance(value, list):
+            value = "\n".join(f"• {item}" for item in value)
+
+        if value:
+            if parts:
+                parts.append(separator)
+            parts.append(value)
+        separator = ""
+    return "".join(parts)
@@ -3,6 +3,7 @@ Templates de copy por plataforma e idioma
 
 Del implementation_plan.md líneas 259-260, 373-455
 """
+from string import Formatter
 
 COPY_TEMPLATES = {
     "es-MX": {
@@ -217,3 +218,12 @@ def get_template(platform: str, language: str = "es-MX") -> dict:
 def get_copy_limit(platform: str, length: str = "medio") -> int:
     """Obtiene límite de caracteres para plataforma"""
     return PLATFORM_COPY_LIMITS.get(platform, {}).get(length, 250)
+
+def get_structure(platform: str, language: str = "es-MX") -> str:
+    """Obtiene la estructura de slots del copy (facebook si la plataforma no existe)"""
+    template = get_template(platform, language) or get_template("facebook", language)
+    return template["structure"]
+
+def get_structure_slots(platform: str, language: str = "es-MX") -> list:
+    """Obtiene los slots de la estructura en orden: ['hook', 'body', ...]"""
+    return [field for _, field, _, _ in Formatter().parse(get_structure(platform, language)) if field]
@@ -3,6 +3,8 @@ Templates de imagen por plataforma
 
 Del implementation_plan.md líneas 261, 459-497
 """
+from typing import Optional
+
 
 # Tamaños de imagen por plataforma (del plan líneas 462-486)
 IMAGE_SIZES = {
@@ -31,6 +33,65 @@ IMAGE_SIZES = {
     }
 }
 
+# Perfiles de codificación de salida
+OUTPUT_PROFILES = {
+    # Las redes recodifican lo que se sube: JPEG baseline optimizado
+    # (progresivo cuesta ~2.5x CPU para ~1% de ahorro)
+    "jpeg": {
+        "format": "JPEG",
+        "quality": 85,
+        "min_quality": 50,
+        "optimize": True,
+        "subsampling": "4:2:0"
+    },
+    "jpeg_progressive": {
+        "format": "JPEG",
+        "quality": 85,
+        "min_quality": 50,
+        "progressive": True,
+        "optimize": True,
+        "subsampling": "4:2:0"
+    },
+    "jpeg_hq": {
+        "format": "JPEG",
+        "quality": 92,
+        "min_quality": 70,
+        "progressive": True,
+        "optimize": True,
+        "subsampling": "4:4:4"   # Texto fino / bordes de color
+    },
+    "webp": {
+        "format": "WEBP",
+        "quality": 80,
+        "min_quality": 40,
+        "method": 4              # 0 = rápido, 6 = más compresión
+    },
+    "avif": {
+        "format": "AVIF",
+        "quality": 60,
+        "min_quality": 30,
+        "speed": 6,
+        "fallback": "webp"       # Si Pillow no tiene soporte AVIF
+    },
+    "png": {
+        "format": "PNG",
+        "compress_level": 6,
+        "lossless": True
+    }
+}
+
+# Perfil por plataforma: las redes aceptan JPEG de forma universal;
+# WebP/AVIF para previews y entrega web
+PLATFORM_OUTPUT_PROFILES = {
+    "facebook": "jpeg",
+    "instagram": "jpeg",
+    "tiktok": "jpeg",
+    "linkedin": "jpeg",
+    "whatsapp": "jpeg",
+    "preview": "webp",
+    "web": "avif"
+}
+
 # Configuración de imagen por tipo
 IMAGE_TYPE_CONFIG = {
     "producto": {
@@ -105,3 +166,10 @@ def get_image_prompt(image_type: str, language: str = "es-MX", **kwargs) -> str:
     """
     template = IMAGE_PROMPTS.get(language, IMAGE_PROMPTS["es-MX"]).get(image_type, "")
     return template.format(**kwargs)
+
+def get_output_profile(platform: Optional[str] = None, profile: Optional[str] = None) -> dict:
+    """
+    Obtiene perfil de codificación (explícito > por plataforma > jpeg)
+    """
+    name = profile or PLATFORM_OUTPUT_PROFILES.get(platform, "jpeg")
+    return OUTPUT_PROFILES.get(name, OUTPUT_PROFILES["jpeg"])
@@ -0,0 +1,249 @@
+"""
+Microbenchmarks de ImageCompositorService y ExportService
+
+Mide las rutas CPU-bound con imágenes sintéticas deterministas de tamaño
+realista y compara contra baselines guardados en `baselines.json`.
+
+Uso (desde backend/):
+    python -m benchmarks.compositor_bench                  # correr y comparar
+    python -m benchmarks.compositor_bench -k glow          # filtrar por nombre
+    python -m benchmarks.compositor_bench --save-baseline  # actualizar baselines
+    python -m benchmarks.compositor_bench --threshold 1.15 # tolerancia de regresión
+
+Sale con código 1 si el mínimo de algún benchmark es más lento que
+baseline × threshold (default 1.25). Se compara `min_ms`, no la mediana:
+el ruido de la máquina (otros procesos, CPU compartida) solo suma tiempo,
+así que el mínimo de 10 rondas es mucho más estable. Los benchmarks de
+pocos ms se repiten dentro de cada ronda (MIN_ROUND_MS) para que su
+mínimo no dependa de la resolución del reloj ni de un solo cambio de
+contexto.
+
+Los baselines dependen de la máquina: regenéralos (en un commit propio,
+nunca junto con un cambio de código) en el mismo hardware donde se
+comparan, p. ej. el runner de CI. La clave "machine" de `baselines.json`
+registra dónde se midieron.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.providers.image.fake import FakeImageProvider
+from app.services.export import ExportService
+from app.services.image_compositor import ImageCompositorService
+from app.templates.image_templates import IMAGE_SIZES
+
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 1.25
+DEFAULT_ROUNDS = 10
+
+# Duración mínima de una ronda: los benchmarks rápidos (~1-10 ms) se
+# ejecutan varias veces por ronda, como timeit.autorange
+MIN_ROUND_MS = 50.0
+
+
+class Fixtures:
+    """
+    Imágenes de entrada (se generan una sola vez por corrida)
+    """
+
+    def __init__(self, seed: int = 0):
+        render = FakeImageProvider.render
+        # Foto de celular típica (12MP) y tamaño de post ya redimensionado
+        self.photo = render("photo", 4000, 3000, image_format="JPEG", seed=seed)
+        self.post = render("post", 1080, 1080, image_format="JPEG", seed=seed)
+        self.logo = render("logo", 800, 800, transparent=True, seed=seed)
+        self.transparent = render("product", 1080, 1080, transparent=True, seed=seed)
+        self.slides = [
+            render(f"slide-{i}", 2000, 2000, image_format="JPEG", seed=seed)
+            for i in range(10)
+        ]
+
+
+def build_benchmarks(fx: Fixtures) -> Dict[str, Callable[[], Awaitable]]:
+    """
+    Registro de benchmarks: nombre → corutina sin argumentos
+    """
+    compositor = ImageCompositorService()
+    exporter = ExportService()
+    benchmarks: Dict[str, Callable[[], Awaitable]] = {}
+
+    for platform_name, formats in IMAGE_SIZES.items():
+        for format_type in formats:
+            benchmarks[f"resize_for_platform[{platform_name}-{format_type}]"] = (
+                lambda p=platform_name, f=format_type: compositor.resize_for_platform(fx.photo, p, f)
+            )
+
+    benchmarks["add_logo_overlay[1080]"] = lambda: compositor.add_logo_overlay(fx.post, fx.logo)
+    benchmarks["add_watermark[1080]"] = lambda: compositor.add_watermark(fx.post, "@mango.marketing")
+    benchmarks["create_rounded_corners[1080]"] = lambda: compositor.create_rounded_corners(fx.post)
+    benchmarks["apply_glow_effect[1080-opaque]"] = lambda: compositor.apply_glow_effect(fx.post)
+    benchmarks["apply_glow_effect[1080-alpha]"] = lambda: compositor.apply_glow_effect(fx.transparent)
+    benchmarks["create_carousel_images[10x2000]"] = lambda: compositor.create_carousel_images(fx.slides)
+
+    # 5 plataformas × 4 imágenes de post + copy
+    export_images = {p: [fx.post] * 4 for p in IMAGE_SIZES}
+    export_copy = {p: "Copy de ejemplo para la plataforma. " * 20 for p in IMAGE_SIZES}
+    benchmarks["create_export_package[5x4]"] = lambda: exporter.create_export_package(
+        copy_data=export_copy,
+        images=export_images,
+        product_name="Café Artesanal",
+    )
+
+    return benchmarks
+
+
+def measure(
+    loop: asyncio.AbstractEventLoop,
+    bench: Callable[[], Awaitable],
+    rounds: int,
+    warmup: int = 1
+) -> Dict[str, float]:
+    """
+    Ejecuta un benchmark `rounds` veces y retorna estadísticas en ms por
+    llamada (cada ronda repite la llamada hasta durar MIN_ROUND_MS)
+    """
+    for _ in range(warmup):
+        loop.run_until_complete(bench())
+
+    started = time.perf_counter()
+    loop.run_until_complete(bench())
+    single_ms = (time.perf_counter() - started) * 1000
+    number = max(1, math.ceil(MIN_ROUND_MS / max(single_ms, 0.001)))
+
+    timings: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            loop.run_until_complete(bench())
+        timings.append((time.perf_counter() - started) * 1000 / number)
+
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "stdev_ms": round(statistics.stdev(timings), 3) if len(timings) > 1 else 0.0,
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+def load_baselines(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("benchmarks", {})
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def save_baselines(path: str, results: Dict[str, Dict]) -> None:
+    existing = load_baselines(path)
+    existing.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "machine": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": _cpu_model(),
+                    "cpu_count": os.cpu_count(),
+                },
+                "benchmarks": dict(sorted(existing.items())),
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def compare(
+    results: Dict[str, Dict],
+    baselines: Dict[str, Dict],
+    threshold: float
+) -> Tuple[List[str], List[Tuple[str, float, Optional[float], Optional[float]]]]:
+    """
+    Compara mínimos contra baseline
+
+    Returns:
+        (regresiones, filas de reporte (nombre, actual, baseline, ratio))
+    """
+    regressions = []
+    rows = []
+    for name, stats in results.items():
+        baseline = baselines.get(name, {}).get("min_ms")
+        ratio = stats["min_ms"] / baseline if baseline else None
+        rows.append((name, stats["min_ms"], baseline, ratio))
+        if ratio is not None and ratio > threshold:
+            regressions.append(name)
+    return regressions, rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks del compositor y export")
+    parser.add_argument("-k", dest="keyword", default=None, help="Filtrar benchmarks por substring")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Ratio máximo actual/baseline antes de marcar regresión")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar resultados como baseline")
+    parser.add_argument("--json", dest="json_path", default=None, help="Guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    benchmarks = build_benchmarks(Fixtures())
+    if args.keyword:
+        benchmarks = {n: b for n, b in benchmarks.items() if args.keyword in n}
+
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for name, bench in benchmarks.items():
+            results[name] = measure(loop, bench, args.rounds)
+    finally:
+        loop.close()
+
+    regressions, rows = compare(results, load_baselines(args.baselines), args.threshold)
+
+    width = max(len(name) for name, *_ in rows) if rows else 10
+    print(f"{'benchmark':<{width}}  {'min':>10}  {'baseline':>10}  {'ratio':>7}")
+    for name, current, baseline, ratio in rows:
+        baseline_str = f"{baseline:10.2f}" if baseline else f"{'-':>10}"
+        ratio_str = f"{ratio:7.2f}" if ratio else f"{'-':>7}"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<{width}}  {current:10.2f}  {baseline_str}  {ratio_str}{flag}")
+    print(f"(tiempos en ms, mínimo de {args.rounds} rondas)")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        save_baselines(args.baselines, results)
+        print(f"Baselines guardados en {args.baselines}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regresión(es) sobre el umbral ×{args.threshold}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
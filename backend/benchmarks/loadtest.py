@@ -0,0 +1,268 @@
+"""
+Harness de load test reproducible con providers falsos
+
+Ejercita la API completa sin API keys reales usando los providers `fake`.
+Por defecto corre en proceso (ASGI, sin red ni servidor); con --base-url
+apunta a un servidor desplegado.
+
+Escenarios:
+- single_copy:  POST /api/generate/copy para una plataforma
+- campaign:     copy para 5 plataformas + 1 imagen, en paralelo
+- compositing:  resize a todos los formatos + logo + watermark (en proceso)
+- export:       POST /api/export/zip
+
+Uso (desde backend/):
+    python -m benchmarks.loadtest --scenario all --requests 200 --concurrency 16
+    python -m benchmarks.loadtest --scenario single_copy --llm-latency lognormal:300:0.5 \\
+        --error-rate 0.02 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+# La app exige DATABASE_URL aunque estos escenarios no tocan la base de datos
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx
+
+from app.providers.llm.fake import FakeLLMProvider
+from app.providers.image.fake import FakeImageProvider
+
+
+PLATFORMS = ["facebook", "instagram", "tiktok", "linkedin", "whatsapp"]
+PRODUCTS = [
+    ("Café Artesanal Oaxaqueño", "Café de altura cultivado en las montañas de Oaxaca"),
+    ("Mezcal Reposado", "Mezcal artesanal reposado 6 meses en barrica de roble"),
+    ("Chocolate de Mesa", "Chocolate tradicional molido en piedra con canela"),
+    ("Salsa Macha", "Salsa de chiles secos y cacahuate, receta familiar"),
+]
+LOADTEST_MODEL = "fake-loadtest"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Percentil por nearest-rank sobre una lista ordenada
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class ScenarioResult:
+    """
+    Latencias y errores de un escenario
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> Dict:
+        values = sorted(self.latencies)
+        total = len(values) + self.errors
+        return {
+            "scenario": self.name,
+            "requests": total,
+            "errors": self.errors,
+            "throughput_rps": total / self.elapsed if self.elapsed else 0.0,
+            "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p90_ms": percentile(values, 90) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000 if values else 0.0,
+        }
+
+
+class LoadTest:
+    """
+    Driver de carga en lazo cerrado: `concurrency` workers ejecutan
+    `requests` iteraciones del escenario en total
+    """
+
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.seed = seed
+        self._compositor = None
+        self._fixtures: Dict[str, bytes] = {}
+
+    # --- Escenarios ---
+
+    def _copy_payload(self, rng: random.Random, platform: str) -> Dict:
+        name, description = rng.choice(PRODUCTS)
+        return {
+            "product_name": name,
+            "description": description,
+            "platform": platform,
+            "language": rng.choice(["es-MX", "en"]),
+            "api_key": "fake",
+            "llm_provider": "fake",
+            "llm_model": LOADTEST_MODEL,
+            "length": rng.choice(["corto", "medio", "largo"]),
+            "use_emojis": rng.random() < 0.5,
+            "benefits": ["100% orgánico", "Sabor único"],
+        }
+
+    async def _post(self, path: str, payload: Dict) -> None:
+        response = await self.client.post(path, json=payload)
+        response.raise_for_status()
+
+    async def single_copy(self, rng: random.Random) -> None:
+        await self._post("/api/generate/copy", self._copy_payload(rng, rng.choice(PLATFORMS)))
+
+    async def campaign(self, rng: random.Random) -> None:
+        name, _ = rng.choice(PRODUCTS)
+        tasks = [
+            self._post("/api/generate/copy", self._copy_payload(rng, platform))
+            for platform in PLATFORMS
+        ]
+        tasks.append(self._post("/api/generate/image", {
+            "api_key": "fake",
+            "image_provider": "fake",
+            "image_model": LOADTEST_MODEL,
+            "prompt": f"Fotografía profesional de {name}",
+            "width": 1024,
+            "height": 1024,
+        }))
+        await asyncio.gather(*tasks)
+
+    async def compositing(self, rng: random.Random) -> None:
+        from app.templates.image_templates import IMAGE_SIZES
+
+        compositor = self._get_compositor()
+        platform = rng.choice(PLATFORMS)
+        photo = self._fixtures["photo"]
+
+        for format_type in IMAGE_SIZES[platform]:
+            resized = await compositor.resize_for_platform(photo, platform, format_type)
+            with_logo = await compositor.add_logo_overlay(resized, self._fixtures["logo"])
+            await compositor.add_watermark(with_logo, "@mango.mx")
+
+    async def export(self, rng: random.Random) -> None:
+        name, description = rng.choice(PRODUCTS)
+        await self._post("/api/export/zip", {
+            "copy_data": {p: f"{name}: {description}" * 5 for p in PLATFORMS},
+            "product_name": name,
+            "platforms": PLATFORMS,
+            "hashtags": ["mango", "mx"],
+        })
+
+    def _get_compositor(self):
+        if self._compositor is None:
+            from app.services.image_compositor import ImageCompositorService
+            self._compositor = ImageCompositorService()
+            self._fixtures["photo"] = FakeImageProvider.render(
+                "photo", 3000, 2000, image_format="JPEG", seed=self.seed
+            )
+            self._fixtures["logo"] = FakeImageProvider.render(
+                "logo", 512, 512, transparent=True, seed=self.seed
+            )
+        return self._compositor
+
+    # --- Driver ---
+
+    async def run(self, name: str, total: int, concurrency: int) -> ScenarioResult:
+        scenario: Callable = getattr(self, name)
+        result = ScenarioResult(name)
+        counter = iter(range(total))
+
+        async def worker():
+            for iteration in counter:
+                rng = random.Random(f"{self.seed}:{name}:{iteration}")
+                started = time.perf_counter()
+                try:
+                    await scenario(rng)
+                    result.latencies.append(time.perf_counter() - started)
+                except Exception:
+                    result.errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - started
+        return result
+
+
+def _print_table(summaries: List[Dict]) -> None:
+    header = f"{'scenario':<14}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for s in summaries:
+        print(
+            f"{s['scenario']:<14}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p90_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}"
+        )
+    print("(latencias en ms)")
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test de Mango Marketing AI con providers fake")
+    parser.add_argument("--scenario", default="all",
+                        choices=["all", "single_copy", "campaign", "compositing", "export"])
+    parser.add_argument("--requests", type=int, default=100, help="Iteraciones por escenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", default=None, help="Servidor remoto (default: en proceso)")
+    parser.add_argument("--llm-latency", default="lognormal:150:0.4", help="Distribución de latencia LLM")
+    parser.add_argument("--image-latency", default="lognormal:800:0.3", help="Distribución de latencia de imagen")
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--image-size", default=None, help="Forzar tamaño de imagen generada, p. ej. 2048x2048")
+    parser.add_argument("--json", dest="json_path", default=None, help="Guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    # Presets del run (en un servidor remoto deben registrarse allá)
+    FakeLLMProvider.register_model(
+        LOADTEST_MODEL,
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    FakeImageProvider.register_model(
+        LOADTEST_MODEL,
+        latency=args.image_latency,
+        error_rate=args.error_rate,
+        size=tuple(int(v) for v in args.image_size.split("x")) if args.image_size else None,
+        seed=args.seed,
+    )
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+
+    scenarios = ["single_copy", "campaign", "compositing", "export"] if args.scenario == "all" else [args.scenario]
+    if args.base_url and "compositing" in scenarios:
+        # El compositor no tiene endpoint HTTP: solo en proceso
+        scenarios.remove("compositing")
+
+    summaries = []
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120) as client:
+        load_test = LoadTest(client, seed=args.seed)
+        for name in scenarios:
+            result = await load_test.run(name, args.requests, args.concurrency)
+            summaries.append(result.summary())
+
+    _print_table(summaries)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": summaries}, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))